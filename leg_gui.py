@@ -1,111 +1,107 @@
-import math, time, threading, json
-import numpy as np
+import math, os, time, threading, json
 import streamlit as st
-import matplotlib.pyplot as plt
+
+from spaider import calibration, memo, metrics, player
+from spaider.metrics import PrometheusExporter, timed
+from spaider.kinematics import (
+    DEFAULT_L, SAFE_MIN, SAFE_MAX, clamp, fk_xyz, ik_solution, deg_to_us, us_to_counts, ticks_table,
+)
+from spaider.trajectory import SWING_SHAPES, CycleSampler, GaitStream, gait_cycle, preflight_report
+from spaider.workspace import workspace_map
+from spaider.protocol import (HELLO_BIN, FRAME_LEN, CMD_HEX_TICKS, PWM_HZ, BUF_TICKS, BUF_XYZ,
+                              frame_len, stream_hz, hex_ticks_frames)
+from spaider.hexapod import Hexapod
+from spaider.dynamics import JOINTS, SERVO_MODELS, dynamic_report
+from spaider.link import SerialLink
+from spaider.liveview import LIVE_FPS, LiveLegView, PoseTap
+from spaider.recording import REC_DIR, Recorder, Recording, ReplaySource, list_recordings, new_path, recording_summary
+from spaider.logbuf import RingLog, format_record, tail_ndjson
+from spaider.emulator import EMU_PORT, EmulatedSerial
+from spaider.scheduler import POLICIES
+from spaider.upload import CycleUploader, UploadError, xyz_to_buffer
+from spaider.plots import RENDER_MODES, workspace_pngs, ik_pngs, traj_pngs
 
 # ====== Serie (opcional; solo local) ======
 try:
-    import serial
     from serial.tools import list_ports
     HAS_SERIAL = True
 except Exception:
     HAS_SERIAL = False
 
+RERUN_T0 = time.perf_counter()
 st.set_page_config(page_title="spAIder — Leg Lab (Advanced)", layout="wide")
 
+LOG_PATH = "spaider_log.ndjson"           # volcado rotativo del log (spaider_log.ndjson.1, .2, …)
+METRICS_PATH = "spaider_metrics.prom"
+TAB_HELP = "Render de cada pestaña en el rerun"
+MOTION_CMDS = {"XYZ", "T", "HEX", "READY"} # tramas del player: ocultas en la pestaña Log salvo que se pidan
+
+@st.cache_resource
+def get_log():
+    """Log compartido por la GUI, el lector del enlace y el hilo del player (memoria acotada)."""
+    return RingLog(capacity=4096, path=LOG_PATH)
+
 # ====== Estado persistente ======
 ss = st.session_state
 ss.setdefault("ser", None)
-ss.setdefault("log", [])
+ss.setdefault("link", None)              # SerialLink: hilo lector + respuestas correladas
+ss.log = get_log()
 ss.setdefault("ZERO", [90.0, 90.0, 90.0])  # coxa,fémur,tibia (offsets servo->mecánico)
 ss.setdefault("DIR",  [1, -1, -1])        # direcciones (+1 o -1)
 ss.setdefault("baud", 115200)
-
-# ====== Parámetros geométricos y límites ======
-DEFAULT_L = dict(L1=50.0, L2=80.0, L3=100.0)  # mm
-SAFE_MIN = [0, 10, 10]    # límites mecánicos aproximados (grados)
-SAFE_MAX = [180, 170, 170]
-
-US_MIN = 500   # μs para 0°
-US_MAX = 2500  # μs para 180°
-PERIOD_US = 20000  # μs a 50 Hz (PCA9685)
-COUNTS = 4096      # 12-bit
-
-# ====== Utilidades geométricas ======
-def clamp(v, lo, hi): return max(lo, min(hi, v))
-
-def wrap_deg_0_360(a):
-    a = a % 360.0
-    if a < 0: a += 360.0
-    return a
-
-def fk_xyz(L1,L2,L3, t1_deg, t2_deg, t3_deg):
-    """Cinemática directa (x,y,z) a partir de ángulos mecánicos t1,t2,t3 en grados."""
-    t1 = math.radians(t1_deg); t2 = math.radians(t2_deg); t3 = math.radians(t3_deg)
-    r_xy = L2*math.cos(t2) + L3*math.cos(t2+t3)   # proyección en planta de fémur+tibia
-    z    = L2*math.sin(t2) + L3*math.sin(t2+t3)   # altura
-    r_tot = L1 + r_xy                              # L1 adelanta el pie respecto al eje de coxa
-    x = r_tot*math.cos(t1)
-    y = r_tot*math.sin(t1)
-    return x,y,z
-
-def ik_angles_variant(L1,L2,L3, x,y,z, knee_up=True):
-    """Cinemática inversa con dos ramas: knee_up (rodilla “hacia arriba”) y knee_down (hacia abajo)."""
-    t1 = math.degrees(math.atan2(y, x))          # giro de coxa en planta
-    rxy = math.sqrt(x*x + y*y) - L1              # “radio útil” desde la bisagra del fémur
-    if rxy < 0: rxy = 0.0
-    D = (rxy*rxy + z*z - L2*L2 - L3*L3)/(2.0*L2*L3)
-    D = clamp(D, -1.0, 1.0)                      # si quedaba fuera por redondeos, lo acotamos
-    t3r = math.acos(D)
-    if not knee_up:
-        t3r = -t3r
-    t3 = math.degrees(t3r)
-    t2 = math.degrees(math.atan2(z, rxy) - math.atan2(L3*math.sin(t3r), L2 + L3*math.cos(t3r)))
-    return (t1, t2, t3)
-
-def ik_angles(L1,L2,L3, x,y,z):
-    return ik_angles_variant(L1,L2,L3, x,y,z, knee_up=True)
+ss.setdefault("proto", "ascii")          # "ascii" | "bin" (negociado con HELLO BIN)
+ss.setdefault("buf_cap", 0)              # muestras que caben en el buffer del sketch
+ss.setdefault("buf_playing", False)      # reproducción desde el buffer del Arduino
 
 def servo_to_mech(idx, servo_deg):
-    return (servo_deg - ss.ZERO[idx]) * (1 if ss.DIR[idx]==1 else -1)
+    return calibration.servo_to_mech(idx, servo_deg, ss.ZERO, ss.DIR)
 
 def mech_to_servo(idx, mech_deg):
-    return ss.ZERO[idx] + ss.DIR[idx]*mech_deg
-
-def deg_to_us(servo_deg, us_min=US_MIN, us_max=US_MAX):
-    """Convierte grados de servo (0–180) a microsegundos."""
-    return us_min + (us_max - us_min) * (servo_deg/180.0)
-
-def us_to_counts(us):
-    """Convierte microsegundos a “ticks” 12-bit del PCA9685."""
-    return int(round(us * COUNTS / PERIOD_US))
+    return calibration.mech_to_servo(idx, mech_deg, ss.ZERO, ss.DIR)
 
 # ====== Serie helpers ======
 def list_serial_ports():
     if not HAS_SERIAL: return []
     return [p.device for p in list_ports.comports()]
 
-def send_line(line: str, read_back=True):
-    ser = ss.ser
-    if ser is None:
+def send_cmd(line: str, timeout=None):
+    """Envía una línea sin bloquear; devuelve un Future[Reply] o None si no hay enlace."""
+    link = ss.get("link")
+    if link is None:
         ss.log.append("⛔ No conectado.")
-        return False
+        return None
     try:
-        if not line.endswith("\n"): line += "\n"
-        ser.write(line.encode("utf-8"))
-        ss.log.append("→ " + line.strip())
-        if read_back:
-            t0 = time.time()
-            while time.time()-t0 < 0.25:
-                data = ser.read_all()
-                if data:
-                    for part in data.decode(errors="replace").splitlines():
-                        ss.log.append("← " + part.strip())
-                time.sleep(0.01)
-        return True
+        return link.send(line, timeout=timeout)
     except Exception as e:
         ss.log.append(f"[ERR] {e}")
+        return None
+
+def wait_replies(futs, timeout=0.5):
+    """Espera (como mucho `timeout`) a que lleguen las respuestas; no bloquea si ya llegaron."""
+    deadline = time.monotonic() + timeout
+    for f in futs:
+        try:
+            f.result(timeout=max(0.0, deadline - time.monotonic()))
+        except Exception:
+            pass
+
+@timed("spaider_send_line_seconds", "send_line desde la GUI (con la espera del OK)")
+def send_line(line: str, read_back=True):
+    fut = send_cmd(line)
+    if fut is None:
         return False
+    if read_back:
+        wait_replies([fut])
+    return True
+
+def negotiate_binary():
+    """Pide tramas binarias; si el sketch no responde "OK BIN", seguimos en ASCII."""
+    ss.proto = "ascii"; ss.buf_cap = 0
+    try:
+        ss.proto, ss.buf_cap = player.negotiate_binary(ss.link)
+    except Exception as e:
+        ss.log.append(f"[ERR] {HELLO_BIN}: {e}")
+    ss.log.append(f"[OK] Protocolo: {ss.proto} (buffer: {ss.buf_cap} muestras)")
 
 # ====== Recursos thread-safe para el player ======
 @st.cache_resource
@@ -113,16 +109,22 @@ def get_player_resources():
     return {
         "run_event": threading.Event(),
         "lock": threading.Lock(),
+        "tap": PoseTap(),            # lo que el player envía, para la vista en vivo
     }
 
 def estop(res):
-    """Botón rojo: detiene el hilo y apaga los servos."""
+    """Botón rojo: OFF por delante de todo lo encolado y para el hilo. Devuelve los s hasta la línea (o None)."""
+    res["run_event"].clear()
+    ss.buf_playing = False  # OFF también para la reproducción desde el buffer del sketch
+    link = ss.get("link")
+    if link is None:
+        ss.log.append("⛔ No conectado.")
+        return None
     try:
-        if "run_event" in res and res["run_event"].is_set():
-            res["run_event"].clear()
-    except:
-        pass
-    send_line("OFF")
+        return link.estop("OFF").result(timeout=1.0)
+    except Exception as e:
+        ss.log.append(f"[ERR] E-STOP: {e}")
+        return None
 
 # ====== Logo spAIder (SVG inline) ======
 def render_logo():
@@ -158,32 +160,36 @@ with st.sidebar:
     st.caption("Proyecto educativo controlado por IA 🧠")
 
     st.subheader("Conexión serie (opcional)")
-    if HAS_SERIAL:
-        ports = list_serial_ports() or ["COM3"]
-        port = st.selectbox("Puerto", ports, index=0)
-        ss.baud = st.selectbox("Baudios", [115200, 57600, 38400, 19200, 9600], index=0)
-        c1, c2 = st.columns(2)
-        if c1.button("Conectar", use_container_width=True, disabled=ss.ser is not None):
-            try:
-                ser = serial.Serial(port, baudrate=ss.baud, timeout=0.2)
-                time.sleep(2.0)  # auto-reset UNO
-                ss.ser = ser
-                ss.log.append(f"[OK] Conectado a {port} @ {ss.baud}")
-                send_line("HELLO")
-            except Exception as e:
-                ss.ser = None
-                ss.log.append(f"[ERR] {e}")
-                st.error(str(e))
-        if c2.button("Desconectar", use_container_width=True, disabled=ss.ser is None):
-            try:
-                if ss.ser: ss.ser.close()
-                ss.ser = None
-                ss.log.append("[OK] Desconectado.")
-            except Exception as e:
-                ss.log.append(f"[ERR] {e}")
-                st.error(str(e))
-    else:
+    if not HAS_SERIAL:
         st.info("Instala pyserial para usar COM (local):  pip install pyserial")
+    ports = (list_serial_ports() or (["COM3"] if HAS_SERIAL else [])) + [EMU_PORT]
+    port = st.selectbox("Puerto", ports, index=0,
+                        help=f"{EMU_PORT}: firmware emulado en Python (sin Arduino), con tiempos de línea y CPU.")
+    ss.baud = st.selectbox("Baudios", [115200, 57600, 38400, 19200, 9600], index=0)
+    want_bin = st.checkbox("Tramas binarias (HELLO BIN)", value=True,
+                           help="Si el firmware lo admite, el player envía tramas de 9 bytes en vez de texto.")
+    c1, c2 = st.columns(2)
+    if c1.button("Conectar", use_container_width=True, disabled=ss.ser is not None):
+        try:
+            ss.ser = ser = player.open_serial(port, ss.baud)
+            ss.link = SerialLink(ser, lock=get_player_resources()["lock"], sink=ss.log.add).start()
+            ss.log.append(f"[OK] Conectado a {port} @ {ss.baud}")
+            if want_bin: negotiate_binary()
+            else: send_line("HELLO")
+        except Exception as e:
+            ss.ser = None; ss.link = None
+            ss.log.append(f"[ERR] {e}")
+            st.error(str(e))
+    if c2.button("Desconectar", use_container_width=True, disabled=ss.ser is None):
+        try:
+            if ss.get("link"): ss.link.close()
+            if ss.ser: ss.ser.close()
+            ss.ser = None; ss.link = None
+            ss.proto = "ascii"
+            ss.log.append("[OK] Desconectado.")
+        except Exception as e:
+            ss.log.append(f"[ERR] {e}")
+            st.error(str(e))
 
     st.subheader("Geometría (mm)")
     L1 = st.number_input("L1 (coxa)", value=DEFAULT_L["L1"], step=1.0, key="L1_val")
@@ -204,22 +210,23 @@ with st.sidebar:
     res_sidebar = get_player_resources()
     st.divider()
     if st.button("🛑 E-STOP (OFF + Stop player)", type="primary", use_container_width=True):
-        estop(res_sidebar)
-        st.success("E-STOP ejecutado")
+        dt = estop(res_sidebar)
+        if dt is not None:
+            st.success(f"E-STOP: OFF en la línea en {dt*1e3:.1f} ms (peor de la sesión: {ss.link.estop_worst*1e3:.1f} ms)")
 
     # ---- Presets (guardar/cargar) ----
     st.subheader("Presets")
-    cfg = {"L":[L1, L2, L3], "ZERO": ss.ZERO, "DIR": ss.DIR, "baud": ss.baud}
+    cfg = calibration.preset_to_dict([L1, L2, L3], ss.ZERO, ss.DIR, ss.baud)
     st.download_button("💾 Descargar preset", data=json.dumps(cfg, indent=2),
-                       file_name="spAIder_preset.json", mime="application/json", use_container_width=True)
+                       file_name=calibration.PRESET_FILE, mime="application/json", use_container_width=True)
     up = st.file_uploader("📤 Cargar preset", type=["json"])
     if up is not None:
         try:
             data = json.loads(up.read().decode("utf-8"))
-            L1, L2, L3 = data.get("L", [L1, L2, L3])
-            ss.ZERO = data.get("ZERO", ss.ZERO)
-            ss.DIR  = data.get("DIR",  ss.DIR)
-            ss.baud = data.get("baud", ss.baud)
+            pre = calibration.preset_from_dict({"L": [L1, L2, L3], "ZERO": ss.ZERO, "DIR": ss.DIR,
+                                                "baud": ss.baud, **data})
+            L1, L2, L3 = pre.L
+            ss.ZERO, ss.DIR, ss.baud = pre.ZERO, pre.DIR, pre.baud
             st.success("Preset cargado. Ajusta sliders si es necesario.")
         except Exception as e:
             st.error(f"Preset inválido: {e}")
@@ -227,16 +234,25 @@ with st.sidebar:
 # ====== Header + logo ======
 render_logo()
 
-tabs = st.tabs(["🎮 Control", "🧮 IK y Visual", "🦶 Trayectoria (Player)", "🗺️ Workspace", "📜 Log"])
+# Mapa de alcance (cacheado por geometría/límites) para consultas rápidas de XYZ
+ws_query = workspace_map(L1,L2,L3, SAFE_MIN, SAFE_MAX)
+
+def reach_caption(x, y, z, knee_up=None):
+    if ws_query.contains(x, y, z, knee_up=knee_up):
+        st.caption("✅ Punto dentro del espacio de trabajo (límites seguros).")
+    else:
+        st.caption("⚠️ Punto fuera del espacio de trabajo o de los límites seguros.")
+
+tabs = st.tabs(["🎮 Control", "🧮 IK y Visual", "🦶 Trayectoria (Player)", "🗺️ Workspace", "📜 Log", "📈 Métricas"])
 
 # === Tab Control ===
-with tabs[0]:
+with tabs[0], timed("spaider_ui_tab_seconds", TAB_HELP, tab="Control"):
     st.subheader("Comandos rápidos")
     cA, cB, cC, cD = st.columns(4)
     if cA.button("ON", use_container_width=True): send_line("ON")
-    if cB.button("OFF", use_container_width=True): send_line("OFF")
+    if cB.button("OFF", use_container_width=True): send_line("OFF")  # solo relaja; parar todo es el E-STOP
     if cC.button("CENTER", use_container_width=True): send_line("CENTER")
-    if cD.button("DEMO", use_container_width=True): send_line("DEMO")
+    if cD.button("DEMO", use_container_width=True): send_cmd("DEMO", timeout=3.0)  # ~1.3 s: no esperamos
 
     st.divider()
     st.subheader("Enviar S (servo grados)")
@@ -268,8 +284,10 @@ with tabs[0]:
         )
 
     if st.button("➡️ Enviar S 13/14/15", use_container_width=True):
-        ok = send_line(f"S 13 {s13}") and send_line(f"S 14 {s14}") and send_line(f"S 15 {s15}")
-        if not ok: st.warning("No conectado o error al enviar.")
+        # los tres en vuelo a la vez; esperamos las respuestas (no un tiempo fijo)
+        futs = [send_cmd(f"S {ch} {v}") for ch, v in ((13, s13), (14, s14), (15, s15))]
+        if None in futs: st.warning("No conectado o error al enviar.")
+        else: wait_replies(futs)
 
     st.divider()
     st.subheader("Enviar XYZ (mm)")
@@ -277,6 +295,7 @@ with tabs[0]:
     X = cx.number_input("x", value=120.0, step=1.0)
     Y = cy.number_input("y", value=40.0,  step=1.0)
     Z = cz.number_input("z", value=-60.0, step=1.0)
+    reach_caption(X, Y, Z)
     if st.button("➡️ Enviar XYZ", use_container_width=True):
         if not send_line(f"XYZ {X} {Y} {Z}"):
             st.warning("No conectado o error al enviar.")
@@ -289,7 +308,7 @@ with tabs[0]:
         )
 
 # === Tab IK y Visual ===
-with tabs[1]:
+with tabs[1], timed("spaider_ui_tab_seconds", TAB_HELP, tab="IK"):
     st.subheader("IK (resuelve ángulos) y visualiza")
     form = st.columns(4)
     Xv = form[0].number_input("x (mm)", value=120.0, step=1.0)
@@ -297,6 +316,7 @@ with tabs[1]:
     Zv = form[2].number_input("z (mm)", value=-60.0, step=1.0)
     knee_mode_tab = form[3].radio("Solución", ["Knee-Up", "Knee-Down"])
     knee_up_tab = (knee_mode_tab == "Knee-Up")
+    reach_caption(Xv, Yv, Zv, knee_up=knee_up_tab)
 
     # Explicación natural con ejemplo de los valores introducidos
     rxy_demo = max(0.0, math.sqrt(Xv*Xv + Yv*Yv) - L1)
@@ -317,57 +337,32 @@ with tabs[1]:
         )
 
     if st.button("Resolver IK"):
-        resik = ik_angles_variant(L1,L2,L3, Xv,Yv,Zv, knee_up=knee_up_tab)
-        if not resik:
+        t1,t2,t3, reach_ok, ok_lim = ik_solution(L1,L2,L3, Xv,Yv,Zv, knee_up_tab, SAFE_MIN, SAFE_MAX)
+        if not reach_ok:
             st.error("Fuera de alcance o IK inválida.")
         else:
-            t1,t2,t3 = resik
-            t1n = wrap_deg_0_360(t1)
-            ok_lim = (SAFE_MIN[0] <= t1n <= SAFE_MAX[0] and
-                      SAFE_MIN[1] <= t2  <= SAFE_MAX[1] and
-                      SAFE_MIN[2] <= t3  <= SAFE_MAX[2])
             if not ok_lim:
                 st.warning("Se encontró una solución, pero queda fuera de límites seguros. Ajusta pose/longitudes.")
             st.success(f"Ángulos mecánicos: coxa={t1:.1f}°, fémur={t2:.1f}°, tibia={t3:.1f}°")
             x,y,z = fk_xyz(L1,L2,L3, t1,t2,t3)
             st.caption(f"Comprobación directa (FK): x={x:.1f}, y={y:.1f}, z={z:.1f}")
 
+            png_top, png_side = ik_pngs(L1,L2,L3, t1,t2,t3)
             colA, colB = st.columns(2)
             with colA:
                 st.markdown("**Vista superior (X–Y)**")
-                fig, ax = plt.subplots(figsize=(4.4,4.4))
-                ax.set_aspect("equal","box"); reach = L1+L2+L3
-                ax.set_xlim(-reach, reach); ax.set_ylim(-reach, reach); ax.grid(True, alpha=0.3)
-                hip = (L1*math.cos(math.radians(t1)), L1*math.sin(math.radians(t1)))
-                knee_r = L2*math.cos(math.radians(t2))
-                knee = ((L1+knee_r)*math.cos(math.radians(t1)), (L1+knee_r)*math.sin(math.radians(t1)))
-                ax.plot([0,hip[0]],[0,hip[1]], lw=3)
-                ax.plot([hip[0],knee[0]],[hip[1],knee[1]], lw=4)
-                ax.plot([knee[0],x],[knee[1],y], lw=4)
-                ax.scatter([0,hip[0],knee[0],x],[0,hip[1],knee[1],y], s=40)
-                ax.set_xlabel("X [mm]"); ax.set_ylabel("Y [mm]")
-                st.pyplot(fig)
+                st.image(png_top)
 
             with colB:
                 st.markdown("**Vista lateral (R–Z)**")
-                fig2, ax2 = plt.subplots(figsize=(4.4,4.4))
-                ax2.set_aspect("equal","box"); reach2 = L2+L3
-                ax2.set_xlim(-reach2, reach2); ax2.set_ylim(-reach2, reach2); ax2.grid(True, alpha=0.3)
-                knee_s = (L2*math.cos(math.radians(t2)), L2*math.sin(math.radians(t2)))
-                foot_s = (L2*math.cos(math.radians(t2))+L3*math.cos(math.radians(t2+t3)),
-                          L2*math.sin(math.radians(t2))+L3*math.sin(math.radians(t2+t3)))
-                ax2.plot([0,knee_s[0]],[0,knee_s[1]], lw=4)
-                ax2.plot([knee_s[0],foot_s[0]],[knee_s[1],foot_s[1]], lw=4)
-                ax2.scatter([0,knee_s[0],foot_s[0]],[0,knee_s[1],foot_s[1]], s=40)
-                ax2.set_xlabel("R [mm]"); ax2.set_ylabel("Z [mm]")
-                st.pyplot(fig2)
+                st.image(png_side)
 
             if st.button("➡️ Enviar XYZ"):
                 if not send_line(f"XYZ {Xv} {Yv} {Zv}"):
                     st.warning("No conectado o error al enviar.")
 
 # === Tab Trayectoria (Player) ===
-with tabs[2]:
+with tabs[2], timed("spaider_ui_tab_seconds", TAB_HELP, tab="Player"):
     st.subheader("Generador de paso (trayectoria del pie)")
     res = get_player_resources()  # Event + Lock
 
@@ -383,44 +378,87 @@ with tabs[2]:
 
     knee_mode = st.radio("Solución IK", ["Knee-Up", "Knee-Down"], horizontal=True)
     knee_up = (knee_mode == "Knee-Up")
-
-    st.caption("La mitad del ciclo el pie va en el aire (sube z), y la otra mitad vuelve sobre el suelo (z≈constante). y permanece fijo.")
-    traj_samples = st.slider("Resolución (puntos/ciclo)", 50, 800, 200, 10)
+    ik_where = st.radio("IK resuelta en", ["Arduino (XYZ)", "Host (ticks)"], horizontal=True,
+                        help="Host: el PC precalcula los ticks del PCA9685 de todo el ciclo y el Arduino solo los escribe.")
+    play_mode = st.radio("Reproducción", ["Streaming (PC envía cada punto)", "Buffer en Arduino (subir y repetir)"],
+                         horizontal=True,
+                         help="Buffer: se sube el ciclo una vez y el Arduino lo repite con su propio reloj "
+                              "(requiere tramas binarias).")
+    on_device = play_mode.startswith("Buffer")
+    hexa_mode = st.checkbox("🕷️ Hexápodo: 6 patas en trípode (placas 0x40 y 0x41)", value=False,
+                            disabled=on_device,
+                            help="IK de las 6 patas en el host, con una sola trama de 18 ticks por tick "
+                                 "(requiere tramas binarias). Todas las patas usan la calibración ZERO/DIR del panel.")
+    c8, c9, c10 = st.columns(3)
+    swing_shape = c8.selectbox("Forma del swing", SWING_SHAPES,
+                               help="Seno: campana simple. Cicloide y Bézier: el pie despega y apoya con velocidad nula.")
+    duty = c9.slider("Factor de apoyo", 0.3, 0.8, 0.5, 0.05, help="Fracción del ciclo con el pie en el suelo.")
+    live = c10.checkbox("Modo en vivo", value=False, disabled=on_device or hexa_mode,
+                        help="El pie se calcula en cada tick: longitud, altura, periodo, forma y apoyo "
+                             "se pueden cambiar sin parar el player (con una mezcla suave de 0,5 s).")
+
+    st.caption(f"El {100*(1-duty):.0f} % del ciclo el pie va en el aire (sube z) y el {100*duty:.0f} % vuelve sobre "
+               "el suelo (z≈constante). y permanece fijo.")
+    traj_samples = st.slider("Resolución (puntos/ciclo)", 50, 800, 200, 10,
+                             help="Solo cambia la fidelidad de la curva: el player interpola la tabla según el "
+                                  "tiempo y el ciclo dura siempre el periodo indicado.")
+
+    # Cambios en vivo: el player sigue corriendo y el generador mezcla los parámetros nuevos
+    stream_now = res.get("stream")
+    if stream_now is not None and res["run_event"].is_set():
+        stream_now.update(x0=x0, y0=y0, z0=z0, step_len=step_len, step_h=step_h, period=period,
+                          duty=duty, shape=swing_shape)
+    sampler_now = res.get("sampler")
+    if sampler_now is not None and res["run_event"].is_set():
+        sampler_now.period = period              # la tabla precalculada solo admite cambiar el periodo
 
     # Previsualización de la trayectoria (no animada)
-    t = np.linspace(0, 1, traj_samples, endpoint=False)
-    x_traj = np.empty_like(t); z_traj = np.empty_like(t); y_traj = np.full_like(t, y0)
-    for i, ph in enumerate(t):
-        if ph < 0.5:  # swing
-            s = ph/0.5
-            x_traj[i] = x0 - step_len/2 + step_len*s
-            z_traj[i] = z0 + step_h * math.sin(math.pi*s)  # campana suave
-        else:         # stance
-            s = (ph-0.5)/0.5
-            x_traj[i] = x0 + step_len/2 - step_len*s
-            z_traj[i] = z0
+    x_traj, y_traj, z_traj = gait_cycle(x0, y0, z0, step_len, step_h, traj_samples, duty, swing_shape)
+    in_ws = ws_query.contains_batch(x_traj, y_traj, z_traj, knee_up=knee_up)
+    st.caption(f"Dentro del espacio de trabajo: {int(in_ws.sum())}/{len(in_ws)} puntos del ciclo.")
 
+    png_top, png_side = traj_pngs(L1,L2,L3, x_traj, y_traj, z_traj,
+                                  [x0-step_len/2, x0+step_len/2], [y0, y0])
     colP1, colP2 = st.columns(2)
     with colP1:
         st.markdown("**Top (X–Y)**")
-        fig, ax = plt.subplots(figsize=(4.4,4.4))
-        ax.set_aspect("equal","box"); reach = L1+L2+L3
-        ax.set_xlim(-reach, reach); ax.set_ylim(-reach, reach); ax.grid(True, alpha=0.3)
-        ax.plot(x_traj, y_traj, lw=2)
-        ax.scatter([x0-step_len/2, x0+step_len/2], [y0, y0], s=25)
-        ax.set_xlabel("X [mm]"); ax.set_ylabel("Y [mm]")
-        st.pyplot(fig)
+        st.image(png_top)
 
     with colP2:
         st.markdown("**Side (R–Z)**")
-        r_traj = np.sqrt(x_traj**2 + y_traj**2) - L1
-        fig2, ax2 = plt.subplots(figsize=(4.4,4.0))
-        ax2.plot(r_traj, z_traj, lw=2); ax2.grid(True, alpha=0.3)
-        ax2.set_xlabel("R [mm]"); ax2.set_ylabel("Z [mm]")
-        st.pyplot(fig2)
+        st.image(png_side)
+
+    c6, c7, c11 = st.columns(3)
+    auto_hz = c11.checkbox("Ritmo automático", value=True,
+                           help="El máximo que aguanta el enlace (80 % de la línea), sin pasar de los 50 Hz "
+                                "a los que refresca el PCA9685.")
+    hz = c6.number_input("Frecuencia de envío (Hz)", value=20.0, min_value=1.0, max_value=500.0, step=5.0,
+                         disabled=auto_hz,
+                         help="El player usa deadlines absolutos: el ritmo no deriva aunque una escritura tarde. "
+                              "La frecuencia no cambia la duración del ciclo, solo cuántos puntos se envían.")
+    if auto_hz:
+        frame_bytes = ((frame_len(CMD_HEX_TICKS) if hexa_mode else FRAME_LEN) if ss.proto == "bin"
+                       else len(f"XYZ {x0:.1f} {y0:.1f} {z0:.1f}\n"))
+        hz = round(stream_hz(frame_bytes, ss.baud), 1)
+        c6.caption(f"{hz:g} Hz con {frame_bytes} bytes por trama a {ss.baud} baudios.")
+    sched_policy = c7.selectbox("Si se retrasa un tick", POLICIES,
+                                format_func=lambda p: {"skip": "Saltar ticks perdidos",
+                                                       "catchup": "Recuperar (enviar seguidos)"}[p])
+
+    # Factibilidad dinámica: ¿llegan los servos a cada objetivo con este periodo?
+    c12, c13 = st.columns(2)
+    servo_model = c12.selectbox("Servo", SERVO_MODELS, format_func=lambda m: m.name)
+    foot_kg = c13.number_input("Carga por pie en apoyo (kg)", value=0.5, min_value=0.0, step=0.1,
+                               help="Peso que soporta cada pie apoyado: reduce la velocidad y la aceleración "
+                                    "disponibles del fémur y la tibia.")
+    servo_hz = min(traj_samples/period if on_device else hz, PWM_HZ)
+    dyn = dynamic_report(L1,L2,L3, x_traj, y_traj, z_traj, period, servo_model, knee_up, foot_kg, hz=servo_hz)
+    dyn_msg = (f"Periodo mínimo factible: {dyn.min_period:.2f} s/ciclo (limita {dyn.limit[0]} por {dyn.limit[1]}). "
+               f"Con {period:g} s: " + ", ".join(f"{j} {v:.0f}°/s" for j, v in zip(JOINTS, dyn.vel))
+               + f" · par máx. {dyn.torque.max():.1f} kg·cm.")
+    (st.warning if dyn.bad else st.caption)(dyn_msg)
 
     # Explicación natural con números concretos
-    hz = 20.0
     dt = 1.0/hz
     avg_vx_swing = step_len / (0.5*period) if period>0 else 0.0
     with st.expander("¿Qué está haciendo exactamente el generador de pasos?"):
@@ -428,35 +466,12 @@ with tabs[2]:
             "Dividimos el ciclo en dos mitades: en la primera el pie avanza desde "
             f"{x0 - step_len/2:.1f} mm hasta {x0 + step_len/2:.1f} mm elevándose hasta unos {step_h:.1f} mm sobre el suelo; "
             "en la segunda vuelve hacia atrás sobre el suelo manteniendo la altura en torno a z₀, para simular apoyo. "
-            f"Enviamos comandos {int(hz)} veces por segundo (cada {dt:.3f} s). "
+            f"Enviamos comandos {hz:g} veces por segundo (cada {dt:.3f} s), {hz*period:.0f} por ciclo: "
+            "en cada envío calculamos la fase como tiempo transcurrido / periodo e interpolamos la trayectoria. "
             f"Con tus parámetros, la velocidad media horizontal del pie mientras va en el aire es aproximadamente "
             f"{avg_vx_swing:.1f} mm/s. Si la fuente sufre, puedes bajar la resolución o el periodo."
         )
 
-    # ====== Preflight: IK + límites + suavidad ======
-    def preflight_traj(L1,L2,L3, x_traj, y_traj, z_traj, safe_min, safe_max, knee_up=True):
-        bad = []
-        for i,(xx,yy,zz) in enumerate(zip(x_traj, y_traj, z_traj)):
-            resik = ik_angles_variant(L1,L2,L3, xx,yy,zz, knee_up=knee_up)
-            if not resik:
-                bad.append((i, "IK"))   # fuera de alcance
-                continue
-            t1,t2,t3 = resik
-            t1n = wrap_deg_0_360(t1)
-            if not (safe_min[0] <= t1n <= safe_max[0] and
-                    safe_min[1] <= t2  <= safe_max[1] and
-                    safe_min[2] <= t3  <= safe_max[2]):
-                bad.append((i, "Límites"))
-        return bad
-
-    def too_jerky(x_traj, y_traj, z_traj, max_delta=8.0):
-        dx = np.diff(x_traj, prepend=x_traj[0])
-        dy = np.diff(y_traj, prepend=y_traj[0])
-        dz = np.diff(z_traj, prepend=z_traj[0])
-        step = np.sqrt(dx*dx + dy*dy + dz*dz)
-        spikes = np.where(step > max_delta)[0]
-        return spikes.tolist()
-
     with st.expander("¿Por qué hacemos un chequeo previo?"):
         st.write(
             "Antes de arrancar, comprobamos tres cosas en cada punto de la trayectoria: "
@@ -466,114 +481,238 @@ with tabs[2]:
             "Si algo falla, te avisamos en qué muestra ocurre."
         )
 
-    # ====== Player en hilo (NO usa st.session_state dentro) ======
-    def player_loop(run_event, ser, lock, x_traj, y_traj, z_traj, x0, y0, z0, hz=20):
-        dt_local = 1.0 / float(hz)
-        N = len(x_traj)
-        idx = 0
-        def write_line(line: str):
-            if not ser: return
-            if not line.endswith("\n"): line += "\n"
-            try:
-                with lock:
-                    ser.write(line.encode("utf-8"))
-            except Exception:
-                pass
-        while run_event.is_set():
-            j = idx % N
-            X = float(x_traj[j]); Y = float(y_traj[j]); Z = float(z_traj[j])
-            write_line(f"XYZ {X} {Y} {Z}")
-            if (j % 10) == 0:  # pequeño “ping” opcional
-                write_line("READY")
-            idx += 1
-            time.sleep(dt_local)
-        # Al parar: postura neutra
-        write_line(f"XYZ {x0} {y0} {z0}")
+    record = st.checkbox("⏺ Grabar lo que se envía", value=False, disabled=on_device,
+                         help=f"Cada trama con su instante, el XYZ, los ángulos, los ticks y cuánto tardó en salir "
+                              f"por el puerto, en {REC_DIR}/ (se puede reproducir abajo).")
 
     # ---- Botones Start/Stop con preflight ----
     col_start, col_stop = st.columns(2)
-    if col_start.button("▶️ Start (20 Hz)", disabled=get_player_resources()["run_event"].is_set()):
-        bad = preflight_traj(L1,L2,L3, x_traj, y_traj, z_traj, SAFE_MIN, SAFE_MAX, knee_up=knee_up)
-        spikes = too_jerky(x_traj, y_traj, z_traj, max_delta=8.0)
+    if col_start.button(f"▶️ Start ({hz:g} Hz)", disabled=get_player_resources()["run_event"].is_set() or ss.buf_playing):
+        bad, spikes = preflight_report(L1,L2,L3, x_traj, y_traj, z_traj, SAFE_MIN, SAFE_MAX,
+                                       knee_up=knee_up, max_delta=8.0)
+        if hexa_mode and not on_device:
+            hexa = Hexapod(L1,L2,L3, zero=ss.ZERO, dir=ss.DIR)
+            reach = math.hypot(x0, y0)
+            feet = hexa.gait(reach, z0, step_len, step_h, traj_samples, duty=duty, shape=swing_shape)
+            bad = [(j, f"pata {hexa.mounts[i].name}: {why}") for i, j, why in hexa.preflight(*feet, knee_up)]
+            dyn = dynamic_report(L1,L2,L3, *hexa.to_leg(*feet), period, servo_model, knee_up, foot_kg, hz=servo_hz)
         if bad:
             st.error(f"El chequeo previo falló en {len(bad)} puntos (ej. índice {bad[0][0]}: {bad[0][1]}). "
                      "Reduce la longitud/altura del paso o ajusta la postura neutra.")
+        elif dyn.bad:
+            st.error(f"Los servos no llegan a tiempo en {len(dyn.bad)} puntos (ej. índice {dyn.bad[0][0]}: "
+                     f"{dyn.bad[0][1]}). Sube el periodo a {dyn.min_period:.2f} s o más, o suaviza el paso.")
         elif spikes:
             st.warning(f"Se detectaron {len(spikes)} saltos bruscos (>8 mm) (ej. índice {spikes[0]}). "
                        "Aumenta la resolución o baja la longitud del paso o la velocidad.")
         elif ss.ser is None:
             st.warning("Conéctate por COM primero.")
+        elif (on_device or hexa_mode) and ss.proto != "bin":
+            st.warning("El buffer en el Arduino y el hexápodo necesitan tramas binarias (reconecta con HELLO BIN).")
+        elif on_device:
+            if ik_where.startswith("Host"):
+                table, kind = ticks_table(L1,L2,L3, x_traj, y_traj, z_traj, ss.ZERO, ss.DIR, knee_up), BUF_TICKS
+            else:
+                table, kind = xyz_to_buffer(x_traj, y_traj, z_traj), BUF_XYZ
+            up = CycleUploader(ss.link, ss.buf_cap)
+            try:
+                n_up = up.upload(table, kind)
+                up.play(up.rate_for_period(period), phase=0)
+                ss.buf_playing = True
+                ss.log.append(f"[PLAY] Ciclo subido ({n_up} muestras) y reproduciéndose en el Arduino "
+                              f"a {up.rate_for_period(period):.1f} Hz.")
+            except UploadError as e:
+                st.error(f"No se pudo subir el ciclo: {e}")
+                ss.log.append(f"[ERR] Subida: {e}")
         else:
+            binary = ss.proto == "bin"
             res_play = get_player_resources()
-            res_play["run_event"].set()
-            th = threading.Thread(
-                target=player_loop,
-                args=(res_play["run_event"], ss.ser, res_play["lock"],
-                      x_traj, y_traj, z_traj, x0, y0, z0, 20),
-                daemon=True
-            )
-            th.start()
-            ss.log.append("[PLAY] Reproduciendo trayectoria…")
-
-    if col_stop.button("⏹ Stop", disabled=not get_player_resources()["run_event"].is_set()):
+            res_play["stream"] = res_play["sampler"] = None
+            L, zero, dirs, on_host = (L1, L2, L3), tuple(ss.ZERO), tuple(ss.DIR), ik_where.startswith("Host")
+            # Cada tick envía la muestra de la fase actual (tiempo / periodo), no la siguiente fila.
+            if hexa_mode:
+                res_play["sampler"] = CycleSampler(hexa.ticks(*feet, knee_up), period)
+                encode = player.frame_encoder("hex")
+                neutral = hex_ticks_frames(hexa.ticks(*hexa.neutral_feet(reach, z0), knee_up))[0]
+            else:
+                encode = player.frame_encoder("ticks" if on_host else "xyz", binary)
+                neutral = player.neutral_frame(L, x0, y0, z0, zero, dirs, knee_up, on_host, binary)
+            if live:
+                res_play["stream"] = GaitStream(x0, y0, z0, step_len, step_h, period, duty, swing_shape)
+                sample = player.leg_rows(res_play["stream"].sample, L, zero, dirs, knee_up, on_host)
+            else:
+                if not hexa_mode:
+                    table = player.leg_table(L, x_traj, y_traj, z_traj, zero, dirs, knee_up, on_host)
+                    res_play["sampler"] = CycleSampler(table, period)
+                sample = res_play["sampler"].sample
+            frame_at = lambda k, encode=encode, sample=sample: encode(sample())
+            # La figura se crea antes de arrancar el hilo: montar ejes cuesta decenas de ms con el GIL
+            res_play["view"] = LiveLegView(L, zero, dirs, knee_up)
+            res_play["view_hexa"] = hexa_mode
+            rec = None
+            if record:
+                rec = Recorder(new_path(), "hex" if hexa_mode else ("ticks" if on_host else "xyz"), binary,
+                               L, zero, dirs, knee_up)
+            pl = player.Player(ss.link, frame_at, neutral, hz, sched_policy, ping=not binary, log=ss.log,
+                               run_event=res_play["run_event"], tap=res_play["tap"], recorder=rec)
+            res_play["sched"] = pl.sched
+            pl.start()
+            ss.log.append(f"[PLAY] Reproduciendo trayectoria… ({ss.proto}, "
+                          + ("hexápodo, 18 ticks por trama)" if hexa_mode else f"IK en {ik_where}"
+                             + (", en vivo)" if live else ")")))
+
+    playing = get_player_resources()["run_event"].is_set() or ss.buf_playing
+    if col_stop.button("⏹ Stop", disabled=not playing):
         get_player_resources()["run_event"].clear()
+        if ss.buf_playing and ss.ser is not None:
+            try:
+                CycleUploader(ss.link, ss.buf_cap).stop()
+            except UploadError as e:
+                ss.log.append(f"[ERR] STOP: {e}")
+        ss.buf_playing = False
         ss.log.append("[PLAY] Stop solicitado.")
 
+    sched_now = get_player_resources().get("sched")
+    if sched_now is not None:
+        stt = sched_now.stats.snapshot()
+        st.markdown("**Ritmo real del player**" + (" (en marcha)" if get_player_resources()["run_event"].is_set() else ""))
+        m1, m2, m3, m4, m5 = st.columns(5)
+        m1.metric("Hz conseguidos", f"{stt['hz']:.1f}", delta=f"{stt['hz']-sched_now.hz:+.1f}")
+        m2.metric("Jitter p50", f"{stt['jitter_p50_ms']:.2f} ms")
+        m3.metric("Jitter p95", f"{stt['jitter_p95_ms']:.2f} ms")
+        m4.metric("Jitter p99", f"{stt['jitter_p99_ms']:.2f} ms")
+        m5.metric("Deadlines perdidos", f"{stt['missed']}", help=f"{stt['ticks']} ticks ejecutados")
+        st.button("🔄 Actualizar estadísticas")
+
+    recs = list_recordings()
+    if recs:
+        with st.expander("📼 Grabaciones"):
+            rec_path = st.selectbox("Grabación", recs, format_func=os.path.basename)
+            rec_now = Recording(rec_path)
+            rs = recording_summary(rec_path, len(rec_now))
+            st.caption(f"{rs['frames']} tramas {rec_now.meta['kind']} "
+                       f"({'binario' if rec_now.meta['binary'] else 'ASCII'}) · {rs['duration_s']:.1f} s a "
+                       f"{rs['hz']:.1f} Hz · hueco máx. {rs['max_gap_ms']:.1f} ms · hasta la línea p50 "
+                       f"{rs['wire_p50_ms']:.2f} ms / p99 {rs['wire_p99_ms']:.2f} ms · {rs['dropped']} descartadas"
+                       + ("" if rec_now.meta["binary"] else f" · hasta el OK p50 {rs['ack_p50_ms']:.2f} ms / p99 "
+                          f"{rs['ack_p99_ms']:.2f} ms · {rs['acked']} con respuesta"))
+            if rs["frames"]:
+                st.caption(" · ".join(f"{j} {lo:.1f}°…{hi:.1f}° (salto máx. {d:.2f}°)" for j, lo, hi, d in
+                                      zip(JOINTS, rs["q_min"], rs["q_max"], rs["max_step_deg"])))
+            speed = st.number_input("Velocidad (×)", value=1.0, min_value=0.1, max_value=10.0, step=0.25)
+            busy = get_player_resources()["run_event"].is_set() or ss.buf_playing
+            if st.button("▶️ Reproducir grabación", disabled=busy or not rs["frames"]):
+                if ss.ser is None:
+                    st.warning("Conéctate por COM primero.")
+                elif rec_now.meta["binary"] and ss.proto != "bin":
+                    st.warning("La grabación usa tramas binarias (reconecta con HELLO BIN).")
+                else:
+                    res_play = get_player_resources()
+                    res_play["stream"] = res_play["sampler"] = None
+                    src = ReplaySource(rec_now, speed)
+                    m = rec_now.meta
+                    res_play["view"] = LiveLegView(m["L"], m["zero"], m["dir"], m["knee_up"])
+                    res_play["view_hexa"] = m["kind"] == "hex"
+                    pl = player.Player(ss.link, src.frame_at, src.neutral, round(rec_now.hz*speed, 1), sched_policy,
+                                       ping=not m["binary"], log=ss.log, run_event=res_play["run_event"],
+                                       tap=res_play["tap"])
+                    res_play["sched"] = pl.sched
+                    pl.start()
+                    ss.log.append(f"[PLAY] Reproduciendo {rec_path} a ×{speed:g} ({rec_now.duration:.1f} s grabados).")
+
+    # Vista en vivo: solo este fragmento se repite (LIVE_FPS); la figura y sus líneas se reutilizan
+    res_view = get_player_resources()
+    if res_view.get("view") is not None:
+        live_on = res_view["run_event"].is_set()
+
+        @st.fragment(run_every=1.0/LIVE_FPS if live_on else None)
+        def live_leg_view():
+            view = res_view["view"]
+            img = view.render(res_view["tap"])
+            st.markdown("**Vista en vivo** (lo que sale por el puerto" + (", pata 0)" if res_view["view_hexa"] else ")"))
+            st.image(img)
+            age = view.age()
+            if view.joints is not None:
+                st.caption("coxa {:.1f}° · fémur {:.1f}° · tibia {:.1f}°".format(*view.joints)
+                           + f" · última trama hace {age*1e3:.0f} ms · {view.frames} tramas, {view.redraws} redibujos")
+        live_leg_view()
+
 # === Tab Workspace ===
-with tabs[3]:
+with tabs[3], timed("spaider_ui_tab_seconds", TAB_HELP, tab="Workspace"):
     st.subheader("Espacio de trabajo (R–Z) y huella Top (X–Y)")
     n2 = st.slider("Resolución θ2", 40, 200, 120, 10)
     n3 = st.slider("Resolución θ3", 40, 200, 120, 10)
-    t2_vals = np.linspace(math.radians(SAFE_MIN[1]), math.radians(SAFE_MAX[1]), n2)
-    t3_vals = np.linspace(math.radians(SAFE_MIN[2]), math.radians(SAFE_MAX[2]), n3)
-    R, Z = [], []
-    XYx, XYy = [], []
-    for t2 in t2_vals:
-        for t3 in t3_vals:
-            r_xy = L2*math.cos(t2) + L3*math.cos(t2+t3)
-            z    = L2*math.sin(t2) + L3*math.sin(t2+t3)
-            r_tot = L1 + r_xy
-            # barrido razonable de coxa
-            for t1_deg in np.linspace(SAFE_MIN[0], SAFE_MAX[0], 36):
-                t1 = math.radians(t1_deg)
-                x = r_tot*math.cos(t1); y = r_tot*math.sin(t1)
-                XYx.append(x); XYy.append(y)
-            R.append(max(0.0, r_tot - L1))
-            Z.append(z)
+    ws_mode = st.radio("Representación", RENDER_MODES, horizontal=True,
+                       help="Densidad: histograma 2D de las muestras. Contorno: solo el borde de la región alcanzable.")
+    png_side, png_top = workspace_pngs(L1,L2,L3, SAFE_MIN, SAFE_MAX, n2, n3, ws_mode)
     colW1, colW2 = st.columns(2)
     with colW1:
         st.markdown("**Side (R–Z) alcance**")
-        fig, ax = plt.subplots(figsize=(4.6,4.2))
-        ax.scatter(R, Z, s=2, alpha=0.6)
-        ax.grid(True, alpha=0.3)
-        ax.set_xlabel("R [mm]"); ax.set_ylabel("Z [mm]")
-        st.pyplot(fig)
+        st.image(png_side)
     with colW2:
         st.markdown("**Top (X–Y) huella de alcance**")
-        fig2, ax2 = plt.subplots(figsize=(4.6,4.6))
-        ax2.set_aspect("equal","box")
-        ax2.scatter(XYx, XYy, s=1.5, alpha=0.5)
-        reach = L1+L2+L3
-        ax2.set_xlim(-reach, reach); ax2.set_ylim(-reach, reach)
-        ax2.grid(True, alpha=0.3)
-        ax2.set_xlabel("X [mm]"); ax2.set_ylabel("Y [mm]")
-        st.pyplot(fig2)
+        st.image(png_top)
 
     with st.expander("¿Qué me está mostrando este mapa?"):
         st.write(
             "Para estimar el **alcance**, probamos muchas combinaciones de fémur y tibia dentro de sus límites "
             "y calculamos dónde quedaría el pie en un corte lateral (R–Z). Eso te dice qué alturas y distancias "
             "son razonables. Luego giramos la coxa en un rango seguro para dibujar la **huella en planta (X–Y)**. "
-            "Si reduces las longitudes o los límites, la nube de puntos se encoge; si los aumentas, crece."
+            "Si reduces las longitudes o los límites, la región se encoge; si los aumentas, crece. "
+            "El color indica cuántas combinaciones de ángulos caen en cada celda."
         )
 
 # === Tab Log ===
-with tabs[4]:
+with tabs[4], timed("spaider_ui_tab_seconds", TAB_HELP, tab="Log"):
     st.subheader("Tráfico serie (local)")
-    if st.button("Actualizar log"):
-        if ss.ser:
-            data = ss.ser.read_all()
-            if data:
-                for part in data.decode(errors="replace").splitlines():
-                    ss.log.append("← " + part.strip())
-    st.text_area("Log", value="\n".join(ss.log[-400:]), height=260)
+    st.button("Actualizar log")
+    link_now = ss.get("link")
+    if link_now is not None and link_now.latencies:
+        lats = sorted(link_now.latencies)
+        st.caption(f"Ida y vuelta: mediana {lats[len(lats)//2]*1e3:.1f} ms, máx {lats[-1]*1e3:.1f} ms "
+                   f"(últimas {len(lats)}); en vuelo: {link_now.in_flight}/{link_now.window}")
+    if isinstance(ss.get("ser"), EmulatedSerial):
+        es = ss.ser.stats()
+        st.caption(f"Emulador: {es['commands']} comandos, {es['pwm_writes']} escrituras PWM, "
+                   f"{es['play_ticks']} ticks de buffer · CPU {es['cpu_busy']:.0%} · línea {es['line_busy']:.0%}")
+    show_motion = st.checkbox("Incluir tramas del player", value=False)
+    recs = ss.log.tail(400, skip_cmds=() if show_motion else MOTION_CMDS)
+    t0 = recs[0].t if recs else None
+    st.text_area("Log", value="\n".join(format_record(r, t0) for r in recs), height=260)
+    st.caption(f"{len(ss.log)}/{ss.log.capacity} entradas en memoria · volcado en {LOG_PATH} "
+               f"(rota a los 8 MB, 3 copias)" + (f" · {ss.log.dropped} sin volcar" if ss.log.dropped else ""))
+    with st.expander("Últimas líneas del fichero"):
+        try:
+            st.json(tail_ndjson(LOG_PATH, 20))
+        except FileNotFoundError:
+            st.caption("Aún no hay fichero de log.")
+
+    with st.expander("Caché de cálculos (memoización entre reruns)"):
+        st.table([{"cálculo": k, **v} for k, v in memo.stats().items()])
+
+# === Tab Métricas ===
+with tabs[5], timed("spaider_ui_tab_seconds", TAB_HELP, tab="Métricas"):
+    st.subheader("Dónde se va el tiempo")
+    snap = metrics.REGISTRY.snapshot()
+    st.caption(f"Acumulado desde {time.strftime('%H:%M:%S', time.localtime(snap['since']))}. "
+               "Percentiles sobre las últimas 2048 muestras de cada histograma.")
+    st.table([{"métrica": h["name"] + "".join(f" {k}={v}" for k, v in h["labels"].items()),
+               "n": h["count"], "media ms": round(h["mean"]*1e3, 3),
+               **{f"{p} ms": round(h.get(p, 0.0)*1e3, 3) for p in ("p50", "p95", "p99")},
+               "máx ms": round(h["max"]*1e3, 3)}
+              for h in sorted(snap["histograms"], key=lambda h: -h["sum"]) if h["count"]])
+    st.table([{"contador": c["name"], "valor": c["value"]} for c in snap["counters"]])
+    cm1, cm2, cm3 = st.columns(3)
+    cm1.download_button("⬇️ JSON", metrics.REGISTRY.to_json(indent=2), "spaider_metrics.json", "application/json")
+    cm2.download_button("⬇️ Prometheus", metrics.REGISTRY.to_prometheus(), "spaider_metrics.prom", "text/plain")
+    if cm3.button("Poner a cero"):
+        metrics.REGISTRY.reset()
+    res_m = get_player_resources()
+    export = st.checkbox(f"Escribir {METRICS_PATH} cada 10 s (colector textfile de node_exporter)",
+                         value=res_m.get("exporter") is not None)
+    if export and res_m.get("exporter") is None:
+        res_m["exporter"] = PrometheusExporter(METRICS_PATH).start()
+    elif not export and res_m.get("exporter") is not None:
+        res_m.pop("exporter").stop()
+
+metrics.histogram("spaider_ui_rerun_seconds", "Rerun completo del script de Streamlit").observe(time.perf_counter() - RERUN_T0)
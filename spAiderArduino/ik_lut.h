@@ -0,0 +1,100 @@
+// Generado por spaider/lutgen.py: no editar a mano (python -m spaider.lutgen).
+// IK de la pierna en punto fijo para L1/L2/L3 = 50/80/100 mm, límites [0, 10, 10]–[180, 170, 170]°.
+// Error máx. frente a ik_angles_variant en 68309 puntos del workspace: coxa 0.010°, fémur 0.024°, tibia 0.033°.
+// Entradas en décimas de mm; ángulos mecánicos en centésimas de grado (rama codo arriba, como legIK).
+#pragma once
+#include <stdint.h>
+#if defined(__AVR__)
+#include <avr/pgmspace.h>
+#define IK_LUT(i) ((int16_t)pgm_read_word(&IK_ATAN_LUT[i]))
+#else
+#define PROGMEM
+#define IK_LUT(i) (IK_ATAN_LUT[i])
+#endif
+
+#define IK_L1_MM 50.0f              // geometría con la que se generó (mm)
+#define IK_L2_MM 80.0f
+#define IK_L3_MM 100.0f
+#define IK_MAX_COORD 2300           // L1+L2+L3: |x|, |y|, |z| máximos (décimas de mm)
+#define IK_R_SHIFT 4                // distancias en 1/2^IK_R_SHIFT décimas de mm
+#define IK_S_SHIFT 0                // bits extra en las raíces del codo
+#define IK_L1_S 8000L               // L1
+#define IK_DMAX2 829440000UL        // (L2+L3)²
+#define IK_DMIN2 10240000UL         // (L2-L3)²
+#define IK_L2L3 (-92160000L)        // L2² - L3²
+
+// atan(i/256) en centésimas de grado, i = 0..256
+static const int16_t IK_ATAN_LUT[257] PROGMEM = {
+  0, 22, 45, 67, 90, 112, 134, 157, 179, 201, 224, 246,
+  268, 291, 313, 335, 358, 380, 402, 424, 447, 469, 491, 513,
+  536, 558, 580, 602, 624, 646, 668, 690, 713, 735, 757, 779,
+  800, 822, 844, 866, 888, 910, 932, 953, 975, 997, 1019, 1040,
+  1062, 1084, 1105, 1127, 1148, 1170, 1191, 1213, 1234, 1255, 1277, 1298,
+  1319, 1340, 1361, 1383, 1404, 1425, 1446, 1467, 1488, 1508, 1529, 1550,
+  1571, 1592, 1612, 1633, 1653, 1674, 1695, 1715, 1735, 1756, 1776, 1796,
+  1817, 1837, 1857, 1877, 1897, 1917, 1937, 1957, 1977, 1997, 2016, 2036,
+  2056, 2075, 2095, 2114, 2134, 2153, 2172, 2192, 2211, 2230, 2249, 2268,
+  2287, 2306, 2325, 2344, 2363, 2382, 2400, 2419, 2438, 2456, 2475, 2493,
+  2511, 2530, 2548, 2566, 2584, 2603, 2621, 2639, 2657, 2674, 2692, 2710,
+  2728, 2745, 2763, 2780, 2798, 2815, 2833, 2850, 2867, 2885, 2902, 2919,
+  2936, 2953, 2970, 2987, 3003, 3020, 3037, 3053, 3070, 3086, 3103, 3119,
+  3136, 3152, 3168, 3184, 3201, 3217, 3233, 3249, 3264, 3280, 3296, 3312,
+  3327, 3343, 3359, 3374, 3390, 3405, 3420, 3436, 3451, 3466, 3481, 3496,
+  3511, 3526, 3541, 3556, 3571, 3585, 3600, 3615, 3629, 3644, 3658, 3673,
+  3687, 3701, 3716, 3730, 3744, 3758, 3772, 3786, 3800, 3814, 3828, 3841,
+  3855, 3869, 3882, 3896, 3909, 3923, 3936, 3950, 3963, 3976, 3989, 4003,
+  4016, 4029, 4042, 4055, 4067, 4080, 4093, 4106, 4119, 4131, 4144, 4156,
+  4169, 4181, 4194, 4206, 4218, 4231, 4243, 4255, 4267, 4279, 4291, 4303,
+  4315, 4327, 4339, 4351, 4363, 4374, 4386, 4397, 4409, 4421, 4432, 4443,
+  4455, 4466, 4478, 4489, 4500
+};
+
+// raíz cuadrada entera, redondeada
+static inline uint32_t ik_isqrt(uint32_t v){
+  uint32_t r = 0, bit = 1UL << 30;
+  while (bit > v) bit >>= 2;
+  while (bit){
+    if (v >= r + bit){ v -= r + bit; r = (r >> 1) + bit; }
+    else r >>= 1;
+    bit >>= 2;
+  }
+  return v > r ? r + 1 : r;   // v es ahora el resto: n - r²
+}
+
+// atan2 en centésimas de grado (-18000..18000)
+static inline int16_t ik_atan2_cd(int32_t y, int32_t x){
+  uint32_t ax = x < 0 ? -(uint32_t)x : (uint32_t)x, ay = y < 0 ? -(uint32_t)y : (uint32_t)y;
+  uint32_t lo = ax < ay ? ax : ay, hi = ax < ay ? ay : ax;
+  if (hi == 0) return 0;
+  while (hi >= (1UL << 15)){ hi >>= 1; lo >>= 1; }
+  uint16_t q = (uint16_t)((lo << 15) / hi);        // lo/hi en Q15
+  uint16_t i = q >> 7, f = q & 127;
+  int16_t a = IK_LUT(i);
+  if (f) a += (int16_t)(((int32_t)(IK_LUT(i + 1) - a) * f + 64) >> 7);
+  if (ay > ax) a = 9000 - a;
+  if (x < 0) a = 18000 - a;
+  return y < 0 ? -a : a;
+}
+
+// Siempre da ángulos, como legIK. Si |x|, |y| o |z| pasa de IK_MAX_COORD, el punto se acerca al
+// origen en la misma dirección hasta que la mayor vale ±IK_MAX_COORD (sigue fuera de alcance);
+// fuera de alcance la pierna sale estirada hacia el punto, ya acercado (d² saturado a (L2+L3)²).
+static inline void ik_leg_cd(int16_t x, int16_t y, int16_t z, int16_t &cx, int16_t &fm, int16_t &tb){
+  int32_t ax = x < 0 ? -(int32_t)x : x, ay = y < 0 ? -(int32_t)y : y, az = z < 0 ? -(int32_t)z : z;
+  int32_t big = ax > ay ? ax : ay; if (az > big) big = az;
+  if (big > IK_MAX_COORD){
+    x = (int16_t)((int32_t)x * IK_MAX_COORD / big); y = (int16_t)((int32_t)y * IK_MAX_COORD / big);
+    z = (int16_t)((int32_t)z * IK_MAX_COORD / big);
+  }
+  cx = ik_atan2_cd(y, x);
+  int32_t r = (int32_t)ik_isqrt((uint32_t)((int32_t)x*x + (int32_t)y*y) << (2*IK_R_SHIFT)) - IK_L1_S;
+  if (r < 0) r = 0;
+  int32_t zs = (int32_t)z << IK_R_SHIFT;
+  uint32_t d2 = (uint32_t)r*(uint32_t)r + (uint32_t)zs*(uint32_t)zs;
+  if (d2 > IK_DMAX2) d2 = IK_DMAX2;
+  uint32_t n = ik_isqrt((IK_DMAX2 - d2) << (2*IK_S_SHIFT));                    // ∝ √((L2+L3)² - d²)
+  uint32_t m = ik_isqrt((d2 > IK_DMIN2 ? d2 - IK_DMIN2 : 0) << (2*IK_S_SHIFT)); // ∝ √(d² - (L2-L3)²)
+  tb = 2 * ik_atan2_cd(n, m);                                                   // tan(θ3/2) = n/m
+  int16_t alpha = ik_atan2_cd(n*m, ((int32_t)d2 + IK_L2L3) << (2*IK_S_SHIFT));
+  fm = ik_atan2_cd(zs, r) - alpha;
+}
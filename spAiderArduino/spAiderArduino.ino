@@ -1,5 +1,6 @@
 /*
   Canales: Coxa=13, Femur=14, Tibia=15
+  Hexápodo: pata i (0..5) en la placa 0x40 (i<3) o 0x41 (i>=3), canales 3*(i%3)..+2
   
   Comandos (una línea por comando):
     HELLO
@@ -14,12 +15,37 @@
     ZERO 1 95      -> idx: 0=coxa,1=fémur,2=tibia
     DIR  2 -1      -> invierte sentido (+1/-1)
     XYZ 120 40 -60 -> IK cartesiano (mm)
+    T 345 368 143  -> ticks PCA9685 coxa/fémur/tibia (IK resuelta en el host)
+    HELLO BIN      -> activa tramas binarias (responde "OK BIN <versión> <BUF_MAX>")
+
+  Trama binaria (ver spaider/protocol.py):
+    A5 | cmd | payload (int16 LE) | crc8(cmd..payload)
+    Payload de 3 valores (trama de 9 bytes) salvo BUF_DATA y HEX_TICKS.
+    0x01 XYZ    a,b,c = x,y,z en décimas de mm
+    0x02 S      a = canal, b = grados x10
+    0x03 P      a = canal, b = us
+    0x04 TICKS  a,b,c = ticks PCA9685 de coxa, fémur, tibia
+    0x05 HEX_TICKS  18 ticks (pata 0 coxa/fémur/tibia, pata 1, ...) -> trama de 39 bytes
+    0x10 ON / 0x11 OFF / 0x12 CENTER
+  Movimiento: sin respuesta si va bien; "ERR CRC" / "ERR BIN" si falla.
+  Tras un "ERR CRC" se descarta un byte y se resincroniza con el siguiente A5.
+
+  Buffer de trayectoria (subir una vez, reproducir en bucle con el reloj del Arduino):
+    0x20 BUF_BEGIN  a = n muestras, b = tipo (0 ticks, 1 XYZ)  -> "OK BEGIN n"
+    0x21 BUF_DATA   a = índice, + 4 muestras x 3 valores       -> "OK BUF i"
+    0x22 PLAY       a = Hz x10, b = fase inicial (-1 = seguir)  -> "OK PLAY"
+    0x23 STOP                                                   -> "OK STOP"
+    0x24 RATE       a = Hz x10                                  -> "OK RATE"
+    0x25 PHASE      a = índice                                  -> "OK PHASE"
+  OFF y CENTER también detienen la reproducción.
 */
 
 #include <Wire.h>
 #include <Adafruit_PWMServoDriver.h>
+#include "ik_lut.h"   // IK en punto fijo; regenerar con python -m spaider.lutgen si cambia la pierna
 
 Adafruit_PWMServoDriver pwm(0x40);
+Adafruit_PWMServoDriver pwm2(0x41);   // segunda placa (patas 3..5 del hexápodo)
 
 // ======== HARDWARE ========
 const uint8_t CH_COXA  = 13;
@@ -37,12 +63,54 @@ int      DIR[3]          = {+1,  -1,  -1};
 float    MIN_DEG[3]      = {0,   10,  10};
 float    MAX_DEG[3]      = {180, 170, 170};
 
-// Geometría pierna (mm)
-float L1=50, L2=80, L3=100;
+// Geometría pierna (mm): la de ik_lut.h (IK_L1_MM, IK_L2_MM, IK_L3_MM)
 
 // Estado
 bool RUN  = true;   // enciende movimientos prolongados si los hubiera
 bool HOLD = false;  // quieto centrado
+bool BIN_MODE = false;  // tramas binarias negociadas con HELLO BIN
+
+// ======== PROTOCOLO BINARIO ========
+const uint8_t FRAME_START = 0xA5;
+const uint8_t FRAME_LEN   = 9;    // trama de 3 valores
+const uint8_t PROTO_VERSION = 3;
+const uint8_t CMD_XYZ = 0x01, CMD_S = 0x02, CMD_P = 0x03, CMD_TICKS = 0x04, CMD_HEX_TICKS = 0x05;
+const uint8_t CMD_ON  = 0x10, CMD_OFF = 0x11, CMD_CENTER = 0x12;
+const uint8_t CMD_BUF_BEGIN = 0x20, CMD_BUF_DATA = 0x21, CMD_PLAY = 0x22;
+const uint8_t CMD_STOP = 0x23, CMD_RATE = 0x24, CMD_PHASE = 0x25;
+const uint8_t BUF_CHUNK = 4;
+const uint8_t HEX_SERVOS = 18;
+const uint8_t BUF_FRAME_LEN = 3 + 2*(1 + 3*BUF_CHUNK);
+const uint8_t MAX_FRAME_LEN = 3 + 2*HEX_SERVOS;
+inline uint8_t frameLen(uint8_t cmd){
+  if (cmd == CMD_BUF_DATA)  return BUF_FRAME_LEN;
+  if (cmd == CMD_HEX_TICKS) return MAX_FRAME_LEN;
+  return FRAME_LEN;
+}
+
+// ======== HEXÁPODO ========
+const uint8_t PCA_ADDR[2]   = {0x40, 0x41};
+const uint8_t PCA_LED0_ON_L = 0x06;
+const uint8_t BOARD_SERVOS  = 9;   // 3 patas x 3 articulaciones, canales 0..8
+const uint8_t I2C_BURST     = 7;   // canales por transacción: 1 + 4*7 = 29 bytes (buffer de Wire = 32)
+
+// ======== BUFFER DE TRAYECTORIA ========
+// 6 bytes por muestra: el UNO (2 KB de RAM) no da para más de ~100.
+#if defined(__AVR_ATmega2560__)
+const uint16_t BUF_MAX = 400;
+#elif defined(__AVR__)
+const uint16_t BUF_MAX = 96;
+#else
+const uint16_t BUF_MAX = 800;
+#endif
+const uint8_t BUF_TICKS = 0, BUF_XYZ = 1;
+int16_t  BUF[BUF_MAX][3];
+uint16_t BUF_N = 0;            // muestras válidas
+uint8_t  BUF_KIND = BUF_TICKS;
+bool     PLAYING = false;
+uint16_t PLAY_IDX = 0;
+uint32_t PLAY_PERIOD_US = 50000;
+uint32_t PLAY_NEXT_US = 0;
 
 // ======== UTILS ========
 inline uint16_t clampUS(uint16_t us){
@@ -55,11 +123,26 @@ inline float clampf(float v, float lo, float hi){
   if (v > hi) return hi;
   return v;
 }
-inline float rad2deg(float r){ return r * 180.0 / PI; }
 
 void writeUS(uint8_t ch, uint16_t us){ pwm.writeMicroseconds(ch, clampUS(us)); }
+
+// Ticks directos (0–4095 @ 50 Hz), acotados al mismo rango seguro que writeUS
+const uint16_t SAFE_MIN_TICKS = ((uint32_t)SAFE_MIN_US * 4096 + 10000) / 20000;  // redondeo, como el host
+const uint16_t SAFE_MAX_TICKS = ((uint32_t)SAFE_MAX_US * 4096 + 10000) / 20000;
+inline uint16_t clampTicks(int16_t t){
+  if (t < (int16_t)SAFE_MIN_TICKS) return SAFE_MIN_TICKS;
+  if (t > (int16_t)SAFE_MAX_TICKS) return SAFE_MAX_TICKS;
+  return t;
+}
+void writeTicks(uint8_t ch, int16_t t){ pwm.setPWM(ch, 0, clampTicks(t)); }
+void setLegTicks(int16_t cx, int16_t fm, int16_t tb){
+  writeTicks(CH_COXA, cx); writeTicks(CH_FEMUR, fm); writeTicks(CH_TIBIA, tb);
+}
 void centerAll(){ writeUS(CH_COXA,1500); writeUS(CH_FEMUR,1500); writeUS(CH_TIBIA,1500); }
-void allOff(){ for (int ch=0; ch<16; ch++) pwm.setPWM(ch, 0, 0); } // corta PWM
+void allOff(){ // corta PWM en las dos placas (y la reproducción)
+  PLAYING=false;
+  for (int ch=0; ch<16; ch++){ pwm.setPWM(ch, 0, 0); pwm2.setPWM(ch, 0, 0); }
+}
 
 void writeServoDeg(uint8_t ch_hw, uint8_t idx, float deg){
   deg = clampf(deg, 0, 180);
@@ -73,22 +156,13 @@ void setJoint(uint8_t ch_hw, uint8_t idx, float deg_mech){
 }
 
 // ======== IK ========
-bool legIK(float x, float y, float z, float &cx, float &fm, float &tb){
-  float t1  = atan2(y, x);
-  float rxy = sqrt(x*x + y*y) - L1; if (rxy < 0) rxy = 0;
-  float d2  = rxy*rxy + z*z;
-  float D   = (d2 - L2*L2 - L3*L3) / (2.0 * L2 * L3);
-  D = clampf(D, -1, 1);
-  float t3 = acos(D);
-  float t2 = atan2(z, rxy) - atan2(L3*sin(t3), L2 + L3*cos(t3));
-  cx = rad2deg(t1); fm = rad2deg(t2); tb = rad2deg(t3);
-  return !(isnan(cx) || isnan(fm) || isnan(tb));
-}
-void setLegIK(float x, float y, float z){
-  float cx,fm,tb; if (legIK(x,y,z,cx,fm,tb)){
-    setJoint(CH_COXA,0,cx); setJoint(CH_FEMUR,1,fm); setJoint(CH_TIBIA,2,tb);
-  }
+// Enteros y tablas (ik_lut.h): sin atan2/acos/sqrt/sin/cos en float. x, y, z en décimas de mm.
+void setLegIKdmm(int16_t x, int16_t y, int16_t z){
+  int16_t cx,fm,tb; ik_leg_cd(x,y,z,cx,fm,tb);   // fuera de alcance satura, no descarta la trama
+  setJoint(CH_COXA,0,cx*0.01f); setJoint(CH_FEMUR,1,fm*0.01f); setJoint(CH_TIBIA,2,tb*0.01f);
 }
+inline int16_t mmToDmm(float v){ return (int16_t)lroundf(clampf(v*10, -32767, 32767)); }
+void setLegIK(float x, float y, float z){ setLegIKdmm(mmToDmm(x), mmToDmm(y), mmToDmm(z)); }
 
 // ======== DEMO BREVE ========
 void demo(){
@@ -101,6 +175,107 @@ void demo(){
   setLegIK(X,Y,Z);      delay(220);
 }
 
+// ======== TRAMAS BINARIAS ========
+uint8_t crc8(const uint8_t *d, uint8_t n){
+  uint8_t c = 0;
+  while (n--){
+    c ^= *d++;
+    for (uint8_t i=0; i<8; i++) c = (c & 0x80) ? (uint8_t)((c << 1) ^ 0x07) : (uint8_t)(c << 1);
+  }
+  return c;
+}
+inline int16_t rd16(const uint8_t *p){ return (int16_t)((uint16_t)p[0] | ((uint16_t)p[1] << 8)); }
+
+// `n` canales consecutivos desde `ch0` en una sola transacción I2C (auto-incremento
+// del PCA9685): dirección y registro se mandan una vez, no una por servo.
+void burstTicks(uint8_t addr, uint8_t ch0, const uint8_t *p, uint8_t n){
+  Wire.beginTransmission(addr);
+  Wire.write((uint8_t)(PCA_LED0_ON_L + 4*ch0));
+  for (uint8_t i=0; i<n; i++){
+    uint16_t t = clampTicks(rd16(p + 2*i));
+    Wire.write((uint8_t)0); Wire.write((uint8_t)0);            // ON = 0
+    Wire.write((uint8_t)(t & 0xFF)); Wire.write((uint8_t)(t >> 8));
+  }
+  Wire.endTransmission();
+}
+void setHexTicks(const uint8_t *p){   // 18 int16 LE: pata 0 (coxa, fémur, tibia), pata 1, ...
+  for (uint8_t b=0; b<2; b++){
+    const uint8_t *q = p + 2*BOARD_SERVOS*b;
+    burstTicks(PCA_ADDR[b], 0, q, I2C_BURST);
+    burstTicks(PCA_ADDR[b], I2C_BURST, q + 2*I2C_BURST, BOARD_SERVOS - I2C_BURST);
+  }
+}
+
+// Reproducción del buffer: deadlines con micros() desde loop(). No usamos una
+// ISR de timer porque el PCA9685 va por I2C (Wire), que no se puede usar dentro.
+bool setRate(int16_t hz10){
+  if (hz10 <= 0) return false;
+  PLAY_PERIOD_US = 10000000UL / (uint32_t)hz10;
+  return true;
+}
+void applySample(uint16_t i){
+  if (BUF_KIND == BUF_XYZ) setLegIKdmm(BUF[i][0], BUF[i][1], BUF[i][2]);
+  else                     setLegTicks(BUF[i][0], BUF[i][1], BUF[i][2]);
+}
+void playbackTick(){
+  if (!PLAYING || BUF_N == 0) return;
+  uint32_t now = micros();
+  if ((int32_t)(now - PLAY_NEXT_US) < 0) return;
+  applySample(PLAY_IDX);
+  PLAY_IDX = (PLAY_IDX + 1) % BUF_N;
+  PLAY_NEXT_US += PLAY_PERIOD_US;
+  // si nos hemos retrasado más de un periodo (p. ej. por una línea larga), no acumulamos
+  if ((int32_t)(now - PLAY_NEXT_US) > (int32_t)PLAY_PERIOD_US) PLAY_NEXT_US = now + PLAY_PERIOD_US;
+}
+
+void handleFrame(const uint8_t *f){   // trama completa y con CRC ya comprobado
+  int16_t a = rd16(f+2), b = rd16(f+4), c = rd16(f+6);
+  switch (f[1]){
+    case CMD_XYZ:    setLegIKdmm(a, b, c); break;
+    case CMD_S:
+      if (a==CH_COXA)       writeServoDeg(a,0,b*0.1f);
+      else if (a==CH_FEMUR) writeServoDeg(a,1,b*0.1f);
+      else if (a==CH_TIBIA) writeServoDeg(a,2,b*0.1f);
+      break;
+    case CMD_P:      writeUS(a, b); break;
+    case CMD_TICKS:  setLegTicks(a, b, c); break;
+    case CMD_HEX_TICKS: setHexTicks(f+2); break;
+    case CMD_ON:     RUN=true; HOLD=false; pwm.setPWMFreq(50); pwm2.setPWMFreq(50); centerAll(); break;
+    case CMD_OFF:    RUN=false; HOLD=false; allOff(); break;
+    case CMD_CENTER: RUN=false; HOLD=true; PLAYING=false; centerAll(); break;
+
+    case CMD_BUF_BEGIN:
+      if (a <= 0 || a > (int16_t)BUF_MAX || (b != BUF_TICKS && b != BUF_XYZ)){
+        Serial.print(F("ERR BEGIN ")); Serial.println(BUF_MAX); break;
+      }
+      PLAYING = false; BUF_N = a; BUF_KIND = b; PLAY_IDX = 0;
+      Serial.print(F("OK BEGIN ")); Serial.println(BUF_N);
+      break;
+    case CMD_BUF_DATA:
+      if (a < 0 || a >= (int16_t)BUF_N){ Serial.print(F("ERR BUF ")); Serial.println(a); break; }
+      for (uint8_t k=0; k<BUF_CHUNK && a+k < BUF_N; k++)
+        for (uint8_t j=0; j<3; j++) BUF[a+k][j] = rd16(f+4+6*k+2*j);
+      Serial.print(F("OK BUF ")); Serial.println(a);
+      break;
+    case CMD_PLAY:
+      if (BUF_N == 0 || !setRate(a)){ Serial.println(F("ERR PLAY")); break; }
+      if (b >= 0 && b < (int16_t)BUF_N) PLAY_IDX = b;
+      RUN = true; HOLD = false; PLAYING = true; PLAY_NEXT_US = micros();
+      Serial.println(F("OK PLAY"));
+      break;
+    case CMD_STOP:   PLAYING = false; Serial.println(F("OK STOP")); break;
+    case CMD_RATE:
+      if (!setRate(a)){ Serial.println(F("ERR RATE")); break; }
+      Serial.println(F("OK RATE"));
+      break;
+    case CMD_PHASE:
+      if (a < 0 || a >= (int16_t)BUF_N){ Serial.println(F("ERR PHASE")); break; }
+      PLAY_IDX = a; Serial.println(F("OK PHASE"));
+      break;
+    default:         Serial.println(F("ERR BIN"));
+  }
+}
+
 // ======== PARSER ========
 // parsea "a b c" a 3 floats (sin sscanf)
 bool parse3Floats(String s, float &a, float &b, float &c){
@@ -119,29 +294,73 @@ String readLine(){
   String s = Serial.readStringUntil('\n'); s.trim(); return s;
 }
 
+// En modo BIN los bytes se leen sueltos y sin bloquear (playbackTick sigue a su
+// ritmo). 0xA5 siempre abre trama: nunca aparece en una línea ASCII, así que un
+// byte perdido solo estropea la trama en la que cae. Si el CRC falla se salta
+// un byte y se busca el siguiente 0xA5, como FrameDecoder en el host. Fuera de
+// una trama, lo ASCII se acumula hasta '\n' (OFF, HELLO… siguen funcionando).
+uint8_t RX[MAX_FRAME_LEN];
+uint8_t RX_N = 0;
+String RX_LINE;
+const uint8_t RX_LINE_MAX = 64;
+
+void rxShift(uint8_t k){              // quita k bytes y lo que haya hasta el siguiente 0xA5
+  while (k < RX_N && RX[k] != FRAME_START) k++;
+  memmove(RX, RX+k, RX_N-k); RX_N -= k;
+}
+void rxFrames(){
+  while (RX_N >= 2 && RX_N >= frameLen(RX[1])){
+    uint8_t n = frameLen(RX[1]);
+    if (crc8(RX+1, n-2) != RX[n-1]){ Serial.println(F("ERR CRC")); rxShift(1); continue; }
+    handleFrame(RX);
+    rxShift(n);
+  }
+}
+bool pollBin(String &line){           // true cuando hay una línea ASCII completa en `line`
+  while (Serial.available()){
+    uint8_t c = Serial.read();
+    if (RX_N || c == FRAME_START){ RX_LINE = ""; RX[RX_N++] = c; rxFrames(); continue; }
+    if (c == '\n'){ line = RX_LINE; RX_LINE = ""; line.trim(); return true; }
+    if (c < 0x80 && RX_LINE.length() < RX_LINE_MAX) RX_LINE += (char)c;
+  }
+  return false;
+}
+
 // ======== SETUP / LOOP ========
 void setup(){
   Serial.begin(115200);
   Wire.begin();
+  Wire.setClock(400000);                // I2C rápido: con 18 servos por tick el bus manda
   pwm.begin();
   pwm.setOscillatorFrequency(27000000); // clones
   pwm.setPWMFreq(50);
+  pwm2.begin();                         // si no hay segunda placa, sus escrituras se ignoran (NACK)
+  pwm2.setOscillatorFrequency(27000000);
+  pwm2.setPWMFreq(50);
   delay(10);
   centerAll();
   Serial.println(F("READY"));
 }
 
 void loop(){
+  playbackTick();
   if (!Serial.available()) return;
-  String cmd = readLine();
+  String cmd;
+  if (BIN_MODE){ if (!pollBin(cmd)) return; }
+  else cmd = readLine();
   if (!cmd.length()) return;
 
   String up = cmd; up.toUpperCase();
 
-  if (up == "HELLO")  { Serial.println(F("OK READY")); return; }
-  if (up == "ON")     { RUN=true; HOLD=false; pwm.setPWMFreq(50); centerAll(); Serial.println(F("OK ON")); return; }
+  if (up == "HELLO")  { BIN_MODE=false; Serial.println(F("OK READY")); return; }
+  if (up == "HELLO BIN") {
+    BIN_MODE=true; RX_N=0; RX_LINE="";
+    Serial.print(F("OK BIN ")); Serial.print(PROTO_VERSION); Serial.print(' '); Serial.println(BUF_MAX);
+    return;
+  }
+  if (up == "ON")     { RUN=true; HOLD=false; pwm.setPWMFreq(50); pwm2.setPWMFreq(50); centerAll(); Serial.println(F("OK ON")); return; }
   if (up == "OFF")    { RUN=false; HOLD=false; allOff(); Serial.println(F("OK OFF")); return; }
-  if (up == "CENTER") { RUN=false; HOLD=true; centerAll(); Serial.println(F("OK CENTER")); return; }
+  if (up == "CENTER") { RUN=false; HOLD=true; PLAYING=false; centerAll(); Serial.println(F("OK CENTER")); return; }
   if (up == "DEMO")   { RUN=true;  HOLD=false; demo(); Serial.println(F("OK DEMO")); return; }
 
   if (up.startsWith("ALL_SWEEP")){
@@ -192,6 +411,17 @@ void loop(){
     Serial.println(F("OK DIR")); return;
   }
 
+  if (up.startsWith("T ")){           // T ticks ticks ticks
+    float a,b,c;
+    if (parse3Floats(cmd.substring(2), a, b, c)) {
+      setLegTicks((int16_t)a, (int16_t)b, (int16_t)c);
+      Serial.println(F("OK T"));
+    } else {
+      Serial.println(F("ERR T"));
+    }
+    return;
+  }
+
   if (up.startsWith("XYZ ")){         // XYZ x y z
     float x,y,z;
     String args = cmd.substring(4);
@@ -0,0 +1 @@
+"""spAIder — núcleo de cinemática y control de la pierna (sin UI)."""
@@ -0,0 +1,21 @@
+"""Importación diferida: el paquete arranca sin NumPy ni matplotlib y los carga al primer uso."""
+import importlib
+
+class LazyModule:
+    """Se comporta como el módulo `name`, que se importa en el primer acceso a un atributo."""
+
+    def __init__(self, name):
+        self._name = name
+        self._mod = None
+
+    def __getattr__(self, attr):
+        if self._mod is None:
+            self._mod = importlib.import_module(self._name)
+        value = getattr(self._mod, attr)
+        self.__dict__[attr] = value        # la próxima vez es un atributo normal, sin pasar por aquí
+        return value
+
+    def __repr__(self):
+        return f"<LazyModule {self._name} ({'cargado' if self._mod else 'sin cargar'})>"
+
+np = LazyModule("numpy")
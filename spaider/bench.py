@@ -0,0 +1,191 @@
+"""Benchmarks de los caminos calientes, sin Streamlit ni hardware.
+
+    python -m spaider.bench                      # mide y compara con bench_baseline.json
+    python -m spaider.bench --save-baseline      # guarda la medida como nueva referencia
+    python -m spaider.bench --quick --out r.json # menos casos, resultados a JSON
+
+Cada caso mide el tiempo por llamada (mediana y mejor de varias repeticiones,
+con la caché de `memoize` desactivada) y, si procede, un valor determinista
+(bytes por trama). Un caso es regresión si su mejor tiempo (el menos sensible al
+ruido de la máquina) supera el de referencia en más de `--tolerance` (25 % por
+defecto) o si crecen los bytes; el proceso sale entonces con código 1.
+"""
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+
+from ._lazy import np
+from . import kinematics as kin
+from .kinematics import DEFAULT_L, SAFE_MIN, SAFE_MAX
+from .protocol import (
+    xyz_frames, ticks_frames, encode_buf_data, BUF_CHUNK,
+)
+from .dynamics import dynamic_report
+from .trajectory import gait_cycle, GaitStream, SWING_SHAPES
+from .workspace import WorkspaceMap
+
+TRAJ_SAMPLES = (50, 100, 200, 400, 800)          # rango del slider "Resolución (puntos/ciclo)"
+WS_RESOLUTIONS = tuple(range(40, 201, 10))       # sliders θ2/θ3 del tab Workspace
+QUICK_TRAJ = (50, 200, 800)
+QUICK_WS = (40, 120, 200)
+
+L1, L2, L3 = DEFAULT_L["L1"], DEFAULT_L["L2"], DEFAULT_L["L3"]
+POSE = (120.0, 40.0, -60.0)
+ZERO, DIR = (90.0, 90.0, 90.0), (1, -1, -1)
+BAUD = 115200                                     # para el techo de muestras/s que da la línea (8N1)
+
+def _raw(fn):
+    """La función sin la caché de `memoize` (medimos el cálculo, no el acierto)."""
+    return getattr(fn, "__wrapped__", fn)
+
+def measure(fn, repeat=5, min_time=0.05):
+    """(mediana, mejor) en segundos por llamada; cada repetición dura al menos `min_time`."""
+    n = 1
+    while True:                                   # autorango como timeit
+        t0 = time.perf_counter()
+        for _ in range(n): fn()
+        dt = time.perf_counter() - t0
+        if dt >= min_time: break
+        n *= 2 if dt == 0 else max(2, min(10, int(math.ceil(min_time / dt))))
+    times = [dt / n]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(n): fn()
+        times.append((time.perf_counter() - t0) / n)
+    return float(np.median(times)), float(min(times))
+
+def _points(n, seed=0):
+    """Puntos de prueba repartidos por el entorno de la pose por defecto."""
+    rng = np.random.default_rng(seed)
+    x0, y0, z0 = POSE
+    return (x0 + rng.uniform(-40, 40, n), y0 + rng.uniform(-40, 40, n), z0 + rng.uniform(-40, 40, n))
+
+# ---- casos: cada uno devuelve {nombre: (callable, elementos por llamada, extras)} ----
+def cases_kinematics():
+    xs, ys, zs = (a.tolist() for a in _points(1000))
+    ts = [kin.ik_angles_variant(L1,L2,L3, x,y,z) for x, y, z in zip(xs, ys, zs)]
+    X, Y, Z = _points(10000)
+    T = kin.ik_batch(L1,L2,L3, X, Y, Z).branch(True)
+    return {
+        "ik_angles_variant[1000]": (lambda: [kin.ik_angles_variant(L1,L2,L3, x,y,z) for x, y, z in zip(xs, ys, zs)], 1000, {}),
+        "fk_xyz[1000]": (lambda: [kin.fk_xyz(L1,L2,L3, *t) for t in ts], 1000, {}),
+        "ik_batch[10000]": (lambda: kin.ik_batch(L1,L2,L3, X, Y, Z), 10000, {}),
+        "fk_batch[10000]": (lambda: kin.fk_batch(L1,L2,L3, T[0], T[1], T[2]), 10000, {}),
+        "ticks_table[10000]": (lambda: kin.ticks_table(L1,L2,L3, X, Y, Z, ZERO, DIR), 10000, {}),
+    }
+
+def cases_trajectory(samples):
+    gen = _raw(gait_cycle)
+    out = {}
+    for shape in SWING_SHAPES:
+        out[f"gait_cycle[{shape},200]"] = (lambda shape=shape: gen(*POSE, 24.0, 22.0, 200, 0.5, shape), 200, {})
+    stream = GaitStream(*POSE, 24.0, 22.0, 1.0)
+    out["GaitStream.sample"] = (stream.sample, 1, {})
+    for n in samples:
+        x, y, z = gen(*POSE, 24.0, 22.0, n)
+        out[f"step_trajectory[{n}]"] = (lambda n=n: gen(*POSE, 24.0, 22.0, n), n, {})
+        out[f"preflight+too_jerky[{n}]"] = (
+            lambda x=x, y=y, z=z: (kin.preflight_traj(L1,L2,L3, x, y, z, SAFE_MIN, SAFE_MAX),
+                                   kin.too_jerky(x, y, z)), n, {})
+        out[f"dynamic_report[{n}]"] = (lambda x=x, y=y, z=z: _raw(dynamic_report)(L1,L2,L3, x, y, z, 1.0), n, {})
+    return out
+
+def cases_workspace(resolutions):
+    return {f"workspace[{n}x{n}]": (lambda n=n: WorkspaceMap(L1,L2,L3, SAFE_MIN, SAFE_MAX, n, n), n*n, {})
+            for n in resolutions}
+
+def cases_encoding():
+    x, y, z = _raw(gait_cycle)(*POSE, 24.0, 22.0, 200)
+    tk = kin.ticks_table(L1,L2,L3, x, y, z, ZERO, DIR)
+    rows = tk.tolist()
+    out = {}
+    for name, enc in (("xyz_ascii", lambda: xyz_frames(x, y, z, False)),
+                      ("xyz_bin", lambda: xyz_frames(x, y, z, True)),
+                      ("ticks_ascii", lambda: ticks_frames(tk, False)),
+                      ("ticks_bin", lambda: ticks_frames(tk, True)),
+                      ("buf_data", lambda: [encode_buf_data(i, rows[i:i + BUF_CHUNK]) for i in range(0, len(rows), BUF_CHUNK)])):
+        frames = enc()
+        per_sample = sum(map(len, frames)) / len(rows)
+        out[f"encode_{name}[200]"] = (enc, len(rows), {"bytes_per_sample": round(per_sample, 3),
+                                                       "bytes_per_frame": round(sum(map(len, frames)) / len(frames), 3),
+                                                       "max_hz_115200": round(BAUD / (10*per_sample), 1)})
+    return out
+
+def run(quick=False, repeat=5, min_time=0.05, only=None, out=sys.stdout):
+    cases = {}
+    cases.update(cases_kinematics())
+    cases.update(cases_trajectory(QUICK_TRAJ if quick else TRAJ_SAMPLES))
+    cases.update(cases_workspace(QUICK_WS if quick else WS_RESOLUTIONS))
+    cases.update(cases_encoding())
+    results = {}
+    for name, (fn, items, extra) in cases.items():
+        if only and only not in name:
+            continue
+        med, best = measure(fn, repeat, min_time)
+        results[name] = {"median_s": med, "best_s": best, "items": items,
+                         "ns_per_item": med / items * 1e9, **extra}
+        if out:
+            print(f"{name:32s} {med*1e3:10.3f} ms  {med/items*1e9:10.1f} ns/elem"
+                  + "".join(f"  {k}={v}" for k, v in extra.items()), file=out)
+    return {"meta": meta(), "results": results}
+
+def meta():
+    return {"python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+def compare(current, baseline, tolerance=0.25):
+    """Lista de (caso, motivo) que empeoran respecto a `baseline`."""
+    regressions = []
+    base = baseline.get("results", {})
+    for name, r in current["results"].items():
+        b = base.get(name)
+        if b is None:
+            continue
+        ratio = r["best_s"] / b["best_s"] if b["best_s"] > 0 else 1.0
+        if ratio > 1.0 + tolerance:
+            regressions.append((name, f"{ratio:.2f}× más lento ({b['best_s']*1e3:.3f} → {r['best_s']*1e3:.3f} ms)"))
+        for k in ("bytes_per_sample", "bytes_per_frame"):
+            if k in r and k in b and r[k] > b[k]:
+                regressions.append((name, f"{k} {b[k]} → {r[k]}"))
+    return regressions
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m spaider.bench", description=__doc__.splitlines()[0])
+    ap.add_argument("--quick", action="store_true", help="menos tamaños de trayectoria y workspace")
+    ap.add_argument("--only", help="solo casos cuyo nombre contenga este texto")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--min-time", type=float, default=0.05, help="s mínimos por repetición")
+    ap.add_argument("--out", help="guarda los resultados en este JSON")
+    ap.add_argument("--baseline", default="bench_baseline.json")
+    ap.add_argument("--save-baseline", action="store_true", help="guarda los resultados como referencia")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="margen antes de marcar regresión (0.25 = +25 %%)")
+    args = ap.parse_args(argv)
+
+    res = run(args.quick, args.repeat, args.min_time, args.only)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+        print(f"Referencia guardada en {args.baseline}")
+        return 0
+    try:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"Sin referencia ({args.baseline}); usa --save-baseline para crearla.")
+        return 0
+    regressions = compare(res, baseline, args.tolerance)
+    for name, why in regressions:
+        print(f"REGRESIÓN {name}: {why}")
+    if not regressions:
+        print(f"Sin regresiones frente a {args.baseline} (tolerancia {args.tolerance:.0%}).")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""Calibración servo ↔ mecánico y presets JSON (el mismo formato que descarga la GUI).
+
+    {"L": [L1, L2, L3], "ZERO": [coxa, fémur, tibia], "DIR": [±1, ±1, ±1], "baud": 115200,
+     "gait": {"x0": …, "period": …}}            # "gait" es opcional (lo usa `spaider play`)
+"""
+import json
+from collections import namedtuple
+
+from .kinematics import DEFAULT_L
+
+PRESET_FILE = "spAIder_preset.json"
+DEFAULT_ZERO = (90.0, 90.0, 90.0)
+DEFAULT_DIR = (1, -1, -1)
+DEFAULT_BAUD = 115200
+
+Preset = namedtuple("Preset", "L ZERO DIR baud gait")
+
+def servo_to_mech(idx, servo_deg, zero=DEFAULT_ZERO, dir=DEFAULT_DIR):
+    """Grados de servo de la articulación `idx` → ángulo mecánico."""
+    return (servo_deg - zero[idx]) * (1 if dir[idx] == 1 else -1)
+
+def mech_to_servo(idx, mech_deg, zero=DEFAULT_ZERO, dir=DEFAULT_DIR):
+    """Ángulo mecánico → grados de servo (ZERO + DIR·θ)."""
+    return zero[idx] + dir[idx]*mech_deg
+
+def preset_from_dict(data):
+    """`Preset` con valores por defecto para lo que falte; valida longitudes y signos."""
+    L = [float(v) for v in data.get("L", (DEFAULT_L["L1"], DEFAULT_L["L2"], DEFAULT_L["L3"]))]
+    zero = [float(v) for v in data.get("ZERO", DEFAULT_ZERO)]
+    dirs = [int(v) for v in data.get("DIR", DEFAULT_DIR)]
+    if len(L) != 3 or len(zero) != 3 or len(dirs) != 3:
+        raise ValueError("L, ZERO y DIR llevan 3 valores (coxa, fémur, tibia)")
+    if any(d not in (1, -1) for d in dirs):
+        raise ValueError("DIR solo admite 1 o -1")
+    return Preset(L, zero, dirs, int(data.get("baud", DEFAULT_BAUD)), dict(data.get("gait", {})))
+
+def preset_to_dict(L, zero, dir, baud=DEFAULT_BAUD, gait=None):
+    out = {"L": list(L), "ZERO": list(zero), "DIR": list(dir), "baud": baud}
+    if gait: out["gait"] = dict(gait)
+    return out
+
+def load_preset(path=PRESET_FILE):
+    with open(path, encoding="utf-8") as f:
+        return preset_from_dict(json.load(f))
+
+def save_preset(preset, path=PRESET_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(preset_to_dict(*preset), f, indent=2)
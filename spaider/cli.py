@@ -0,0 +1,246 @@
+"""`spaider`: reproduce la marcha de la pierna sin GUI (para una Raspberry Pi o un servicio).
+
+    spaider play --preset spAIder_preset.json --port /dev/ttyACM0
+    spaider play --port EMULADOR --period 1.5 --duration 10 --log marcha.ndjson --record
+    spaider replay spaider_rec/20250101-120000.sprec --port /dev/ttyACM0 --speed 0.5
+    spaider replay spaider_rec/20250101-120000.sprec --info      # resumen, sin conectar
+    python -m spaider play ...                   # lo mismo sin instalar el script
+
+Los parámetros de la marcha salen, por este orden, de los valores por defecto,
+del bloque "gait" del preset y de las opciones. Antes de mover nada se pasan el
+chequeo previo (límites, saltos) y el dinámico (servo); si fallan, sale con 2.
+Ctrl+C o SIGTERM paran el player, envían la postura neutra y apagan los servos.
+"""
+import argparse
+import signal
+import sys
+import threading
+import time
+
+from . import calibration, player, recording
+from .dynamics import MG996R, SERVO_MODELS, dynamic_report
+from .kinematics import SAFE_MIN, SAFE_MAX
+from .link import SerialLink
+from .logbuf import EVENT, RingLog
+from .metrics import PrometheusExporter
+from .protocol import FRAME_LEN, stream_hz
+from .scheduler import POLICIES
+from .trajectory import SWING_SHAPES, CycleSampler, check_duty, gait_cycle, preflight_report
+
+GAIT_DEFAULTS = {"x0": 120.0, "y0": 40.0, "z0": -60.0, "step_len": 60.0, "step_h": 35.0,
+                 "period": 1.2, "samples": 200, "duty": 0.5, "shape": "Seno"}
+
+def gait_params(preset, args):
+    gait = {**GAIT_DEFAULTS, **preset.gait}
+    for k in GAIT_DEFAULTS:
+        v = getattr(args, k, None)
+        if v is not None: gait[k] = v
+    gait["samples"] = int(gait["samples"])
+    gait["duty"] = check_duty(gait["duty"])
+    if gait["shape"] not in SWING_SHAPES:
+        raise ValueError(f"forma de swing desconocida: {gait['shape']} ({', '.join(SWING_SHAPES)})")
+    return gait
+
+def check(preset, gait, knee_up, servo, foot_kg, hz):
+    """Lista de problemas del ciclo (vacía si se puede reproducir)."""
+    L1, L2, L3 = preset.L
+    traj = gait_cycle(gait["x0"], gait["y0"], gait["z0"], gait["step_len"], gait["step_h"],
+                      gait["samples"], gait["duty"], gait["shape"])
+    bad, spikes = preflight_report(L1,L2,L3, *traj, SAFE_MIN, SAFE_MAX, knee_up=knee_up, max_delta=8.0)
+    problems = [f"muestra {i}: {why}" for i, why in bad[:5]]
+    if spikes:
+        problems.append(f"{len(spikes)} saltos bruscos (>8 mm), el primero en la muestra {spikes[0]}")
+    dyn = dynamic_report(L1,L2,L3, *traj, gait["period"], servo, knee_up, foot_kg, hz=hz)
+    if dyn.bad:
+        problems.append(f"los servos no llegan en {len(dyn.bad)} muestras ({dyn.bad[0][1]}); "
+                        f"periodo mínimo {dyn.min_period:.2f} s")
+    return traj, problems
+
+def play(args):
+    preset = calibration.load_preset(args.preset) if args.preset else calibration.preset_from_dict({})
+    baud = args.baud or preset.baud
+    knee_up, on_host = not args.knee_down, args.ik == "host"
+    try:
+        gait = gait_params(preset, args)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    servo = next((m for m in SERVO_MODELS if m.name == args.servo), MG996R)
+    binary = not args.ascii
+    frame_bytes = FRAME_LEN if binary else len(f"XYZ {gait['x0']:.1f} {gait['y0']:.1f} {gait['z0']:.1f}\n")
+    hz = args.hz or round(stream_hz(frame_bytes, baud), 1)
+
+    traj, problems = check(preset, gait, knee_up, servo, args.foot_kg, hz)
+    if problems:
+        print("El chequeo previo falló:", *problems, sep="\n  ", file=sys.stderr)
+        return 2
+    if args.check:
+        print(f"Ciclo válido: {gait['samples']} muestras, {gait['period']:g} s/ciclo a {hz:g} Hz.")
+        return 0
+
+    log = RingLog(path=args.log) if args.log else RingLog()
+    exporter = PrometheusExporter(args.metrics, args.metrics_interval).start() if args.metrics else None
+    try:
+        ser = player.open_serial(args.port, baud)
+    except Exception as e:
+        print(f"error: no se pudo abrir {args.port}: {e}", file=sys.stderr)
+        return 1
+    link = SerialLink(ser, sink=log.add).start()
+    try:
+        if binary:
+            proto, _ = player.negotiate_binary(link)
+            if proto != "bin":
+                print("error: el sketch no acepta tramas binarias (usa --ascii)", file=sys.stderr)
+                return 1
+        link.send("ON").result(timeout=1.0)
+
+        zero, dirs = tuple(preset.ZERO), tuple(preset.DIR)
+        table = player.leg_table(preset.L, *traj, zero, dirs, knee_up, on_host)
+        sampler = CycleSampler(table, gait["period"])
+        kind = "ticks" if on_host else "xyz"
+        encode = player.frame_encoder(kind, binary)
+        neutral = player.neutral_frame(preset.L, gait["x0"], gait["y0"], gait["z0"], zero, dirs, knee_up,
+                                       on_host, binary)
+        rec = None
+        if args.record is not None:
+            rec = recording.Recorder(args.record or recording.new_path(), kind, binary, preset.L, zero, dirs, knee_up)
+        pl = player.Player(link, lambda k: encode(sampler.sample()), neutral, hz, args.policy,
+                           ping=not binary, log=log, recorder=rec)
+
+        done = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: done.set())
+        print(f"Reproduciendo en {args.port}: {gait['period']:g} s/ciclo a {hz:g} Hz "
+              f"({'binario' if binary else 'ASCII'}, IK en {'host' if on_host else 'Arduino'}). Ctrl+C para parar.")
+        pl.start()
+        done.wait(args.duration)
+        pl.stop()
+        stats = pl.sched.stats
+        log.add(EVENT, f"[CLI] parado: {stats.ticks} ticks, {stats.missed} perdidos")
+        print(f"Parado tras {stats.ticks} ticks ({stats.missed} perdidos).")
+        if rec is not None:
+            print(f"Grabación: {rec.frames} tramas en {rec.path}")
+        if not args.keep_on:
+            link.drain()                        # que la postura neutra salga antes que el OFF
+            link.send("OFF").result(timeout=1.0)
+        return 0
+    except Exception as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        link.close()
+        ser.close()
+        if exporter is not None:
+            exporter.stop()
+            exporter.registry.write_prometheus(args.metrics)
+        log.close()
+
+def print_summary(rec):
+    s = rec.summary()
+    m = rec.meta
+    print(f"{rec.path}: {s['frames']} tramas {m['kind']} ({'binario' if m['binary'] else 'ASCII'}), "
+          f"{s['duration_s']:.1f} s a {s['hz']:.1f} Hz; hueco máx. {s['max_gap_ms']:.1f} ms")
+    print(f"  hasta la línea: p50 {s['wire_p50_ms']:.2f} ms, p99 {s['wire_p99_ms']:.2f} ms, máx. "
+          f"{s['wire_max_ms']:.2f} ms; {s['dropped']} descartadas")
+    if not m["binary"]:
+        print(f"  hasta el OK: p50 {s['ack_p50_ms']:.2f} ms, p99 {s['ack_p99_ms']:.2f} ms, máx. "
+              f"{s['ack_max_ms']:.2f} ms; {s['acked']} con respuesta")
+    if s["frames"]:
+        for i, name in enumerate(("coxa", "fémur", "tibia")[:len(s["q_min"])]):
+            print(f"  {name}: {s['q_min'][i]:.1f}° … {s['q_max'][i]:.1f}°, salto máx. {s['max_step_deg'][i]:.2f}°")
+
+def replay(args):
+    try:
+        rec = recording.Recording(args.path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"error: no se pudo abrir {args.path}: {e}", file=sys.stderr)
+        return 1
+    if args.info:
+        print_summary(rec)
+        return 0
+    try:
+        src = recording.ReplaySource(rec, args.speed)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    binary = rec.meta["binary"]
+    baud = args.baud or calibration.DEFAULT_BAUD
+    hz = args.hz or round(rec.hz * args.speed, 1)
+    log = RingLog(path=args.log) if args.log else RingLog()
+    try:
+        ser = player.open_serial(args.port, baud)
+    except Exception as e:
+        print(f"error: no se pudo abrir {args.port}: {e}", file=sys.stderr)
+        return 1
+    link = SerialLink(ser, sink=log.add).start()
+    try:
+        if binary and player.negotiate_binary(link)[0] != "bin":
+            print("error: la grabación usa tramas binarias y el sketch no las acepta", file=sys.stderr)
+            return 1
+        link.send("ON").result(timeout=1.0)
+        pl = player.Player(link, src.frame_at, src.neutral, hz, args.policy, ping=not binary, log=log)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: pl.run_event.clear())
+        print(f"Reproduciendo {rec.path} en {args.port}: {rec.duration:.1f} s grabados a ×{args.speed:g} "
+              f"({hz:g} Hz). Ctrl+C para parar.")
+        pl.start()
+        while pl.running:
+            time.sleep(0.1)
+        print(f"Parado en la trama {src.index + 1}/{len(rec)} tras {pl.sched.stats.ticks} ticks "
+              f"({pl.sched.stats.missed} perdidos).")
+        if not args.keep_on:
+            link.drain()
+            link.send("OFF").result(timeout=1.0)
+        return 0
+    except Exception as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        link.close()
+        ser.close()
+        log.close()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="spaider", description=__doc__.splitlines()[0])
+    sub = ap.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("play", help="reproduce el ciclo de marcha por el puerto serie")
+    p.add_argument("--preset", help=f"JSON de la GUI (L, ZERO, DIR, baud y opcionalmente gait), p. ej. {calibration.PRESET_FILE}")
+    p.add_argument("--port", default="EMULADOR", help="puerto serie, o EMULADOR para el firmware emulado")
+    p.add_argument("--baud", type=int, help="por defecto, el del preset")
+    p.add_argument("--hz", type=float, help="ticks por segundo (por defecto, el máximo que aguanta la línea)")
+    p.add_argument("--policy", choices=POLICIES, default="skip", help="qué hacer con los ticks perdidos")
+    g = p.add_argument_group("marcha (sustituyen al bloque gait del preset)")
+    for k in ("x0", "y0", "z0", "step_len", "step_h", "period", "duty"):
+        g.add_argument(f"--{k.replace('_', '-')}", dest=k, type=float,
+                       help="fracción del ciclo con el pie apoyado, entre 0 y 1" if k == "duty" else None)
+    g.add_argument("--samples", type=int, help="puntos por ciclo")
+    g.add_argument("--shape", choices=SWING_SHAPES)
+    p.add_argument("--ik", choices=("host", "arduino"), default="host", help="dónde se resuelve la IK")
+    p.add_argument("--knee-down", action="store_true", help="rama de rodilla abajo")
+    p.add_argument("--ascii", action="store_true", help="comandos de texto en vez de tramas binarias")
+    p.add_argument("--servo", choices=[m.name for m in SERVO_MODELS], default=MG996R.name)
+    p.add_argument("--foot-kg", type=float, default=0.5, help="carga por pie en apoyo (kg)")
+    p.add_argument("--duration", type=float, help="s de reproducción (por defecto, hasta Ctrl+C)")
+    p.add_argument("--keep-on", action="store_true", help="no envía OFF al parar")
+    p.add_argument("--check", action="store_true", help="solo pasa el chequeo previo, sin conectar")
+    p.add_argument("--log", help="vuelca el log a este NDJSON")
+    p.add_argument("--metrics", help="escribe las métricas en este fichero de Prometheus")
+    p.add_argument("--metrics-interval", type=float, default=10.0)
+    p.add_argument("--record", nargs="?", const="", metavar="DIR",
+                   help=f"graba cada trama enviada (por defecto en {recording.REC_DIR}/<fecha>{recording.REC_SUFFIX})")
+
+    r = sub.add_parser("replay", help="reenvía una grabación por el puerto serie")
+    r.add_argument("path", help=f"directorio {recording.REC_SUFFIX}")
+    r.add_argument("--port", default="EMULADOR")
+    r.add_argument("--baud", type=int, help=f"por defecto, {calibration.DEFAULT_BAUD}")
+    r.add_argument("--speed", type=float, default=1.0, help="factor de velocidad (2 = el doble de rápido)")
+    r.add_argument("--hz", type=float, help="ticks por segundo (por defecto, los de la grabación × speed)")
+    r.add_argument("--policy", choices=POLICIES, default="skip")
+    r.add_argument("--keep-on", action="store_true", help="no envía OFF al acabar")
+    r.add_argument("--info", action="store_true", help="solo muestra el resumen, sin conectar")
+    r.add_argument("--log", help="vuelca el log a este NDJSON")
+    args = ap.parse_args(argv)
+    return play(args) if args.command == "play" else replay(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""Barrido de geometrías de pierna (L1/L2/L3 y límites) en paralelo, con caché en disco.
+
+    python -m spaider.design --L1 40 50 60 --L2 70:110:10 --L3 90:130:10
+    python -m spaider.design --L2 60:140:5 --top 20 --out barrido.csv   # ampliar: solo calcula lo nuevo
+
+Para cada candidata se calcula el área alcanzable de la sección R–Z
+(`WorkspaceMap.coverage`), si el paso objetivo pasa el chequeo previo
+(`preflight_report`) y la cadencia máxima que aguantan los servos
+(1 / periodo mínimo de `dynamic_report`). Las candidatas se reparten entre
+procesos (`ProcessPoolExecutor`, un trabajador por núcleo) y cada resultado
+se añade a un NDJSON en cuanto llega: repetir o ampliar un barrido solo
+evalúa las combinaciones que aún no estén en la caché, y un Ctrl+C no pierde
+lo ya calculado. La clave incluye el paso objetivo, el servo y `CACHE_VERSION`.
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from .kinematics import DEFAULT_L, SAFE_MIN, SAFE_MAX
+from .protocol import PWM_HZ
+
+CACHE_FILE = "spaider_design.ndjson"
+CACHE_VERSION = 1   # súbelo si cambia cómo se evalúa una candidata
+
+Candidate = namedtuple("Candidate", "L1 L2 L3 safe_min safe_max")
+SweepSpec = namedtuple("SweepSpec", "x0 y0 z0 step_len step_h samples duty shape servo foot_kg knee_up hz")
+SweepSpec.__new__.__defaults__ = (100.0, 10.0, 120.0, 40.0, 20.0, 100, 0.5, "Seno", "MG996R @ 6 V", 0.5, True, PWM_HZ)
+SweepSpec.__doc__ = """Paso objetivo (mm, mismas unidades que la pestaña Player) y modelo de servo por nombre."""
+
+FIELDS = ("L1", "L2", "L3", "safe_min", "safe_max", "coverage", "bad", "spikes", "min_period", "cadence", "limit")
+
+def candidates(L1s, L2s, L3s, limits=((SAFE_MIN, SAFE_MAX),)):
+    """Producto cartesiano de longitudes (mm) y juegos de límites ((min×3), (max×3))."""
+    return [Candidate(float(a), float(b), float(c), tuple(map(float, lo)), tuple(map(float, hi)))
+            for a, b, c, (lo, hi) in itertools.product(L1s, L2s, L3s, limits)]
+
+def cache_key(cand, spec):
+    raw = json.dumps([CACHE_VERSION, list(cand), list(spec)], sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+def evaluate(cand, spec):
+    """Métricas de una candidata (dict con `FIELDS`). Se ejecuta en los procesos trabajadores."""
+    from .dynamics import SERVO_MODELS, dynamic_report
+    from .trajectory import gait_cycle, preflight_report
+    from .workspace import WorkspaceMap
+
+    L1, L2, L3, lo, hi = cand
+    cover = WorkspaceMap(L1, L2, L3, lo, hi, n2=8, n3=8).coverage()
+    traj = gait_cycle(spec.x0, spec.y0, spec.z0, spec.step_len, spec.step_h, spec.samples, spec.duty, spec.shape)
+    bad, spikes = preflight_report(L1, L2, L3, *traj, lo, hi, knee_up=spec.knee_up)
+    out = {"L1": L1, "L2": L2, "L3": L3, "safe_min": list(lo), "safe_max": list(hi), "coverage": cover,
+           "bad": len(bad), "spikes": len(spikes), "min_period": math.inf, "cadence": 0.0, "limit": "alcance"}
+    if not bad:
+        servo = next(m for m in SERVO_MODELS if m.name == spec.servo)
+        dyn = dynamic_report(L1, L2, L3, *traj, 1.0, servo, spec.knee_up, spec.foot_kg, hz=spec.hz)
+        out.update(min_period=dyn.min_period, limit=f"{dyn.limit[0]} ({dyn.limit[1]})",
+                   cadence=1.0 / dyn.min_period if math.isfinite(dyn.min_period) and dyn.min_period > 0 else 0.0)
+    return out
+
+def _evaluate_job(job):
+    return evaluate(*job)
+
+def _evaluate_chunk(jobs):
+    return [evaluate(*job) for job in jobs]
+
+class SweepCache:
+    """Resultados por clave, persistidos como NDJSON de solo añadir (una línea por candidata)."""
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self._data = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue                       # línea a medio escribir de un barrido cortado
+                    self._data[rec.pop("key")] = rec
+        self._f = open(path, "a", encoding="utf-8") if path else None
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key):
+        return self._data.get(key)
+
+    def put(self, key, rec):
+        self._data[key] = rec
+        if self._f is not None:
+            self._f.write(json.dumps({"key": key, **rec}) + "\n")
+            self._f.flush()
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+
+def sweep(cands, spec=SweepSpec(), cache=None, workers=None, chunksize=None, progress=None):
+    """Evalúa `cands` (las que falten en `cache`) en un pool de procesos; lista de dicts en el mismo orden.
+
+    `workers=1` evalúa en este proceso (sin pool). `progress(hechas, total)` se
+    llama al llegar cada resultado nuevo.
+    """
+    cache = cache if cache is not None else SweepCache(None)
+    keys = [cache_key(c, spec) for c in cands]
+    todo = {}
+    for k, c in zip(keys, cands):
+        if k not in cache and k not in todo:
+            todo[k] = c
+    jobs = [(c, spec) for c in todo.values()]
+    workers = workers or os.cpu_count() or 1
+    if jobs:
+        futures = []
+        if workers == 1:
+            results = map(_evaluate_job, jobs)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            size = chunksize or max(1, len(jobs) // (4*workers))
+            futures = [pool.submit(_evaluate_chunk, jobs[i:i + size]) for i in range(0, len(jobs), size)]
+            results = (rec for f in futures for rec in f.result())
+        try:
+            for i, (k, rec) in enumerate(zip(todo, results), 1):
+                cache.put(k, rec)
+                if progress: progress(i, len(jobs))
+        finally:
+            if pool is not None:
+                for f in futures:               # a mano: shutdown(cancel_futures=True) es de Python 3.9
+                    f.cancel()
+                pool.shutdown()
+    return [cache.get(k) for k in keys]
+
+def rank(results, key="cadence"):
+    """Factibles primero; dentro, por `key` y luego por área alcanzable (de mayor a menor)."""
+    return sorted(results, key=lambda r: (r["bad"] == 0, r[key], r["coverage"]), reverse=True)
+
+def _values(spec):
+    """"50" → [50]; "70:110:10" → [70, 80, …, 110] (extremos incluidos)."""
+    out = []
+    for item in spec:
+        if ":" in item:
+            a, b, step = (float(v) for v in item.split(":"))
+            n = int(math.floor((b - a) / step + 1e-9)) + 1
+            out += [round(a + i*step, 6) for i in range(n)]
+        else:
+            out.append(float(item))
+    return out
+
+def main(argv=None):
+    from .dynamics import SERVO_MODELS
+    from .trajectory import SWING_SHAPES, check_duty
+
+    ap = argparse.ArgumentParser(prog="python -m spaider.design", description=__doc__.splitlines()[0])
+    for k in ("L1", "L2", "L3"):
+        ap.add_argument(f"--{k}", nargs="+", default=[str(DEFAULT_L[k])], help="mm: valores o inicio:fin:paso")
+    ap.add_argument("--limits", nargs=6, type=float, action="append", metavar="°",
+                    help="min×3 max×3; repetible (por defecto SAFE_MIN/SAFE_MAX)")
+    d = SweepSpec()
+    g = ap.add_argument_group("paso objetivo")
+    for k in ("x0", "y0", "z0", "step_len", "step_h", "duty", "foot_kg", "hz"):
+        g.add_argument(f"--{k.replace('_', '-')}", dest=k, type=float, default=getattr(d, k))
+    g.add_argument("--samples", type=int, default=d.samples)
+    g.add_argument("--shape", choices=SWING_SHAPES, default=d.shape)
+    g.add_argument("--servo", choices=[m.name for m in SERVO_MODELS], default=d.servo)
+    g.add_argument("--knee-down", action="store_true")
+    ap.add_argument("--cache", default=CACHE_FILE, help="NDJSON de resultados ('' para no guardar)")
+    ap.add_argument("--workers", type=int, help="procesos (por defecto, uno por núcleo)")
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--out", help="guarda todos los resultados del barrido en este CSV")
+    args = ap.parse_args(argv)
+    try:
+        check_duty(args.duty)
+    except ValueError as e:
+        ap.error(str(e))
+
+    limits = [(v[:3], v[3:]) for v in args.limits] if args.limits else [(SAFE_MIN, SAFE_MAX)]
+    cands = candidates(_values(args.L1), _values(args.L2), _values(args.L3), limits)
+    spec = SweepSpec(args.x0, args.y0, args.z0, args.step_len, args.step_h, args.samples, args.duty,
+                     args.shape, args.servo, args.foot_kg, not args.knee_down, args.hz)
+    cache = SweepCache(args.cache or None)
+    cached = sum(cache_key(c, spec) in cache for c in cands)
+    print(f"{len(cands)} candidatas, {cached} ya en caché.")
+    t0 = time.perf_counter()
+
+    def progress(i, n):
+        if i == n or i % max(1, n // 20) == 0:
+            print(f"\r  {i}/{n} ({time.perf_counter() - t0:.1f} s)", end="", flush=True)
+    try:
+        results = sweep(cands, spec, cache, args.workers, progress=progress)
+    except KeyboardInterrupt:
+        print(f"\nInterrumpido: {len(cache)} resultados guardados en {args.cache}.")
+        return 130
+    finally:
+        cache.close()
+    if len(cands) > cached:
+        print()
+
+    ok = [r for r in results if r["bad"] == 0]
+    print(f"{len(ok)}/{len(results)} geometrías pasan el paso objetivo. Mejores por cadencia:")
+    lim = (lambda r: f"  {r['safe_min']}–{r['safe_max']}") if len(limits) > 1 else (lambda r: "")
+    print(f"{'L1':>6} {'L2':>6} {'L3':>6}  {'área mm²':>9}  {'ciclos/s':>8}  {'T mín s':>7}  limita")
+    for r in rank(results)[:args.top]:
+        why = r["limit"] if r["bad"] == 0 else f"{r['bad']} muestras fuera de alcance/límites"
+        print(f"{r['L1']:6g} {r['L2']:6g} {r['L3']:6g}  {r['coverage']:9.0f}  {r['cadence']:8.2f}  "
+              f"{r['min_period']:7.2f}  {why}{lim(r)}")
+    if args.out:
+        with open(args.out, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, FIELDS)
+            w.writeheader()
+            w.writerows(results)
+        print(f"Resultados en {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
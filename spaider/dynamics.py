@@ -0,0 +1,128 @@
+"""Factibilidad dinámica de un ciclo en espacio articular: velocidad, aceleración y par de cada servo.
+
+`preflight_traj` solo mira límites estáticos y `too_jerky` el salto cartesiano
+entre muestras. Aquí se derivan los ángulos a lo largo del ciclo (diferencias
+centradas periódicas respecto a la fase u ∈ [0, 1)) y se comparan con un modelo
+de servo: con periodo T, ω = (dθ/du) / T, así que el periodo mínimo por
+velocidad sale directamente; la aceleración se mide sobre un tick del player
+y el periodo mínimo por aceleración se busca por bisección.
+
+Modelo de servo (recta par–velocidad de un motor DC): con un par de carga τ la
+velocidad y la aceleración disponibles caen en proporción (1 - τ / τ_bloqueo).
+El par lo pone el peso que soporta el pie durante el apoyo (`foot_kg`), con el
+brazo horizontal desde el eje del fémur y desde la rodilla hasta el pie.
+"""
+from collections import namedtuple
+
+from ._lazy import np
+from .kinematics import ik_batch
+from .memo import memoize
+from .protocol import PWM_HZ
+from .trajectory import periodic_interp
+
+JOINTS = ("coxa", "fémur", "tibia")
+
+# speed_dps: °/s en vacío; stall_kgcm: par de bloqueo; accel_dps2: aceleración en vacío (estimada)
+ServoModel = namedtuple("ServoModel", "name speed_dps stall_kgcm accel_dps2")
+
+MG996R = ServoModel("MG996R @ 6 V", 60/0.14, 11.0, 6000.0)        # 0,14 s/60°
+MG996R_4V8 = ServoModel("MG996R @ 4,8 V", 60/0.17, 9.4, 5000.0)   # 0,17 s/60°
+SERVO_MODELS = (MG996R, MG996R_4V8)
+
+STANCE_TOL = 0.5   # mm sobre el z mínimo del ciclo que aún cuentan como apoyo
+MAX_PERIOD = 600.0 # s/ciclo; por encima damos el ciclo por imposible
+
+DynReport = namedtuple("DynReport", "min_period limit vel acc torque bad")
+DynReport.__doc__ = """Resultado de `dynamic_report`.
+
+min_period: s/ciclo más rápido que aguanta el servo (inf si el par supera el de bloqueo).
+limit: (articulación, motivo) que fija ese periodo.
+vel, acc, torque: máximos por articulación (°/s, °/s², kg·cm) al periodo pedido.
+bad: lista de (índice, motivo) de las muestras que no se cumplen al periodo pedido.
+"""
+
+def cycle_velocity(theta):
+    """dθ/du de un ciclo periódico de ángulos (…, N) en grados, con u ∈ [0, 1) (diferencias centradas)."""
+    theta = np.unwrap(np.asarray(theta, dtype=float), period=360.0, axis=-1)
+    n = theta.shape[-1]
+    return (np.roll(theta, -1, axis=-1) - np.roll(theta, 1, axis=-1)) * (n / 2.0)
+
+def tick_accel(d1, period, hz):
+    """|α| (°/s²) con periodo `period`: cambio de velocidad a lo largo de un tick del player.
+
+    El servo recibe un objetivo nuevo por tick, así que un quiebro de velocidad
+    (p. ej. al apoyar con el swing en seno) se reparte en 1/hz s y no en una
+    muestra de la tabla: la aceleración no depende de la resolución.
+    """
+    d1 = np.asarray(d1, dtype=float)
+    n = d1.shape[-1]
+    h = max(1.0 / n, 1.0 / (period * hz))         # fase que avanza en un tick
+    table = d1.reshape(-1, n).T                   # (N, k) para interpolar en la fase
+    u = np.arange(n) / n
+    dv = periodic_interp(table, u + h/2) - periodic_interp(table, u - h/2)
+    return np.abs(dv.T.reshape(d1.shape)) / (h * period**2)
+
+def joint_torques(L2, L3, t2, t3, foot_kg, stance):
+    """Par estático (3, …) en kg·cm: el pie apoyado soporta `foot_kg` en vertical.
+
+    La coxa gira en un eje vertical y no carga el peso.
+    """
+    t2 = np.radians(t2); t3 = np.radians(t3)
+    arm_knee = L3*np.cos(t2 + t3)                # mm en horizontal, rodilla → pie
+    arm_femur = L2*np.cos(t2) + arm_knee         # mm en horizontal, eje del fémur → pie
+    load = np.where(stance, foot_kg, 0.0) / 10.0 # kg por cm de brazo
+    return np.stack([np.zeros_like(arm_femur), np.abs(arm_femur)*load, np.abs(arm_knee)*load])
+
+@memoize(maxsize=16)
+def dynamic_report(L1,L2,L3, x_traj, y_traj, z_traj, period, servo=MG996R, knee_up=True,
+                   foot_kg=0.5, margin=0.8, hz=PWM_HZ):
+    """Velocidades, aceleraciones y pares del ciclo frente a `servo` y el periodo más rápido factible.
+
+    Acepta pies (N,) o (patas, N) en el marco de cada pata; el último eje es el
+    ciclo. `margin` es la fracción de la velocidad/aceleración nominal que
+    usamos (el servo real no llega al dato del fabricante con carga y fuente
+    floja) y `hz` el ritmo al que llegan los objetivos al servo.
+    """
+    t1, t2, t3, _, _ = ik_batch(L1,L2,L3, x_traj, y_traj, z_traj).branch(knee_up)
+    d1 = cycle_velocity(np.stack([t1, t2, t3]))
+    z = np.asarray(z_traj, dtype=float)
+    stance = z <= z.min(axis=-1, keepdims=True) + STANCE_TOL
+    torque = joint_torques(L2, L3, t2, t3, foot_kg, stance)
+
+    free = 1.0 - torque / servo.stall_kgcm        # fracción de velocidad/aceleración que queda
+    stalled = free <= 0
+    free = np.maximum(free, 1e-9)
+    w_max = margin * servo.speed_dps * free
+    a_max = margin * servo.accel_dps2 * free
+    ax = tuple(range(1, d1.ndim))
+
+    def acc_ratio(T):                             # peor α / α_max por articulación
+        return (tick_accel(d1, T, hz) / a_max).max(axis=ax)
+
+    # velocidad: ω = (dθ/du) / T, cota cerrada; aceleración: búsqueda binaria (depende de T y del tick)
+    t_vel = (np.abs(d1) / w_max).max(axis=ax)
+    lo, hi = 1e-3, max(float(t_vel.max()), 0.05)
+    while acc_ratio(hi).max() > 1.0 and hi < MAX_PERIOD:
+        lo, hi = hi, hi * 2.0
+    for _ in range(40):
+        mid = 0.5 * (lo + hi)
+        lo, hi = (lo, mid) if acc_ratio(mid).max() <= 1.0 else (mid, hi)
+    t_acc = hi if hi < MAX_PERIOD else np.inf
+    if stalled.any():
+        j = int(np.flatnonzero(stalled.reshape(3, -1).any(axis=1))[0])
+        min_period, limit = np.inf, (JOINTS[j], "par")
+    elif t_acc > t_vel.max():
+        min_period, limit = t_acc, (JOINTS[int(np.argmax(acc_ratio(t_acc)))], "aceleración")
+    else:
+        min_period, limit = float(t_vel.max()), (JOINTS[int(np.argmax(t_vel))], "velocidad")
+
+    period = float(period)
+    vel, acc = np.abs(d1) / period, tick_accel(d1, period, hz)
+    over = {"Par": stalled, "Velocidad": vel > w_max, "Aceleración": acc > a_max}
+    bad = []
+    for motivo, mask in over.items():
+        for j in range(3):
+            idx = np.flatnonzero(mask[j].reshape(-1, mask.shape[-1]).any(axis=0))
+            bad += [(int(i), f"{motivo} {JOINTS[j]}") for i in idx]
+    bad.sort()
+    return DynReport(float(min_period), limit, vel.max(axis=ax), acc.max(axis=ax), torque.max(axis=ax), bad)
@@ -0,0 +1,455 @@
+"""Emulador de spAiderArduino.ino y puerto serie virtual compatible con pyserial.
+
+`FirmwareEmulator` reproduce los comandos del sketch (ASCII y tramas binarias,
+incluido el buffer de trayectoria) y registra cada escritura PWM con su instante.
+`EmulatedSerial` lo envuelve como un `serial.Serial`: modela el tiempo de cada
+byte a la velocidad configurada (8N1, 10 bits/byte) y un coste de CPU por
+comando, de modo que respuestas y escrituras PWM llegan cuando llegarían con el
+hardware real. Sirve para medir ritmos y latencias sin Arduino ni PCA9685.
+"""
+import math
+import re
+import threading
+import time
+from collections import deque
+
+from .kinematics import PERIOD_US, COUNTS, SAFE_MIN, SAFE_MAX, FW_US_MIN, FW_US_MAX, FW_SAFE_US, clamp
+from .lutgen import ANGLE_SCALE, DIST_SCALE, atan_lut, fixed_params, ik_fixed
+from .protocol import (
+    FRAME_START, PROTO_VERSION, BUF_CHUNK, BUF_TICKS, BUF_XYZ, XYZ_SCALE, DEG_SCALE, RATE_SCALE,
+    CMD_XYZ, CMD_S, CMD_P, CMD_TICKS, CMD_HEX_TICKS, CMD_ON, CMD_OFF, CMD_CENTER,
+    CMD_BUF_BEGIN, CMD_BUF_DATA, CMD_PLAY, CMD_STOP, CMD_RATE, CMD_PHASE,
+    frame_len, decode_frame,
+)
+
+EMU_PORT = "EMULADOR"
+
+CH_COXA, CH_FEMUR, CH_TIBIA = 13, 14, 15
+LEG_CH = (CH_COXA, CH_FEMUR, CH_TIBIA)
+BOARDS = 2              # PCA9685 en 0x40 y 0x41; el canal global es 16*placa + canal
+BOARD_SERVOS = 9        # hexápodo: 3 patas × 3 articulaciones por placa, canales 0..8
+I2C_BURST = 7           # canales por transacción (buffer de Wire de 32 bytes)
+
+# Costes aproximados en un AVR a 16 MHz (s). Ajustables por instancia.
+DEFAULT_COSTS = {
+    "line":  250e-6,   # readStringUntil + trim + toUpperCase + comparaciones
+    "char":  8e-6,     # por carácter (substring/toFloat…)
+    "frame": 40e-6,    # leer la trama, CRC y despacho
+    "ik":    200e-6,   # ik_leg_cd(): isqrt + atan2 por tabla en enteros (estimado; en float eran ~600 µs)
+    "pwm":   150e-6,   # setPWM: una transacción I2C de 6 bytes a 400 kHz
+    "i2c":   25e-6,    # por byte en una escritura en ráfaga (auto-incremento)
+}
+
+_NUM = re.compile(r"\s*[-+]?(\d+\.?\d*|\.\d+)")
+
+def us_to_ticks(us):
+    return int(round(us * COUNTS / PERIOD_US))
+
+SAFE_MIN_TICKS, SAFE_MAX_TICKS = us_to_ticks(FW_SAFE_US[0]), us_to_ticks(FW_SAFE_US[1])
+
+def to_float(s):
+    """String::toFloat(): prefijo numérico o 0."""
+    m = _NUM.match(s)
+    return float(m.group(0)) if m else 0.0
+
+def to_int(s):
+    """String::toInt(): prefijo entero o 0."""
+    return int(to_float(s))
+
+def parse3(s):
+    """parse3Floats() del sketch: tres números separados por espacios, o None."""
+    parts = s.strip().replace(",", ".").split(" ", 2)
+    if len(parts) < 3:
+        return None
+    return tuple(to_float(p) for p in parts)
+
+def mm_to_dmm(v):
+    """mmToDmm() del sketch: lroundf(v·10) saturado a int16."""
+    v = clamp(v * DIST_SCALE, -32767.0, 32767.0)
+    return int(math.copysign(math.floor(abs(v) + 0.5), v))
+
+def leg_ik(params, x, y, z, lut=None):
+    """ik_leg_cd() de ik_lut.h (punto fijo, codo arriba) con x, y, z en mm: grados."""
+    cx, fm, tb = ik_fixed(params, mm_to_dmm(x), mm_to_dmm(y), mm_to_dmm(z), lut)
+    return int(cx) / ANGLE_SCALE, int(fm) / ANGLE_SCALE, int(tb) / ANGLE_SCALE
+
+class FirmwareEmulator:
+    """Estado y comandos del sketch sobre un reloj virtual.
+
+    Cada mensaje se ejecuta en max(llegada, CPU libre) y ocupa la CPU lo que
+    cuestan sus cálculos y escrituras I2C (más los `delay()` de DEMO/ALL_SWEEP).
+    La reproducción del buffer compite por la misma CPU, como en `loop()`.
+    """
+
+    def __init__(self, buf_max=96, costs=None, log_size=100000, L=(50.0, 80.0, 100.0)):
+        self.costs = dict(DEFAULT_COSTS, **(costs or {}))
+        self.L = tuple(map(float, L))
+        self._ik, self._lut = fixed_params(*self.L), atan_lut()   # lo que llevaría su ik_lut.h
+        self.pwm = [0]*(16*BOARDS)
+        self.SERVO_MIN_US = [FW_US_MIN]*3
+        self.SERVO_MAX_US = [FW_US_MAX]*3
+        self.ZERO_DEG = [90.0, 90.0, 90.0]
+        self.DIR = [1, -1, -1]
+        self.MIN_DEG = list(map(float, SAFE_MIN))
+        self.MAX_DEG = list(map(float, SAFE_MAX))
+        self.RUN = True; self.HOLD = False; self.BIN_MODE = False
+        self.buf_max = buf_max
+        self.buf = [[0, 0, 0] for _ in range(buf_max)]
+        self.buf_n = 0; self.buf_kind = BUF_TICKS
+        self.playing = False; self.play_idx = 0
+        self.play_period = 0.0; self.play_next = 0.0
+        self.writes = deque(maxlen=log_size)   # (t, canal global, ticks)
+        self.commands = 0
+        self.play_ticks = 0
+        self.busy_time = 0.0
+        self.busy_until = 0.0                  # CPU libre a partir de…
+        self._t = 0.0                          # instante de la operación en curso
+
+    # ---- hardware ----
+    def _spend(self, key, n=1):
+        self._t += self.costs[key]*n
+
+    def _set_pwm(self, ch, ticks):
+        self._spend("pwm")
+        self.pwm[ch] = ticks
+        self.writes.append((self._t, ch, ticks))
+
+    def write_us(self, ch, us):
+        self._set_pwm(ch, us_to_ticks(clamp(int(us), *FW_SAFE_US)))
+
+    def write_ticks(self, ch, t):
+        self._set_pwm(ch, clamp(int(t), SAFE_MIN_TICKS, SAFE_MAX_TICKS))
+
+    def center_all(self):
+        for ch in LEG_CH: self.write_us(ch, 1500)
+
+    def all_off(self):
+        self.playing = False
+        for ch in range(16*BOARDS): self._set_pwm(ch, 0)
+
+    def set_hex_ticks(self, vals):
+        """setHexTicks(): 18 ticks en ráfagas de hasta I2C_BURST canales por placa."""
+        for b in range(BOARDS):
+            row = vals[BOARD_SERVOS*b: BOARD_SERVOS*(b + 1)]
+            for ch0 in range(0, BOARD_SERVOS, I2C_BURST):
+                burst = row[ch0: ch0 + I2C_BURST]
+                self._spend("i2c", 2 + 4*len(burst))          # dirección + registro + 4 bytes/canal
+                for k, t in enumerate(burst):
+                    ch = 16*b + ch0 + k
+                    self.pwm[ch] = clamp(int(t), SAFE_MIN_TICKS, SAFE_MAX_TICKS)
+                    self.writes.append((self._t, ch, self.pwm[ch]))
+
+    def write_servo_deg(self, ch, idx, deg):
+        deg = clamp(deg, 0.0, 180.0)
+        self.write_us(ch, self.SERVO_MIN_US[idx] + (self.SERVO_MAX_US[idx] - self.SERVO_MIN_US[idx]) * (deg/180.0))
+
+    def set_joint(self, ch, idx, mech):
+        self.write_servo_deg(ch, idx, clamp(self.DIR[idx]*mech + self.ZERO_DEG[idx], self.MIN_DEG[idx], self.MAX_DEG[idx]))
+
+    def set_leg_ik(self, x, y, z):
+        self._spend("ik")
+        for idx, (ch, a) in enumerate(zip(LEG_CH, leg_ik(self._ik, x, y, z, self._lut))):
+            self.set_joint(ch, idx, a)
+
+    def set_leg_ticks(self, a, b, c):
+        for ch, t in zip(LEG_CH, (a, b, c)): self.write_ticks(ch, t)
+
+    def joint_ticks(self):
+        """Ticks actuales de coxa, fémur y tibia."""
+        return tuple(self.pwm[ch] for ch in LEG_CH)
+
+    # ---- reloj / CPU ----
+    def _begin(self, t):
+        self.advance(t)
+        self._t = max(t, self.busy_until)
+        return self._t
+
+    def _end(self, t0):
+        self.busy_until = self._t
+        self.busy_time += self._t - t0
+        return self._t
+
+    def advance(self, t):
+        """Ejecuta los ticks de reproducción (playbackTick) que caben hasta el instante `t`."""
+        while self.playing and self.buf_n:
+            ts = max(self.play_next, self.busy_until)
+            if ts > t: break
+            self._t = ts
+            row = self.buf[self.play_idx]
+            if self.buf_kind == BUF_XYZ:
+                self.set_leg_ik(*(v / XYZ_SCALE for v in row))
+            else:
+                self.set_leg_ticks(*row)
+            self.play_idx = (self.play_idx + 1) % self.buf_n
+            self.play_next += self.play_period
+            if ts - self.play_next > self.play_period:   # retrasados: no acumulamos
+                self.play_next = ts + self.play_period
+            self.play_ticks += 1
+            self._end(ts)
+
+    # ---- comandos ASCII ----
+    def handle_line(self, line, t):
+        """Procesa una línea llegada en `t`. Devuelve (respuestas, instante en que termina)."""
+        t0 = self._begin(t)
+        cmd = line.strip()
+        self._spend("line"); self._spend("char", len(cmd))
+        out = self._line(cmd) if cmd else []
+        self.commands += bool(cmd)
+        return out, self._end(t0)
+
+    def _line(self, cmd):
+        up = cmd.upper()
+        if up == "HELLO": self.BIN_MODE = False; return ["OK READY"]
+        if up == "HELLO BIN":
+            self.BIN_MODE = True; return [f"OK BIN {PROTO_VERSION} {self.buf_max}"]
+        if up == "ON": self.RUN, self.HOLD = True, False; self.center_all(); return ["OK ON"]
+        if up == "OFF": self.RUN, self.HOLD = False, False; self.all_off(); return ["OK OFF"]
+        if up == "CENTER":
+            self.RUN, self.HOLD, self.playing = False, True, False; self.center_all(); return ["OK CENTER"]
+        if up == "DEMO":
+            self.RUN, self.HOLD = True, False
+            X, Y, Z = 120, 40, -60
+            for dx, dz in ((0, 0), (0, -22), (24, -22), (24, -60), (0, -60), (0, 0)):
+                self.set_leg_ik(X + dx, Y, Z + dz); self._t += 0.220
+            return ["OK DEMO"]
+        if up.startswith("ALL_SWEEP"):
+            for us, d in ((1500, .350), (1000, .280), (2000, .280), (1500, .350)):
+                for ch in range(16): self.write_us(ch, us)
+                self._t += d
+            return ["OK ALL_SWEEP"]
+        if up.startswith("ALL "):
+            us = to_int(cmd[4:])
+            for ch in range(16): self.write_us(ch, us)
+            return ["OK ALL"]
+        if up.startswith(("P ", "S ", "ZERO ", "DIR ")):
+            _, a, b = (cmd.split(" ", 2) + ["", ""])[:3]
+            if up.startswith("P "):
+                self.write_us(to_int(a), to_int(b)); return ["OK P"]
+            if up.startswith("S "):
+                ch = to_int(a)
+                if ch in LEG_CH: self.write_servo_deg(ch, LEG_CH.index(ch), to_int(b))
+                return ["OK S"]
+            idx = to_int(a)
+            if up.startswith("ZERO "):
+                if 0 <= idx < 3: self.ZERO_DEG[idx] = to_float(b)
+                return ["OK ZERO"]
+            sgn = to_int(b)
+            if 0 <= idx < 3 and sgn in (1, -1): self.DIR[idx] = sgn
+            return ["OK DIR"]
+        if up.startswith("T "):
+            v = parse3(cmd[2:])
+            if v is None: return ["ERR T"]
+            self.set_leg_ticks(*(int(a) for a in v)); return ["OK T"]
+        if up.startswith("XYZ "):
+            v = parse3(cmd[4:])
+            if v is None: return ["ERR XYZ"]
+            self.set_leg_ik(*v); return ["OK XYZ"]
+        return ["ERR CMD"]
+
+    # ---- tramas binarias ----
+    def handle_frame(self, frame, t):
+        """Procesa una trama completa llegada en `t`. Devuelve (respuestas, instante en que termina)."""
+        t0 = self._begin(t)
+        self._spend("frame")
+        self.commands += 1
+        try:
+            cmd, v = decode_frame(frame)
+        except ValueError:
+            return ["ERR CRC"], self._end(t0)
+        return self._frame(cmd, v), self._end(t0)
+
+    def _frame(self, cmd, v):
+        a, b, c = v[0], v[1], v[2]
+        if cmd == CMD_XYZ: self.set_leg_ik(a/XYZ_SCALE, b/XYZ_SCALE, c/XYZ_SCALE); return []
+        if cmd == CMD_S:
+            if a in LEG_CH: self.write_servo_deg(a, LEG_CH.index(a), b/DEG_SCALE)
+            return []
+        if cmd == CMD_P: self.write_us(a, b); return []
+        if cmd == CMD_TICKS: self.set_leg_ticks(a, b, c); return []
+        if cmd == CMD_HEX_TICKS: self.set_hex_ticks(v); return []
+        if cmd == CMD_ON: self.RUN, self.HOLD = True, False; self.center_all(); return []
+        if cmd == CMD_OFF: self.RUN, self.HOLD = False, False; self.all_off(); return []
+        if cmd == CMD_CENTER: self.RUN, self.HOLD, self.playing = False, True, False; self.center_all(); return []
+        if cmd == CMD_BUF_BEGIN:
+            if a <= 0 or a > self.buf_max or b not in (BUF_TICKS, BUF_XYZ):
+                return [f"ERR BEGIN {self.buf_max}"]
+            self.playing = False
+            self.buf_n, self.buf_kind, self.play_idx = a, b, 0
+            return [f"OK BEGIN {a}"]
+        if cmd == CMD_BUF_DATA:
+            if not 0 <= a < self.buf_n: return [f"ERR BUF {a}"]
+            for k in range(min(BUF_CHUNK, self.buf_n - a)):
+                self.buf[a + k] = list(v[1 + 3*k: 4 + 3*k])
+            return [f"OK BUF {a}"]
+        if cmd == CMD_PLAY:
+            if not self.buf_n or a <= 0: return ["ERR PLAY"]
+            self.play_period = RATE_SCALE / a
+            if 0 <= b < self.buf_n: self.play_idx = b
+            self.RUN, self.HOLD, self.playing = True, False, True
+            self.play_next = self._t
+            return ["OK PLAY"]
+        if cmd == CMD_STOP: self.playing = False; return ["OK STOP"]
+        if cmd == CMD_RATE:
+            if a <= 0: return ["ERR RATE"]
+            self.play_period = RATE_SCALE / a; return ["OK RATE"]
+        if cmd == CMD_PHASE:
+            if not 0 <= a < self.buf_n: return ["ERR PHASE"]
+            self.play_idx = a; return ["OK PHASE"]
+        return ["ERR BIN"]
+
+class EmulatedSerial:
+    """Puerto serie virtual (subconjunto de `serial.Serial`) conectado a un `FirmwareEmulator`.
+
+    Los mensajes se procesan al escribirlos, pero con marcas de tiempo virtuales:
+    cada byte tarda 10/baud en cruzar la línea y las respuestas solo se pueden
+    leer cuando habrían llegado.
+    """
+
+    def __init__(self, port=EMU_PORT, baudrate=115200, timeout=0.2, emulator=None,
+                 clock=time.monotonic, sleep=time.sleep, banner=True):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.fw = emulator or FirmwareEmulator()
+        self.clock = clock
+        self.sleep = sleep
+        self.is_open = True
+        self._lock = threading.Lock()
+        self.t_open = clock()
+        self.fw.busy_until = max(self.fw.busy_until, self.t_open)
+        self._rx_free = self.t_open   # línea host→Arduino libre a partir de…
+        self._tx_free = self.t_open   # línea Arduino→host libre a partir de…
+        self._inbuf = bytearray()     # línea ASCII a medias
+        self._frame = bytearray()     # trama a medias (modo BIN)
+        self._out = deque()           # (t_disponible, bytes)
+        self._ready = bytearray()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        if banner:
+            self._emit(["READY"], self.t_open)
+
+    @property
+    def byte_time(self):
+        return 10.0 / self.baudrate
+
+    # ---- host → Arduino ----
+    def write(self, data):
+        if not self.is_open:
+            raise OSError("puerto cerrado")
+        data = bytes(data)
+        with self._lock:
+            t = max(self.clock(), self._rx_free)
+            for byte in data:
+                t += self.byte_time
+                self._parse(byte, t)
+            self._rx_free = t
+            self.bytes_in += len(data)
+        return len(data)
+
+    def _parse(self, byte, t):
+        """Un byte más, como loop() del sketch: en modo BIN, pollBin() (0xA5 abre trama, lo demás es ASCII)."""
+        if self.fw.BIN_MODE and (self._frame or byte == FRAME_START):
+            self._inbuf.clear()                      # lo que hubiera antes del 0xA5 era basura
+            self._frame.append(byte)
+            self._frames(t)
+        elif byte == 0x0A:
+            line = self._inbuf.decode(errors="replace"); self._inbuf.clear()
+            self._emit(*self.fw.handle_line(line, t))
+        elif byte < 0x80 or not self.fw.BIN_MODE:
+            self._inbuf.append(byte)
+
+    def _frames(self, t):
+        """rxFrames(): tramas completas; tras un CRC malo se salta un byte y se busca el siguiente 0xA5."""
+        buf = self._frame
+        while len(buf) >= 2 and len(buf) >= frame_len(buf[1]):
+            n = frame_len(buf[1])
+            replies, t = self.fw.handle_frame(bytes(buf[:n]), t)
+            self._emit(replies, t)
+            k = 1 if replies == ["ERR CRC"] else n
+            i = buf.find(FRAME_START, k)
+            del buf[:len(buf) if i < 0 else i]
+
+    def _emit(self, lines, t):
+        for line in lines:
+            data = (line + "\r\n").encode()      # Serial.println
+            self._tx_free = max(t, self._tx_free) + len(data)*self.byte_time
+            self._out.append((self._tx_free, data))
+            self.bytes_out += len(data)
+
+    # ---- Arduino → host ----
+    def _collect(self):
+        now = self.clock()
+        self.fw.advance(now)
+        while self._out and self._out[0][0] <= now:
+            self._ready.extend(self._out.popleft()[1])
+
+    @property
+    def out_waiting(self):
+        """Bytes escritos que aún no han cruzado la línea (como el buffer de salida del sistema)."""
+        with self._lock:
+            return max(0, math.ceil((self._rx_free - self.clock()) / self.byte_time))
+
+    @property
+    def in_waiting(self):
+        with self._lock:
+            self._collect()
+            return len(self._ready)
+
+    def read(self, size=1):
+        deadline = None if self.timeout is None else self.clock() + self.timeout
+        while True:
+            with self._lock:
+                self._collect()
+                if len(self._ready) >= size or (self._ready and not self._out):
+                    data = bytes(self._ready[:size]); del self._ready[:size]
+                    return data
+                next_t = self._out[0][0] if self._out else None
+            now = self.clock()
+            if deadline is not None and now >= deadline:
+                with self._lock:
+                    data = bytes(self._ready[:size]); del self._ready[:size]
+                return data
+            wait = 0.002 if next_t is None else next_t - now
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            self.sleep(max(wait, 0.0002))
+
+    def read_all(self):
+        with self._lock:
+            self._collect()
+            data = bytes(self._ready); self._ready.clear()
+        return data
+
+    def readline(self):
+        deadline = None if self.timeout is None else self.clock() + self.timeout
+        line = bytearray()
+        while not line.endswith(b"\n"):
+            c = self.read(1)
+            line += c
+            if not c and deadline is not None and self.clock() >= deadline:
+                break
+        return bytes(line)
+
+    def reset_input_buffer(self):
+        with self._lock:
+            self._collect(); self._ready.clear()
+
+    def flush(self):
+        """Espera a que lo escrito termine de cruzar la línea (tcdrain)."""
+        with self._lock:
+            wait = self._rx_free - self.clock()
+        if wait > 0:
+            self.sleep(wait)
+
+    def close(self):
+        self.is_open = False
+
+    # ---- medidas ----
+    def stats(self):
+        """Bytes por sentido, comandos, ticks de reproducción y ocupación de la CPU emulada."""
+        span = self.clock() - self.t_open
+        fw = self.fw
+        return {"bytes_in": self.bytes_in, "bytes_out": self.bytes_out,
+                "commands": fw.commands, "play_ticks": fw.play_ticks, "pwm_writes": len(fw.writes),
+                "cpu_busy": fw.busy_time / span if span > 0 else 0.0,
+                "line_busy": self.bytes_in*self.byte_time / span if span > 0 else 0.0}
@@ -0,0 +1,111 @@
+"""Hexápodo: 6 patas × 3 articulaciones repartidas en dos PCA9685 (0x40 y 0x41).
+
+Cada pata tiene su montaje en el cuerpo (posición y guiñada) y su propia
+calibración ZERO/DIR. Los pies se dan en coordenadas del cuerpo (x adelante,
+y a la izquierda, z arriba); `Hexapod` los pasa al marco de cada pata y resuelve
+la IK de todas a la vez con una sola llamada a `ik_batch`. Por cada tick sale
+una única trama CMD_HEX_TICKS con los 18 objetivos.
+"""
+from collections import namedtuple
+
+from ._lazy import np
+from .kinematics import DEFAULT_L, SAFE_MIN, SAFE_MAX, ik_batch, mech_to_servo_batch, ticks_table
+from .trajectory import step_profile
+
+N_LEGS = 6
+PCA_ADDRS = (0x40, 0x41)
+
+# Pata i: placa i // 3, canales ch0..ch0+2 = coxa, fémur, tibia (espejo del sketch).
+LegMount = namedtuple("LegMount", "name board ch0 x y yaw")
+
+DEFAULT_MOUNTS = (
+    LegMount("RF", 0, 0,  80.0, -50.0,  -45.0),
+    LegMount("RM", 0, 3,   0.0, -65.0,  -90.0),
+    LegMount("RR", 0, 6, -80.0, -50.0, -135.0),
+    LegMount("LF", 1, 0,  80.0,  50.0,   45.0),
+    LegMount("LM", 1, 3,   0.0,  65.0,   90.0),
+    LegMount("LR", 1, 6, -80.0,  50.0,  135.0),
+)
+TRIPOD = (0.0, 0.5, 0.0, 0.5, 0.0, 0.5)    # RF+RR+LM / RM+LF+LR alternos
+
+class Hexapod:
+    """Modelo multi-pata: montajes, calibración por pata e IK/ticks vectorizados.
+
+    `zero`/`dir` aceptan (3,) (misma calibración en todas las patas) o (6, 3).
+    Los métodos trabajan con arrays (6, N): fila i = pata i.
+    """
+
+    def __init__(self, L1=DEFAULT_L["L1"], L2=DEFAULT_L["L2"], L3=DEFAULT_L["L3"], mounts=DEFAULT_MOUNTS,
+                 zero=(90.0, 90.0, 90.0), dir=(1, -1, -1), safe_min=SAFE_MIN, safe_max=SAFE_MAX):
+        if len(mounts) != N_LEGS:
+            raise ValueError(f"se esperan {N_LEGS} montajes")
+        self.L = (L1, L2, L3)
+        self.mounts = tuple(mounts)
+        self.zero = np.broadcast_to(np.asarray(zero, dtype=float), (N_LEGS, 3)).copy()
+        self.dir = np.broadcast_to(np.asarray(dir, dtype=float), (N_LEGS, 3)).copy()
+        self.safe_min, self.safe_max = tuple(safe_min), tuple(safe_max)
+        self._mx = np.array([m.x for m in mounts])[:, None]
+        self._my = np.array([m.y for m in mounts])[:, None]
+        yaw = np.radians([m.yaw for m in mounts])[:, None]
+        self._c, self._s = np.cos(yaw), np.sin(yaw)
+
+    # ---- marcos ----
+    def to_leg(self, x, y, z):
+        """Cuerpo → marco de cada pata. Entradas (6, N) o (N,) (mismo punto para todas)."""
+        dx = np.asarray(x, dtype=float) - self._mx
+        dy = np.asarray(y, dtype=float) - self._my
+        return self._c*dx + self._s*dy, -self._s*dx + self._c*dy, np.broadcast_to(np.asarray(z, dtype=float), dx.shape)
+
+    def to_body(self, x, y, z):
+        """Marco de cada pata → cuerpo."""
+        x = np.asarray(x, dtype=float); y = np.asarray(y, dtype=float)
+        return (self._mx + self._c*x - self._s*y, self._my + self._s*x + self._c*y,
+                np.broadcast_to(np.asarray(z, dtype=float), np.broadcast(x, y, self._mx).shape))
+
+    # ---- IK / ticks ----
+    def ik(self, x, y, z):
+        """IK de todas las patas a la vez (pies en coordenadas del cuerpo) → IKBatch (2, 6, N)."""
+        return ik_batch(*self.L, *self.to_leg(x, y, z), self.safe_min, self.safe_max)
+
+    def ticks(self, x, y, z, knee_up=True):
+        """Tabla (N, 18) de ticks PCA9685 (pata 0 coxa/fémur/tibia, pata 1, …) para los pies dados."""
+        xl, yl, zl = self.to_leg(x, y, z)
+        tk = ticks_table(*self.L, xl, yl, zl, self.zero.T, self.dir.T, knee_up,
+                         self.safe_min, self.safe_max)          # (6, N, 3)
+        return np.ascontiguousarray(tk.transpose(1, 0, 2)).reshape(-1, 3*N_LEGS)
+
+    def preflight(self, x, y, z, knee_up=True):
+        """Lista de (pata, índice, motivo) de los pies que no se pueden ejecutar.
+
+        Con una calibración distinta por pata, los límites se comprueban en grados
+        de servo (ZERO + DIR·θ), que es lo que recorta el firmware.
+        """
+        t1, t2, t3, reach, _ = self.ik(x, y, z).branch(knee_up)
+        servo = mech_to_servo_batch(np.stack([t1, t2, t3]), self.zero.T, self.dir.T)
+        lo = np.asarray(self.safe_min, dtype=float)[:, None, None]
+        hi = np.asarray(self.safe_max, dtype=float)[:, None, None]
+        lim = ((lo <= servo) & (servo <= hi)).all(axis=0)
+        bad = [(int(i), int(j), "IK") for i, j in zip(*np.nonzero(~reach))]
+        bad += [(int(i), int(j), "Límites") for i, j in zip(*np.nonzero(reach & ~lim))]
+        bad.sort(key=lambda b: (b[1], b[0]))
+        return bad
+
+    # ---- posturas / marcha ----
+    def neutral_feet(self, reach, z0):
+        """Pies (3, 6, 1) en el cuerpo con cada pata estirada `reach` mm en su eje y a altura z0."""
+        return tuple(np.asarray(a)[:, :1] for a in self.to_body(np.full((N_LEGS, 1), reach), 0.0, z0))
+
+    def gait(self, reach, z0, step_len, step_h, n, phases=TRIPOD, duty=0.5, shape="Seno"):
+        """Ciclo de marcha hacia +x del cuerpo: (x, y, z) de forma (6, n).
+
+        Todas las patas siguen el mismo `step_profile`, desfasado `phases[i]`
+        de ciclo (trípode por defecto).
+        """
+        u = np.linspace(0, 1, n, endpoint=False) + np.asarray(phases, dtype=float)[:, None]
+        dx, dz = step_profile(u, step_len, step_h, duty, shape)
+        x0, y0, _ = self.neutral_feet(reach, z0)
+        return x0 + dx, np.broadcast_to(y0, dx.shape), z0 + dz
+
+def leg_channels(mounts=DEFAULT_MOUNTS):
+    """[(dirección I2C, canal)] de las 18 articulaciones en el orden de la trama."""
+    return [(PCA_ADDRS[m.board], m.ch0 + j) for m in mounts for j in range(3)]
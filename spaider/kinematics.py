@@ -0,0 +1,185 @@
+"""Cinemática de la pierna (coxa–fémur–tibia): versiones escalares y vectorizadas."""
+import math
+from collections import namedtuple
+
+from ._lazy import np                  # las funciones escalares no necesitan NumPy
+from .memo import memoize
+from .metrics import timed
+
+# ====== Parámetros geométricos y límites ======
+DEFAULT_L = dict(L1=50.0, L2=80.0, L3=100.0)  # mm
+SAFE_MIN = [0, 10, 10]    # límites mecánicos aproximados (grados)
+SAFE_MAX = [180, 170, 170]
+
+US_MIN = 500   # μs para 0°
+US_MAX = 2500  # μs para 180°
+PERIOD_US = 20000  # μs a 50 Hz (PCA9685)
+COUNTS = 4096      # 12-bit
+
+# Mapeo que aplica el sketch (SERVO_MIN_US/SERVO_MAX_US y SAFE_MIN_US/SAFE_MAX_US)
+FW_US_MIN = 600    # μs para 0° en el firmware
+FW_US_MAX = 2400   # μs para 180° en el firmware
+FW_SAFE_US = (600, 2400)
+
+# ====== Utilidades geométricas ======
+def clamp(v, lo, hi): return max(lo, min(hi, v))
+
+def wrap_deg_0_360(a):
+    a = a % 360.0
+    if a < 0: a += 360.0
+    return a
+
+def fk_xyz(L1,L2,L3, t1_deg, t2_deg, t3_deg):
+    """Cinemática directa (x,y,z) a partir de ángulos mecánicos t1,t2,t3 en grados."""
+    t1 = math.radians(t1_deg); t2 = math.radians(t2_deg); t3 = math.radians(t3_deg)
+    r_xy = L2*math.cos(t2) + L3*math.cos(t2+t3)   # proyección en planta de fémur+tibia
+    z    = L2*math.sin(t2) + L3*math.sin(t2+t3)   # altura
+    r_tot = L1 + r_xy                              # L1 adelanta el pie respecto al eje de coxa
+    x = r_tot*math.cos(t1)
+    y = r_tot*math.sin(t1)
+    return x,y,z
+
+def ik_angles_variant(L1,L2,L3, x,y,z, knee_up=True):
+    """Cinemática inversa con dos ramas: knee_up (rodilla “hacia arriba”) y knee_down (hacia abajo)."""
+    t1 = math.degrees(math.atan2(y, x))          # giro de coxa en planta
+    rxy = math.sqrt(x*x + y*y) - L1              # “radio útil” desde la bisagra del fémur
+    if rxy < 0: rxy = 0.0
+    D = (rxy*rxy + z*z - L2*L2 - L3*L3)/(2.0*L2*L3)
+    D = clamp(D, -1.0, 1.0)                      # si quedaba fuera por redondeos, lo acotamos
+    t3r = math.acos(D)
+    if not knee_up:
+        t3r = -t3r
+    t3 = math.degrees(t3r)
+    t2 = math.degrees(math.atan2(z, rxy) - math.atan2(L3*math.sin(t3r), L2 + L3*math.cos(t3r)))
+    return (t1, t2, t3)
+
+def ik_angles(L1,L2,L3, x,y,z):
+    return ik_angles_variant(L1,L2,L3, x,y,z, knee_up=True)
+
+def deg_to_us(servo_deg, us_min=US_MIN, us_max=US_MAX):
+    """Convierte grados de servo (0–180) a microsegundos."""
+    return us_min + (us_max - us_min) * (servo_deg/180.0)
+
+def us_to_counts(us):
+    """Convierte microsegundos a “ticks” 12-bit del PCA9685."""
+    return int(round(us * COUNTS / PERIOD_US))
+
+# ====== Versiones vectorizadas (N puntos de una vez) ======
+REACH_EPS = 1e-9  # tolerancia numérica en |D| <= 1
+
+class IKBatch(namedtuple("IKBatch", "t1 t2 t3 reach limits")):
+    """Resultado de `ik_batch`: t1 con forma (...), t2/t3/limits con forma (2, ...).
+
+    El índice 0 del primer eje es knee-up y el 1 knee-down. `reach` es True donde
+    el punto cae dentro del alcance de fémur+tibia; `limits` donde además los tres
+    ángulos quedan dentro de los límites seguros.
+    """
+    __slots__ = ()
+
+    def branch(self, knee_up=True):
+        """Devuelve (t1, t2, t3, reach, limits) de una sola rama."""
+        k = 0 if knee_up else 1
+        return self.t1, self.t2[k], self.t3[k], self.reach, self.limits[k]
+
+    def ok(self, knee_up=True):
+        """Máscara de puntos alcanzables y dentro de límites para la rama pedida."""
+        return self.reach & self.limits[0 if knee_up else 1]
+
+def limits_mask(t1, t2, t3, safe_min=SAFE_MIN, safe_max=SAFE_MAX):
+    """True donde (t1,t2,t3) respeta los límites; t1 se compara ya envuelto a [0,360)."""
+    t1n = np.mod(t1, 360.0)
+    return ((safe_min[0] <= t1n) & (t1n <= safe_max[0]) &
+            (safe_min[1] <= t2)  & (t2  <= safe_max[1]) &
+            (safe_min[2] <= t3)  & (t3  <= safe_max[2]))
+
+def fk_batch(L1,L2,L3, t1_deg, t2_deg, t3_deg):
+    """Igual que `fk_xyz` pero con arrays (cualquier forma compatible por broadcasting)."""
+    t1 = np.radians(t1_deg); t2 = np.radians(t2_deg); t3 = np.radians(t3_deg)
+    r_tot = L1 + L2*np.cos(t2) + L3*np.cos(t2+t3)
+    z     = L2*np.sin(t2) + L3*np.sin(t2+t3)
+    return r_tot*np.cos(t1), r_tot*np.sin(t1), z
+
+def ik_batch(L1,L2,L3, x,y,z, safe_min=SAFE_MIN, safe_max=SAFE_MAX):
+    """IK de N puntos con NumPy, resolviendo las dos ramas de rodilla a la vez.
+
+    Reproduce `ik_angles_variant` punto a punto, pero además informa qué puntos
+    están fuera de alcance (|D| > 1 antes de acotar, o más cerca del eje que L1)
+    y cuáles violan límites.
+    """
+    x = np.asarray(x, dtype=float); y = np.asarray(y, dtype=float); z = np.asarray(z, dtype=float)
+    t1 = np.degrees(np.arctan2(y, x))
+    rxy = np.hypot(x, y) - L1
+    reach = rxy >= 0.0                           # dentro de L1 la IK no tiene solución exacta
+    rxy = np.maximum(rxy, 0.0)
+    D = (rxy*rxy + z*z - L2*L2 - L3*L3)/(2.0*L2*L3)
+    reach &= np.abs(D) <= 1.0 + REACH_EPS
+    t3r = np.arccos(np.clip(D, -1.0, 1.0))
+    t3r = np.stack([t3r, -t3r])                  # [knee-up, knee-down]
+    t2r = np.arctan2(z, rxy) - np.arctan2(L3*np.sin(t3r), L2 + L3*np.cos(t3r))
+    t2 = np.degrees(t2r); t3 = np.degrees(t3r)
+    limits = limits_mask(t1, t2, t3, safe_min, safe_max)
+    return IKBatch(t1, t2, t3, reach, limits)
+
+@memoize(maxsize=32)
+def ik_solution(L1,L2,L3, x,y,z, knee_up=True, safe_min=SAFE_MIN, safe_max=SAFE_MAX):
+    """IK de un solo punto como floats: (t1, t2, t3, alcanzable, dentro_de_límites)."""
+    t1, t2, t3, reach, lim = ik_batch(L1,L2,L3, x,y,z, safe_min, safe_max).branch(knee_up)
+    return float(t1), float(t2), float(t3), bool(reach), bool(lim)
+
+# ====== Calibración vectorizada: mecánico → servo → μs → ticks ======
+def _per_joint(v, ndim):
+    """(3,) o (3, patas…) → forma que hace broadcasting contra un array (3, …) de `ndim` ejes."""
+    v = np.asarray(v, dtype=float)
+    return v.reshape(v.shape + (1,)*(ndim - v.ndim))
+
+def mech_to_servo_batch(t_mech, zero, dir):
+    """Ángulos mecánicos (3, ...) → grados de servo con ZERO/DIR por articulación.
+
+    `zero`/`dir` pueden ser (3,) o (3, patas) para calibrar cada pata por separado.
+    """
+    t_mech = np.asarray(t_mech, dtype=float)
+    return _per_joint(zero, t_mech.ndim) + _per_joint(dir, t_mech.ndim)*t_mech
+
+def us_to_counts_batch(us):
+    """Versión vectorizada de `us_to_counts` (uint16)."""
+    return np.rint(np.asarray(us) * COUNTS / PERIOD_US).astype(np.uint16)
+
+def ticks_table(L1,L2,L3, x,y,z, zero, dir, knee_up=True,
+                servo_min=SAFE_MIN, servo_max=SAFE_MAX, us_min=FW_US_MIN, us_max=FW_US_MAX):
+    """Tabla (N, 3) de ticks PCA9685 [coxa, fémur, tibia] para los puntos (x, y, z).
+
+    Reproduce en el host lo que hace `setLegIK` en el sketch: IK, ZERO/DIR, recorte
+    del ángulo de servo a [servo_min, servo_max], grados → μs y recorte a FW_SAFE_US.
+    Con x, y, z de forma (patas, N) y zero/dir (3, patas) devuelve (patas, N, 3).
+    """
+    t1, t2, t3, _, _ = ik_batch(L1,L2,L3, x,y,z).branch(knee_up)
+    servo = mech_to_servo_batch(np.stack([t1, t2, t3]), zero, dir)
+    lo = _per_joint(servo_min, servo.ndim)
+    hi = _per_joint(servo_max, servo.ndim)
+    us = np.clip(deg_to_us(np.clip(servo, lo, hi), us_min, us_max), *FW_SAFE_US)
+    return np.moveaxis(us_to_counts_batch(us), 0, -1)
+
+def ticks_to_mech(ticks, zero, dir, us_min=FW_US_MIN, us_max=FW_US_MAX):
+    """Inversa de `ticks_table` (salvo recortes): ticks [..., 3] → ángulos mecánicos [..., 3] en grados."""
+    us = np.asarray(ticks, dtype=float) * PERIOD_US / COUNTS
+    servo = (us - us_min) * 180.0 / (us_max - us_min)
+    return (servo - np.asarray(zero, dtype=float)) * np.asarray(dir, dtype=float)
+
+# ====== Preflight: IK + límites + suavidad ======
+@timed("spaider_preflight_seconds", "preflight_traj (IK + límites) sin caché")
+def preflight_traj(L1,L2,L3, x_traj, y_traj, z_traj, safe_min, safe_max, knee_up=True):
+    """Lista de (índice, motivo) de los puntos que no se pueden ejecutar."""
+    sol = ik_batch(L1,L2,L3, x_traj, y_traj, z_traj, safe_min, safe_max)
+    _, _, _, reach, lim = sol.branch(knee_up)
+    bad = [(int(i), "IK") for i in np.flatnonzero(~reach)]            # fuera de alcance
+    bad += [(int(i), "Límites") for i in np.flatnonzero(reach & ~lim)]
+    bad.sort()
+    return bad
+
+def too_jerky(x_traj, y_traj, z_traj, max_delta=8.0):
+    dx = np.diff(x_traj, prepend=x_traj[0])
+    dy = np.diff(y_traj, prepend=y_traj[0])
+    dz = np.diff(z_traj, prepend=z_traj[0])
+    step = np.sqrt(dx*dx + dy*dy + dz*dz)
+    spikes = np.where(step > max_delta)[0]
+    return spikes.tolist()
@@ -0,0 +1,442 @@
+"""Enlace serie no bloqueante: hilo lector + correlación de respuestas `OK …`/`ERR …`.
+
+El sketch procesa los comandos en orden y responde a cada línea ASCII (y a las
+tramas de buffer) con una línea `OK <CMD> …` o `ERR <CMD> …`. `SerialLink` lleva
+una cola de peticiones en vuelo y empareja cada respuesta con la petición más
+antigua que espera esa clave; quien llama recibe un `Future` cuyo resultado es
+un `Reply` con la línea y la latencia de ida y vuelta.
+
+Solo un hilo escribe en el puerto: todo pasa por una cola con prioridad
+(E-STOP > comandos > movimiento). Las tramas de movimiento no se amontonan:
+si el puerto aún tiene bytes por enviar, esperan en la cola (donde una más
+nueva sustituye a la más vieja) y no en el buffer del sistema, así que un
+E-STOP solo espera a lo poco que ya esté saliendo por la línea.
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import Future
+
+from .logbuf import EVENT
+from .metrics import counter, histogram
+from .protocol import FRAME_START
+
+Reply = namedtuple("Reply", "line ok latency")
+
+# comandos ASCII que entiende el sketch; cualquier otro recibe "ERR CMD"
+ASCII_COMMANDS = {"HELLO", "ON", "OFF", "CENTER", "DEMO", "ALL", "ALL_SWEEP",
+                  "P", "S", "ZERO", "DIR", "XYZ", "T"}
+_REPLY_KEY = {"HELLO": "READY"}
+
+def reply_key(line):
+    """(clave, argumento) que esperamos en la respuesta a una línea ASCII."""
+    parts = line.strip().upper().split()
+    if not parts:
+        return None, None
+    if parts[:2] == ["HELLO", "BIN"]:
+        return "BIN", None
+    if parts[0] not in ASCII_COMMANDS:
+        return "CMD", None
+    return _REPLY_KEY.get(parts[0], parts[0]), None
+
+_WRITE_S = histogram("spaider_serial_write_seconds", "Escritura en el puerto (incluye esperar el lock)")
+_WRITE_BYTES = counter("spaider_serial_bytes_written_total", "Bytes escritos en el puerto")
+_REPLY_S = histogram("spaider_serial_reply_seconds", "Ida y vuelta hasta la respuesta OK/ERR")
+_TIMEOUTS = counter("spaider_serial_reply_timeouts_total", "Peticiones sin respuesta a tiempo")
+_DROPPED = counter("spaider_serial_motion_dropped_total", "Tramas de movimiento descartadas (obsoletas o por E-STOP)")
+_ESTOP_S = histogram("spaider_estop_seconds", "Desde estop() hasta el OFF escrito en la línea")
+_ACK_S = histogram("spaider_serial_motion_ack_seconds", "Movimiento ASCII: desde que sale por el puerto hasta su OK")
+
+# prioridades de la cola de escritura (menor = antes)
+PRIO_ESTOP, PRIO_CMD, PRIO_MOTION = 0, 1, 2
+PRIO_NAMES = {PRIO_ESTOP: "estop", PRIO_CMD: "cmd", PRIO_MOTION: "motion"}
+_QUEUE_S = {p: histogram("spaider_serial_queue_seconds", "Espera en la cola de escritura", prio=name)
+            for p, name in PRIO_NAMES.items()}
+
+class LinkBusy(RuntimeError):
+    """No hay hueco en la ventana de peticiones en vuelo."""
+
+class Preempted(RuntimeError):
+    """Comando que seguía en la cola cuando llegó un E-STOP (no se llegó a escribir)."""
+
+class SerialLink:
+    """Hilo lector + ventana acotada de peticiones en vuelo sobre un puerto tipo pyserial.
+
+    - `send(line)`: escribe una línea y devuelve un Future[Reply].
+    - `send_frame(data, key, arg)`: igual para una trama que sí tiene respuesta.
+    - `send_raw(data)`: escribe sin esperar respuesta (tramas de movimiento); con
+      `on_reply`, las líneas ASCII avisan cuando llega su `OK` sin ocupar la ventana.
+    - `estop()`: OFF por delante de todo; vacía la cola y bloquea el movimiento hasta `resume()`.
+    Las líneas que no corresponden a ninguna petición quedan en `unsolicited`.
+    El tráfico va a `log` (deque que vacía `drain_log`) o, si se da `sink`, a
+    `sink(dirección, texto, latencia)` en el momento en que ocurre.
+
+    `motion_depth`: tramas de movimiento en cola como mucho (una nueva deja
+    obsoleta a la más vieja). `tx_backlog`: bytes pendientes en el puerto
+    (`out_waiting`) por encima de los cuales el movimiento espera en la cola.
+    """
+
+    def __init__(self, ser, window=8, timeout=1.0, lock=None, log_size=2000, sink=None,
+                 motion_depth=2, tx_backlog=32):
+        self.ser = ser
+        self.timeout = timeout
+        self.lock = lock or threading.Lock()
+        self._slots = threading.BoundedSemaphore(window)
+        self.window = window
+        self._pending = deque()            # (key, arg, future, t_envío, deadline)
+        self._plock = threading.Lock()
+        self.log = deque(maxlen=log_size)  # ("→"/"←", texto, latencia o None)
+        self.sink = sink
+        self.unsolicited = deque(maxlen=log_size)
+        self.latencies = deque(maxlen=512)
+        self.motion_depth = motion_depth
+        self.tx_backlog = tx_backlog
+        self._q = []                       # heap de [prio, orden, datos, future, etiqueta, t_encolado, al_escribir, (clave, al_responder)]
+        self._acks = deque()               # [clave, t_perf al escribir, al_responder] del movimiento ASCII
+        self._order = itertools.count()
+        self._cv = threading.Condition()
+        self._motion = 0                   # tramas de movimiento en la cola
+        self.halted = False                # tras un E-STOP, hasta resume()
+        self.estop_last = None             # s desde estop() hasta OFF en la línea
+        self.estop_worst = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._writer_thread = None
+
+    # ---- ciclo de vida ----
+    def start(self):
+        self._thread = threading.Thread(target=self._reader, name="spaider-serial-reader", daemon=True)
+        self._thread.start()
+        self._writer_thread = threading.Thread(target=self._writer, name="spaider-serial-writer", daemon=True)
+        self._writer_thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        with self._cv:
+            self._cv.notify_all()
+        for th in (self._writer_thread, self._thread):
+            if th is not None:
+                th.join(timeout=1.0)
+        self._cancel_queued(lambda prio: True, ConnectionError("enlace cerrado"))
+        self._fail_all(ConnectionError("enlace cerrado"))
+
+    @property
+    def in_flight(self):
+        with self._plock:
+            return len(self._pending)
+
+    # ---- envío (todo pasa por la cola del hilo escritor) ----
+    def _enqueue(self, prio, data, fut=None, label=None, on_wire=None, ack=None):
+        if self._stop.is_set():
+            raise ConnectionError("enlace cerrado")
+        with self._cv:
+            if prio == PRIO_MOTION:
+                if self.halted:
+                    _DROPPED.inc()
+                    self._call(on_wire, math.nan)
+                    if ack: self._call(ack[1], math.nan)
+                    return False
+                if self._motion >= self.motion_depth:       # la más vieja ya no sirve
+                    old = min((it for it in self._q if it[0] == PRIO_MOTION), key=lambda it: it[1])
+                    self._q.remove(old); heapq.heapify(self._q)
+                    self._motion -= 1
+                    _DROPPED.inc()
+                    self._call(old[6], math.nan)
+                    if old[7]: self._call(old[7][1], math.nan)
+                self._motion += 1
+            heapq.heappush(self._q, [prio, next(self._order), data, fut, label, time.perf_counter(), on_wire, ack])
+            self._cv.notify()
+        return True
+
+    def _tx_busy(self):
+        """¿Quedan en el puerto más de `tx_backlog` bytes por salir? (si el puerto no lo dice, no)."""
+        try:
+            return (getattr(self.ser, "out_waiting", 0) or 0) > self.tx_backlog
+        except Exception:
+            return False
+
+    def _writer(self):
+        while True:
+            with self._cv:
+                while not self._stop.is_set():
+                    if self._q and (self._q[0][0] != PRIO_MOTION or not self._tx_busy()):
+                        break
+                    self._cv.wait(timeout=0.001 if self._q else None)   # con movimiento en cola: sondeo
+                else:
+                    return
+                prio, _, data, fut, label, t_q, on_wire, ack = heapq.heappop(self._q)
+                if prio == PRIO_MOTION: self._motion -= 1
+            t0 = time.perf_counter()
+            _QUEUE_S[prio].observe(t0 - t_q)
+            waiter = None
+            if ack is not None:                             # antes de escribir: el OK puede llegar enseguida
+                waiter = [ack[0], t0, ack[1]]
+                with self._plock:
+                    self._acks.append(waiter)
+            try:
+                with self.lock:
+                    self.ser.write(data)
+                    if prio == PRIO_ESTOP and hasattr(self.ser, "flush"):
+                        self.ser.flush()                    # hasta que sale por la línea
+            except Exception as e:
+                if fut is not None: self._drop(fut, e)
+                else: self._log(EVENT, f"[ERR] escritura: {e}")
+                self._call(on_wire, math.nan)
+                if waiter is not None and self._unwait(waiter):
+                    self._call(waiter[2], math.nan)
+                continue
+            t1 = time.perf_counter()
+            if waiter is not None: waiter[1] = t1
+            _WRITE_S.observe(t1 - t0)
+            _WRITE_BYTES.inc(len(data))
+            if label: self._log("→", label)
+            self._call(on_wire, t1)
+
+    def _call(self, on_wire, t):
+        """`on_wire(t)` sin dejar que un fallo del callback tumbe al hilo escritor (o al E-STOP)."""
+        if on_wire is None:
+            return
+        try:
+            on_wire(t)
+        except Exception as e:
+            self._log(EVENT, f"[ERR] callback de escritura: {e!r}")
+
+    def write(self, data, prio=PRIO_CMD):
+        """Encola `data` sin respuesta asociada; False si se descartó (movimiento tras un E-STOP)."""
+        return self._enqueue(prio, data)
+
+    def send_raw(self, data, on_wire=None, on_reply=None):
+        """Encola una trama de movimiento; `on_wire(t)` recibe el perf_counter al salir por el puerto, o NaN si se descarta.
+
+        `on_reply(dt)` (solo líneas ASCII: `XYZ …` → `OK XYZ`, `T …` → `OK T`)
+        recibe los s desde que salió hasta su respuesta, o NaN si se descarta o
+        no llega en `timeout`. Las tramas binarias de movimiento no tienen respuesta.
+        """
+        ack = None
+        if on_reply is not None and data[:1] != bytes((FRAME_START,)):
+            ack = (reply_key(data.decode("ascii", "replace"))[0], on_reply)
+        return self._enqueue(PRIO_MOTION, data, on_wire=on_wire, ack=ack)
+
+    def send_frame(self, data, key, arg=None, label=None, timeout=None):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise LinkBusy(f"{self.window} peticiones sin respuesta")
+        fut = Future()
+        t0 = time.monotonic()
+        with self._plock:
+            self._pending.append((key, arg, fut, t0, t0 + (timeout or self.timeout)))
+        try:
+            self._enqueue(PRIO_CMD, data, fut, label or f"[{key}]")
+        except Exception as e:
+            self._drop(fut, e)
+            raise
+        return fut
+
+    def send(self, line, timeout=None):
+        """Envía una línea ASCII; `timeout` para comandos lentos (DEMO, ALL_SWEEP…)."""
+        if not line.endswith("\n"): line += "\n"
+        key, arg = reply_key(line)
+        return self.send_frame(line.encode("utf-8"), key, arg, label=line.strip(), timeout=timeout)
+
+    # ---- E-STOP ----
+    def estop(self, line="OFF"):
+        """Escribe `line` antes que nada de lo encolado y devuelve un Future con los s hasta la línea.
+
+        Descarta el movimiento en cola, cancela (`Preempted`) los comandos aún no
+        escritos y descarta el movimiento nuevo hasta `resume()`. No ocupa hueco en
+        la ventana de respuestas: el "OK OFF" llega como línea no solicitada.
+        """
+        t0 = time.perf_counter()
+        line = line.strip()
+        done = Future()
+        dropped = []
+
+        def on_wire(t1):
+            if math.isnan(t1):
+                self._log(EVENT, f"[E-STOP] {line} no se pudo escribir")
+                done.set_exception(ConnectionError(f"E-STOP: {line} no se pudo escribir"))
+                return
+            dt = t1 - t0
+            self.estop_last, self.estop_worst = dt, max(self.estop_worst, dt)
+            _ESTOP_S.observe(dt)
+            self._log(EVENT, f"[E-STOP] {line} en la línea a los {dt*1e3:.2f} ms ({len(dropped)} envíos descartados)")
+            done.set_result(dt)
+        # primero el OFF; lo que se cancele después no puede impedir que salga
+        with self._cv:
+            self.halted = True
+            self._enqueue(PRIO_ESTOP, f"{line}\n".encode("utf-8"), label=line, on_wire=on_wire)
+            dropped.extend(self._take_queued(lambda prio: prio != PRIO_ESTOP))
+        self._settle_cancelled(dropped, Preempted("cancelado por E-STOP"))
+        return done
+
+    def drain(self, timeout=1.0):
+        """Espera a que la cola de escritura se vacíe; False si no da tiempo."""
+        deadline = time.monotonic() + timeout
+        with self._cv:
+            while self._q:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self._cv.wait(timeout=min(left, 0.005))
+        return True
+
+    def resume(self):
+        """Vuelve a aceptar movimiento tras un E-STOP."""
+        with self._cv:
+            self.halted = False
+
+    def _take_queued(self, match):
+        """Saca de la cola las entradas cuya prioridad cumple `match` (sin avisar a nadie)."""
+        with self._cv:
+            out = [it for it in self._q if match(it[0])]
+            self._q = [it for it in self._q if not match(it[0])]
+            heapq.heapify(self._q)
+            self._motion = sum(1 for it in self._q if it[0] == PRIO_MOTION)
+        return out
+
+    def _settle_cancelled(self, items, exc):
+        """NaN a los `on_wire` del movimiento descartado y `exc` a los comandos que no llegaron a salir."""
+        for it in items:
+            if it[0] == PRIO_MOTION:
+                _DROPPED.inc()
+            self._call(it[6], math.nan)
+            if it[7]: self._call(it[7][1], math.nan)
+            if it[3] is not None: self._drop(it[3], exc)
+
+    def _cancel_queued(self, match, exc):
+        out = self._take_queued(match)
+        self._settle_cancelled(out, exc)
+        return len(out)
+
+    # ---- lectura ----
+    def _reader(self):
+        buf = bytearray()
+        while not self._stop.is_set():
+            try:
+                data = self.ser.read(self.ser.in_waiting or 1)
+            except Exception as e:
+                self._fail_all(e)
+                break
+            if data:
+                buf.extend(data)
+                while True:
+                    i = buf.find(b"\n")
+                    if i < 0: break
+                    line = buf[:i].decode(errors="replace").strip()
+                    del buf[:i+1]
+                    if line:
+                        self._on_line(line)
+            self._expire()
+
+    def _on_line(self, line):
+        parts = line.split()
+        if parts and parts[0] in ("OK", "ERR") and len(parts) > 1 and (self._resolve(parts, line) or
+                                                                       self._ack(parts, line)):
+            return
+        self.unsolicited.append((time.monotonic(), line))
+        self._log("←", line)
+
+    def _resolve(self, parts, line):
+        key, arg = parts[1], (parts[2] if len(parts) > 2 else None)
+        now = time.monotonic()
+        with self._plock:
+            hit = None
+            for i, (k, a, _, _, _) in enumerate(self._pending):
+                if k == key and (a is None or a == arg):
+                    hit = i; break
+            if hit is None:
+                return False
+            lost = [self._pending.popleft() for _ in range(hit)]   # más antiguas sin respuesta
+            _, _, fut, t0, _ = self._pending.popleft()
+        for _, _, f, _, _ in lost:
+            self._slots.release()
+            if not f.done(): f.set_exception(TimeoutError("respuesta perdida"))
+        self._slots.release()
+        lat = now - t0
+        self.latencies.append(lat)
+        _REPLY_S.observe(lat)
+        self._log("←", line, lat)
+        if not fut.done(): fut.set_result(Reply(line, parts[0] == "OK", lat))
+        return True
+
+    def _ack(self, parts, line):
+        """Empareja un `OK XYZ`/`OK T` con el movimiento ASCII más antiguo que lo espera."""
+        now = time.perf_counter()
+        with self._plock:
+            hit = next((i for i, w in enumerate(self._acks) if w[0] == parts[1]), None)
+            if hit is None:
+                return False
+            lost = [self._acks.popleft() for _ in range(hit)]
+            _, t1, on_reply = self._acks.popleft()
+        for w in lost:
+            self._call(w[2], math.nan)
+        lat = now - t1
+        _ACK_S.observe(lat)
+        self._log("←", line, lat)
+        self._call(on_reply, lat)
+        return True
+
+    def _unwait(self, waiter):
+        with self._plock:
+            try:
+                self._acks.remove(waiter)
+                return True
+            except ValueError:
+                return False
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = []
+        with self._plock:
+            while self._pending and now > self._pending[0][4]:
+                expired.append(self._pending.popleft())
+            stale, limit = [], time.perf_counter() - self.timeout
+            while self._acks and self._acks[0][1] < limit:
+                stale.append(self._acks.popleft())
+        for w in stale:
+            self._call(w[2], math.nan)
+        for k, _, fut, _, _ in expired:
+            self._slots.release()
+            _TIMEOUTS.inc()
+            self._log("←", f"(sin respuesta a {k})")
+            if not fut.done(): fut.set_exception(TimeoutError(f"sin respuesta a {k}"))
+
+    def _drop(self, fut, exc):
+        """Quita `fut` de las pendientes y le pone `exc`; nada si ya se resolvió o caducó (su hueco ya se liberó)."""
+        with self._plock:
+            n = len(self._pending)
+            self._pending = deque(p for p in self._pending if p[2] is not fut)
+            if len(self._pending) == n:
+                return
+        self._slots.release()
+        if not fut.done(): fut.set_exception(exc)
+
+    def _fail_all(self, exc):
+        with self._plock:
+            pending, self._pending = list(self._pending), deque()
+            acks, self._acks = list(self._acks), deque()
+        for w in acks:
+            self._call(w[2], math.nan)
+        for _, _, fut, _, _ in pending:
+            self._slots.release()
+            if not fut.done():
+                fut.set_exception(exc)
+
+    def _log(self, direction, text, lat=None):
+        if self.sink is not None:
+            self.sink(direction, text, lat)
+        else:
+            self.log.append((direction, text, lat))
+
+    def drain_log(self):
+        """Saca y devuelve las entradas de log acumuladas (para la GUI)."""
+        out = []
+        while self.log:
+            try:
+                out.append(self.log.popleft())
+            except IndexError:
+                break
+        return out
@@ -0,0 +1,126 @@
+"""Vista en vivo de la pierna: la pose que el player está enviando, redibujada a ritmo fijo.
+
+El hilo del player solo deja cada mensaje en un `PoseTap` (un `deque` acotado:
+un `append`, sin locks ni decodificación). La GUI llama a `LiveLegView.render`
+desde un fragmento de Streamlit que se repite `LIVE_FPS` veces por segundo:
+decodifica los mensajes nuevos, actualiza los datos de las líneas de una figura
+creada una sola vez y repinta solo esas líneas sobre el fondo guardado
+(*blitting*). El coste de cada redibujo no depende del ritmo del player ni de
+lo que dure la sesión, y la memoria queda acotada por `maxlen` y `trail`.
+"""
+import itertools
+import math
+import threading
+import time
+from collections import deque
+
+from ._lazy import np
+from .kinematics import fk_xyz, ik_angles_variant, ticks_to_mech
+from .metrics import Timer, histogram
+from .plots import DPI, _figure, _leg_axes, leg_points
+from .protocol import CMD_XYZ, decode_message
+
+LIVE_FPS = 10          # redibujos por segundo como mucho, vaya el player a 20 Hz o a 400 Hz
+
+_RENDER_S = histogram("spaider_liveview_render_seconds", "Redibujo de la vista en vivo (decodificar + blit)")
+
+class PoseTap:
+    """Últimos `maxlen` mensajes enviados por el player como (nº, instante, bytes)."""
+
+    def __init__(self, maxlen=256):
+        self.frames = deque(maxlen=maxlen)
+        self._seq = itertools.count(1)
+
+    def __call__(self, data):
+        self.frames.append((next(self._seq), time.monotonic(), data))
+
+    def since(self, seq):
+        """Mensajes con número mayor que `seq` (los más antiguos pueden haberse caído del anillo)."""
+        return [f for f in list(self.frames) if f[0] > seq]
+
+def message_joints(data, L, zero, dir, knee_up=True):
+    """Ángulos mecánicos (t1, t2, t3) de la pata 0 en un mensaje del player; None si no mueve la pierna.
+
+    XYZ se resuelve con la misma rama de IK que usa el player; los ticks se
+    deshacen con ZERO/DIR. En las tramas de hexápodo se toma la pata 0.
+    """
+    msg = decode_message(data)
+    if msg is None:
+        return None
+    cmd, vals = msg
+    if cmd == CMD_XYZ:
+        return ik_angles_variant(*L, *vals, knee_up)
+    return tuple(ticks_to_mech(vals[:3], zero, dir).tolist())
+
+class LiveLegView:
+    """Figura (planta X–Y y lateral R–Z) que se crea una vez y se redibuja solo con los datos nuevos."""
+
+    def __init__(self, L, zero, dir, knee_up=True, trail=200, figsize=(8.8, 4.4)):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        self.L, self.zero, self.dir, self.knee_up = tuple(L), tuple(zero), tuple(dir), knee_up
+        self.fig = _figure(figsize=figsize, dpi=DPI)
+        self.canvas = FigureCanvasAgg(self.fig)
+        ax_top, ax_side = self.fig.subplots(1, 2)
+        L1, L2, L3 = self.L
+        _leg_axes(ax_top, L1+L2+L3, "X [mm]", "Y [mm]")
+        _leg_axes(ax_side, L2+L3, "R [mm]", "Z [mm]")
+        ax_top.set_title("Planta (X–Y)", fontsize=10); ax_side.set_title("Lateral (R–Z)", fontsize=10)
+        self.fig.tight_layout()
+        line = dict(animated=True)
+        self._top_trail, = ax_top.plot([], [], lw=1, alpha=0.5, **line)
+        self._side_trail, = ax_side.plot([], [], lw=1, alpha=0.5, **line)
+        self._top_leg, = ax_top.plot([], [], "-o", lw=4, ms=6, **line)
+        self._side_leg, = ax_side.plot([], [], "-o", lw=4, ms=6, **line)
+        self._artists = (self._top_trail, self._side_trail, self._top_leg, self._side_leg)
+        self._trail = deque(maxlen=trail)      # pie (x, y, r, z) de cada mensaje decodificado
+        self._seq = 0
+        self.joints = None                     # última pose dibujada (grados mecánicos); el texto lo pone la GUI
+        self._last_t = None
+        self._bg = None
+        self._image = None
+        self._lock = threading.Lock()          # la vista puede compartirse entre pestañas del navegador
+        self.frames = 0                        # mensajes decodificados
+        self.redraws = 0
+
+    def _feed(self, frames):
+        L1, L2, L3 = self.L
+        joints = None
+        for seq, t, data in frames:
+            self._seq = seq
+            q = message_joints(data, self.L, self.zero, self.dir, self.knee_up)
+            if q is None:
+                continue
+            x, y, z = fk_xyz(L1, L2, L3, *q)
+            self._trail.append((x, y, math.hypot(x, y) - L1, z))
+            joints, self._last_t = q, t
+            self.frames += 1
+        return joints
+
+    def render(self, tap):
+        """Imagen RGBA (array) con la última pose de `tap`; la anterior si no hay mensajes nuevos."""
+        with self._lock, Timer(_RENDER_S):
+            joints = self._feed(tap.since(self._seq))
+            if joints is None and self._image is not None:
+                return self._image
+            if joints is not None:
+                (xs, ys), (rs, zs) = leg_points(*self.L, *joints)
+                self._top_leg.set_data(xs, ys)
+                self._side_leg.set_data(rs, zs)
+                tr = np.asarray(self._trail)
+                self._top_trail.set_data(tr[:, 0], tr[:, 1])
+                self._side_trail.set_data(tr[:, 2], tr[:, 3])
+                self.joints = joints
+            if self._bg is None:
+                self.canvas.draw()                 # ejes y rejilla una sola vez (las líneas son `animated`)
+                self._bg = self.canvas.copy_from_bbox(self.fig.bbox)
+            else:
+                self.canvas.restore_region(self._bg)
+            for a in self._artists:
+                a.axes.draw_artist(a)
+            self._image = np.asarray(self.canvas.buffer_rgba()).copy()
+            self.redraws += 1
+            return self._image
+
+    def age(self):
+        """s desde el último mensaje dibujado (None si aún no hay ninguno)."""
+        return None if self._last_t is None else time.monotonic() - self._last_t
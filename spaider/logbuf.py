@@ -0,0 +1,179 @@
+"""Log estructurado en anillo de capacidad fija, con volcado a NDJSON rotativo.
+
+Cada entrada es un `Record` (instante monotónico, dirección, comando, texto y
+latencia). Escriben a la vez el hilo del player, el lector del enlace y la GUI;
+la memoria no crece aunque el robot ande horas: el anillo guarda las últimas
+`capacity` entradas y, si hay `path`, un hilo aparte las vuelca al disco en
+ficheros que rotan al pasar de `max_bytes` (log.ndjson, log.ndjson.1, …).
+`tail_ndjson` lee las últimas líneas desde el final del fichero sin recorrerlo.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+Record = namedtuple("Record", "seq t direction cmd text lat")
+
+# dirección: "→" enviado, "←" recibido, "·" evento local
+EVENT = "·"
+
+def _cmd_of(text):
+    """Comando de una línea de log: la etiqueta `[TAG]` o la primera palabra."""
+    text = text.strip()
+    if text.startswith("["):
+        end = text.find("]")
+        if end > 0:
+            return text[1:end]
+    return text.split(None, 1)[0].upper() if text else ""
+
+def format_record(r, t0=None):
+    """Línea legible para la pestaña Log."""
+    lat = f"  ({r.lat*1e3:.1f} ms)" if r.lat is not None else ""
+    when = f"{r.t - t0:9.3f} " if t0 is not None else ""
+    return f"{when}{r.direction} {r.text}{lat}"
+
+class RotatingNDJSON:
+    """Fichero NDJSON que rota a `path.1 … path.<backups>` al pasar de `max_bytes`."""
+
+    def __init__(self, path, max_bytes=8 << 20, backups=3):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.backups = int(backups)
+        self._f = open(path, "a", encoding="utf-8")
+
+    def write(self, lines):
+        data = "".join(lines)
+        size = len(data.encode("utf-8"))          # `max_bytes` son bytes; "→"/"←" ocupan 3
+        if self._f.tell() + size > self.max_bytes and self._f.tell() > 0:
+            self.rotate()
+        self._f.write(data)
+        self._f.flush()
+
+    def rotate(self):
+        self._f.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._f = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        self._f.close()
+
+class RingLog:
+    """Anillo thread-safe de `Record` con volcado opcional a disco.
+
+    - `add(direction, text, lat, cmd)`: entrada estructurada (cmd sale del texto si no se da).
+    - `append(text)`: evento local, para los mensajes de la GUI.
+    - `tail(n)` / `since(seq)`: lectura sin vaciar el anillo.
+    El volcado lo hace un hilo cada `flush_interval` s: quien escribe nunca espera al disco.
+    """
+
+    def __init__(self, capacity=4096, path=None, max_bytes=8 << 20, backups=3,
+                 flush_interval=1.0, clock=time.monotonic):
+        self.capacity = int(capacity)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._ring = deque(maxlen=self.capacity)
+        self._seq = 0
+        self._pending = deque()                  # entradas aún no volcadas (acotado como el anillo)
+        self.dropped = 0                         # entradas que no llegaron al disco por ir lento
+        self._wall0 = time.time() - clock()      # para pasar el instante monotónico a hora real
+        self._writer = RotatingNDJSON(path, max_bytes, backups) if path else None
+        self._wlock = threading.Lock()           # un solo volcado a la vez (hilo o flush() explícito)
+        self._stop = threading.Event()
+        self._thread = None
+        if self._writer is not None:
+            self.flush_interval = flush_interval
+            self._thread = threading.Thread(target=self._flusher, name="spaider-log-writer", daemon=True)
+            self._thread.start()
+
+    def add(self, direction, text, lat=None, cmd=None):
+        t = self.clock()
+        with self._lock:
+            self._seq += 1
+            r = Record(self._seq, t, direction, cmd if cmd is not None else _cmd_of(text), text, lat)
+            self._ring.append(r)
+            if self._writer is not None:
+                if len(self._pending) >= self.capacity:
+                    self._pending.popleft(); self.dropped += 1
+                self._pending.append(r)
+        return r
+
+    def append(self, text):
+        return self.add(EVENT, text)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ring)
+
+    @property
+    def seq(self):
+        with self._lock:
+            return self._seq
+
+    def tail(self, n=400, skip_cmds=()):
+        """Últimas `n` entradas (las de `skip_cmds` no cuentan)."""
+        with self._lock:
+            recs = list(self._ring)
+        if skip_cmds:
+            recs = [r for r in recs if r.cmd not in skip_cmds]
+        return recs[-n:] if n else []
+
+    def since(self, seq):
+        """Entradas con número de secuencia mayor que `seq` (las que sigan en el anillo)."""
+        with self._lock:
+            return [r for r in self._ring if r.seq > seq]
+
+    # ---- disco ----
+    def _to_json(self, r):
+        return json.dumps({"seq": r.seq, "t": round(r.t, 6), "ts": round(self._wall0 + r.t, 3),
+                           "dir": r.direction, "cmd": r.cmd, "text": r.text,
+                           "lat": None if r.lat is None else round(r.lat, 6)}, ensure_ascii=False) + "\n"
+
+    def flush(self):
+        if self._writer is None: return
+        with self._wlock:
+            with self._lock:
+                batch, self._pending = list(self._pending), deque()
+            if batch:
+                self._writer.write([self._to_json(r) for r in batch])
+
+    def _flusher(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+
+def tail_ndjson(path, n=100, block=8192):
+    """Últimos `n` registros (dicts) de un NDJSON, leyendo bloques desde el final."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        while pos > 0 and data.count(b"\n") <= n:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.splitlines()
+    if pos > 0:
+        lines = lines[1:]                          # la primera puede estar cortada
+    out = []
+    for line in lines[-n:] if n else []:
+        try:
+            out.append(json.loads(line))
+        except ValueError:
+            pass                                   # línea a medio escribir
+    return out
@@ -0,0 +1,297 @@
+"""IK en punto fijo para el sketch: genera `ik_lut.h` y lo comprueba en el host.
+
+    python -m spaider.lutgen                     # escribe spAiderArduino/ik_lut.h (L1/L2/L3 del sketch)
+    python -m spaider.lutgen --check             # error frente a ik_angles_variant; código 1 si se pasa
+    python -m spaider.lutgen --check --cxx c++   # además compila el .h y exige los mismos enteros que aquí
+
+En un AVR sin FPU, `legIK` en float (atan2, acos, sqrt, sin, cos) se come
+buena parte del tick. Aquí todo es entero: raíz cuadrada por bits y `atan2`
+con una tabla de atan en [0, 1] (interpolada) más reducción al octante. El
+codo se saca por el ángulo mitad, tan(θ3/2) = √(((L2+L3)² − d²) / (d² − (L2−L3)²)),
+que no pierde precisión cerca de la pierna estirada como acos(D); el ángulo
+entre el fémur y la recta cadera–pie, con Herón: atan2(√(lejos·cerca), d² + L2² − L3²).
+
+Entradas en décimas de mm (las de las tramas XYZ) y ángulos mecánicos en
+centésimas de grado: con un tick del PCA9685 ≈ 0,5°, el error (~0,03° con la geometría por defecto) no se ve.
+Las funciones de aquí repiten la aritmética del .h entero a entero (`ik_fixed`).
+"""
+import argparse
+import math
+import os
+import subprocess
+import sys
+import tempfile
+from collections import namedtuple
+
+from ._lazy import np
+from .kinematics import DEFAULT_L, SAFE_MIN, SAFE_MAX, fk_batch, ik_angles_variant
+
+HEADER_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "spAiderArduino", "ik_lut.h")
+ATAN_BITS = 8          # 256 tramos de atan en [0, 1]
+FRAC_BITS = 7          # bits de interpolación dentro de un tramo (cociente en Q15)
+ANGLE_SCALE = 100      # centésimas de grado
+DIST_SCALE = 10        # décimas de mm
+MAX_SHIFT = 4
+TOLERANCE = 0.05       # ° de error máximo admitido en --check
+
+IKFixed = namedtuple("IKFixed", "L1 L2 L3 max_coord r_shift s_shift")
+IKFixed.__doc__ = """Parámetros del .h: longitudes en décimas de mm, |x|,|y|,|z| máximos que acepta
+y los desplazamientos de subpíxel de la distancia (r_shift) y de las raíces del codo (s_shift)."""
+
+IKCheck = namedtuple("IKCheck", "n err worst")   # puntos, error máx. por articulación (°), (x, y, z) del peor
+
+def fixed_params(L1, L2, L3):
+    """Mayor precisión que cabe en 32 bits para esta geometría; ValueError si la pierna es demasiado larga."""
+    L1, L2, L3 = (int(round(v * DIST_SCALE)) for v in (L1, L2, L3))
+    C = L1 + L2 + L3
+    for r in range(MAX_SHIFT, -1, -1):
+        if 3*C*C << 2*r >= 1 << 32:                                  # x² + y² y d² en uint32
+            continue
+        dmax2, dmin2 = (L2 + L3)**2 << 2*r, (L2 - L3)**2 << 2*r
+        for s in range(MAX_SHIFT, -1, -1):
+            if ((dmax2 - dmin2) << 2*s) >= 1 << 32:
+                continue
+            if ((dmax2 - dmin2) // 2 << 2*s) >= 1 << 31:              # n·m ≤ 4^s·(lejos + cerca)/2
+                continue
+            if ((dmax2 + abs(L2*L2 - L3*L3 << 2*r)) << 2*s) >= 1 << 31:
+                continue
+            return IKFixed(L1, L2, L3, C, r, s)
+    raise ValueError(f"geometría demasiado grande para IK en 32 bits: L1+L2+L3 = {C/DIST_SCALE:g} mm")
+
+def atan_lut():
+    """atan(i / 2^ATAN_BITS) en centésimas de grado, i = 0 … 2^ATAN_BITS."""
+    u = np.arange((1 << ATAN_BITS) + 1) / (1 << ATAN_BITS)
+    return np.rint(np.degrees(np.arctan(u)) * ANGLE_SCALE).astype(np.int64)
+
+# ---- espejo entero del .h (arrays int64, mismos redondeos que en C) ----
+def isqrt(v):
+    """ik_isqrt(): raíz entera redondeada al más cercano."""
+    v = np.asarray(v, dtype=np.int64)
+    r = np.floor(np.sqrt(v.astype(float))).astype(np.int64)
+    r -= r*r > v
+    r += (r + 1)*(r + 1) <= v
+    return r + (v - r*r > r)
+
+def atan2_cd(y, x, lut=None):
+    """ik_atan2_cd(): atan2 en centésimas de grado con la tabla."""
+    lut = atan_lut() if lut is None else lut
+    y = np.asarray(y, dtype=np.int64); x = np.asarray(x, dtype=np.int64)
+    ax, ay = np.abs(x), np.abs(y)
+    lo, hi = np.minimum(ax, ay), np.maximum(ax, ay)
+    while (hi >= 1 << 15).any():
+        big = hi >= 1 << 15
+        hi = np.where(big, hi >> 1, hi); lo = np.where(big, lo >> 1, lo)
+    q = (lo << 15) // np.maximum(hi, 1)
+    i, f = q >> FRAC_BITS, q & ((1 << FRAC_BITS) - 1)
+    nxt = lut[np.minimum(i + 1, len(lut) - 1)]
+    a = lut[i] + np.where(f > 0, ((nxt - lut[i]) * f + (1 << FRAC_BITS - 1)) >> FRAC_BITS, 0)
+    a = np.where(ay > ax, 90*ANGLE_SCALE - a, a)
+    a = np.where(x < 0, 180*ANGLE_SCALE - a, a)
+    a = np.where(y < 0, -a, a)
+    return np.where(hi == 0, 0, a)
+
+def ik_fixed(p, x, y, z, lut=None):
+    """ik_leg_cd(): (cx, fm, tb) en centésimas de grado para x, y, z enteros en décimas de mm."""
+    lut = atan_lut() if lut is None else lut
+    x = np.asarray(x, dtype=np.int64); y = np.asarray(y, dtype=np.int64); z = np.asarray(z, dtype=np.int64)
+    big = np.maximum(np.maximum(np.abs(x), np.abs(y)), np.abs(z))
+    far = big > p.max_coord                      # se acerca al origen en la misma dirección (división de C: trunca)
+    x, y, z = (np.where(far, np.sign(v) * (np.abs(v) * p.max_coord // np.maximum(big, 1)), v) for v in (x, y, z))
+    R, S = 2*p.r_shift, 2*p.s_shift
+    dmax2, dmin2 = (p.L2 + p.L3)**2 << R, (p.L2 - p.L3)**2 << R
+    cx = atan2_cd(y, x, lut)
+    r = np.maximum(isqrt((x*x + y*y) << R) - (p.L1 << p.r_shift), 0)
+    zs = z << p.r_shift
+    d2 = np.minimum(r*r + zs*zs, dmax2)
+    n, m = isqrt((dmax2 - d2) << S), isqrt(np.maximum(d2 - dmin2, 0) << S)
+    tb = 2 * atan2_cd(n, m, lut)
+    alpha = atan2_cd(n*m, (d2 + (p.L2*p.L2 - p.L3*p.L3 << R)) << S, lut)
+    fm = atan2_cd(zs, r, lut) - alpha
+    return cx, fm, tb
+
+# ---- comprobación ----
+def workspace_points(L1, L2, L3, safe_min=SAFE_MIN, safe_max=SAFE_MAX, n=41):
+    """Pies alcanzables (décimas de mm, enteros) barriendo las tres articulaciones dentro de sus límites."""
+    grids = [np.linspace(lo, hi, n) for lo, hi in zip(safe_min, safe_max)]
+    t1, t2, t3 = (g.ravel() for g in np.meshgrid(*grids, indexing="ij"))
+    x, y, z = fk_batch(L1, L2, L3, t1, t2, t3)
+    pts = np.rint(np.stack([x, y, z], axis=1) * DIST_SCALE).astype(np.int64)
+    return np.unique(pts, axis=0)
+
+def check(L1, L2, L3, safe_min=SAFE_MIN, safe_max=SAFE_MAX, n=41, p=None):
+    """Error máximo (°) de `ik_fixed` frente a `ik_angles_variant` (codo arriba) en todo el workspace."""
+    p = p or fixed_params(L1, L2, L3)
+    pts = workspace_points(L1, L2, L3, safe_min, safe_max, n)
+    cx, fm, tb = ik_fixed(p, *pts.T)
+    ref = np.array([ik_angles_variant(p.L1 / DIST_SCALE, p.L2 / DIST_SCALE, p.L3 / DIST_SCALE,
+                                      *(v / DIST_SCALE for v in pt), knee_up=True) for pt in pts])
+    got = np.stack([cx, fm, tb], axis=1) / ANGLE_SCALE
+    err = np.abs((got - ref + 180.0) % 360.0 - 180.0)
+    worst = pts[int(np.argmax(err.max(axis=1)))] / DIST_SCALE
+    return IKCheck(len(pts), err.max(axis=0), tuple(worst.tolist()))
+
+def check_compiled(p, header, pts, cxx="c++"):
+    """Compila `header` con el compilador del host y devuelve las filas que no dan los mismos enteros."""
+    harness = ('#include <cstdio>\n#include "ik_lut.h"\nint main(){ int x, y, z; int16_t a = 0, b = 0, c = 0;\n'
+               ' while (scanf("%d %d %d", &x, &y, &z) == 3){ ik_leg_cd(x, y, z, a, b, c);\n'
+               '  printf("%d %d %d\\n", a, b, c); } }\n')
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "ik_lut.h"), "w", encoding="utf-8") as f:
+            f.write(header)
+        with open(os.path.join(tmp, "main.cpp"), "w", encoding="utf-8") as f:
+            f.write(harness)
+        exe = os.path.join(tmp, "ik")
+        subprocess.run([cxx, "-O2", "-Wall", "-Werror", "-o", exe, os.path.join(tmp, "main.cpp")], check=True)
+        out = subprocess.run([exe], input="\n".join(f"{x} {y} {z}" for x, y, z in pts),
+                             capture_output=True, text=True, check=True).stdout
+    got = np.array([[int(v) for v in line.split()] for line in out.splitlines()], dtype=np.int64)
+    want = np.stack(ik_fixed(p, *np.asarray(pts).T), axis=1)
+    return np.flatnonzero((got != want).any(axis=1))
+
+# ---- cabecera C ----
+def _c_array(vals, per_line=12):
+    rows = [", ".join(f"{int(v)}" for v in vals[i:i+per_line]) for i in range(0, len(vals), per_line)]
+    return ",\n  ".join(rows)
+
+def _defines(p):
+    R = 2*p.r_shift
+    rows = [("IK_L1_MM", f"{p.L1 / DIST_SCALE:.1f}f", "geometría con la que se generó (mm)"),
+            ("IK_L2_MM", f"{p.L2 / DIST_SCALE:.1f}f", ""),
+            ("IK_L3_MM", f"{p.L3 / DIST_SCALE:.1f}f", ""),
+            ("IK_MAX_COORD", p.max_coord, "L1+L2+L3: |x|, |y|, |z| máximos (décimas de mm)"),
+            ("IK_R_SHIFT", p.r_shift, "distancias en 1/2^IK_R_SHIFT décimas de mm"),
+            ("IK_S_SHIFT", p.s_shift, "bits extra en las raíces del codo"),
+            ("IK_L1_S", f"{p.L1 << p.r_shift}L", "L1"),
+            ("IK_DMAX2", f"{(p.L2 + p.L3)**2 << R}UL", "(L2+L3)²"),
+            ("IK_DMIN2", f"{(p.L2 - p.L3)**2 << R}UL", "(L2-L3)²"),
+            ("IK_L2L3", f"({p.L2*p.L2 - p.L3*p.L3 << R}L)", "L2² - L3²")]
+    return "\n".join(f"{f'#define {k} {v}':<36}// {c}".rstrip(" /") for k, v, c in rows)
+
+def header(p, safe_min=SAFE_MIN, safe_max=SAFE_MAX, result=None):
+    """Texto de `ik_lut.h` para los parámetros `p`."""
+    lut = atan_lut()
+    L = "/".join(f"{v / DIST_SCALE:g}" for v in (p.L1, p.L2, p.L3))
+    note = ""
+    if result is not None:
+        note = (f"\n// Error máx. frente a ik_angles_variant en {result.n} puntos del workspace: "
+                + ", ".join(f"{j} {e:.3f}°" for j, e in zip(("coxa", "fémur", "tibia"), result.err)) + ".")
+    return f"""// Generado por spaider/lutgen.py: no editar a mano (python -m spaider.lutgen).
+// IK de la pierna en punto fijo para L1/L2/L3 = {L} mm, límites {list(safe_min)}–{list(safe_max)}°.{note}
+// Entradas en décimas de mm; ángulos mecánicos en centésimas de grado (rama codo arriba, como legIK).
+#pragma once
+#include <stdint.h>
+#if defined(__AVR__)
+#include <avr/pgmspace.h>
+#define IK_LUT(i) ((int16_t)pgm_read_word(&IK_ATAN_LUT[i]))
+#else
+#define PROGMEM
+#define IK_LUT(i) (IK_ATAN_LUT[i])
+#endif
+
+{_defines(p)}
+
+// atan(i/{1 << ATAN_BITS}) en centésimas de grado, i = 0..{1 << ATAN_BITS}
+static const int16_t IK_ATAN_LUT[{len(lut)}] PROGMEM = {{
+  {_c_array(lut)}
+}};
+
+// raíz cuadrada entera, redondeada
+static inline uint32_t ik_isqrt(uint32_t v){{
+  uint32_t r = 0, bit = 1UL << 30;
+  while (bit > v) bit >>= 2;
+  while (bit){{
+    if (v >= r + bit){{ v -= r + bit; r = (r >> 1) + bit; }}
+    else r >>= 1;
+    bit >>= 2;
+  }}
+  return v > r ? r + 1 : r;   // v es ahora el resto: n - r²
+}}
+
+// atan2 en centésimas de grado (-18000..18000)
+static inline int16_t ik_atan2_cd(int32_t y, int32_t x){{
+  uint32_t ax = x < 0 ? -(uint32_t)x : (uint32_t)x, ay = y < 0 ? -(uint32_t)y : (uint32_t)y;
+  uint32_t lo = ax < ay ? ax : ay, hi = ax < ay ? ay : ax;
+  if (hi == 0) return 0;
+  while (hi >= (1UL << 15)){{ hi >>= 1; lo >>= 1; }}
+  uint16_t q = (uint16_t)((lo << 15) / hi);        // lo/hi en Q15
+  uint16_t i = q >> {FRAC_BITS}, f = q & {(1 << FRAC_BITS) - 1};
+  int16_t a = IK_LUT(i);
+  if (f) a += (int16_t)(((int32_t)(IK_LUT(i + 1) - a) * f + {1 << FRAC_BITS - 1}) >> {FRAC_BITS});
+  if (ay > ax) a = {90*ANGLE_SCALE} - a;
+  if (x < 0) a = {180*ANGLE_SCALE} - a;
+  return y < 0 ? -a : a;
+}}
+
+// Siempre da ángulos, como legIK. Si |x|, |y| o |z| pasa de IK_MAX_COORD, el punto se acerca al
+// origen en la misma dirección hasta que la mayor vale ±IK_MAX_COORD (sigue fuera de alcance);
+// fuera de alcance la pierna sale estirada hacia el punto, ya acercado (d² saturado a (L2+L3)²).
+static inline void ik_leg_cd(int16_t x, int16_t y, int16_t z, int16_t &cx, int16_t &fm, int16_t &tb){{
+  int32_t ax = x < 0 ? -(int32_t)x : x, ay = y < 0 ? -(int32_t)y : y, az = z < 0 ? -(int32_t)z : z;
+  int32_t big = ax > ay ? ax : ay; if (az > big) big = az;
+  if (big > IK_MAX_COORD){{
+    x = (int16_t)((int32_t)x * IK_MAX_COORD / big); y = (int16_t)((int32_t)y * IK_MAX_COORD / big);
+    z = (int16_t)((int32_t)z * IK_MAX_COORD / big);
+  }}
+  cx = ik_atan2_cd(y, x);
+  int32_t r = (int32_t)ik_isqrt((uint32_t)((int32_t)x*x + (int32_t)y*y) << (2*IK_R_SHIFT)) - IK_L1_S;
+  if (r < 0) r = 0;
+  int32_t zs = (int32_t)z << IK_R_SHIFT;
+  uint32_t d2 = (uint32_t)r*(uint32_t)r + (uint32_t)zs*(uint32_t)zs;
+  if (d2 > IK_DMAX2) d2 = IK_DMAX2;
+  uint32_t n = ik_isqrt((IK_DMAX2 - d2) << (2*IK_S_SHIFT));                    // ∝ √((L2+L3)² - d²)
+  uint32_t m = ik_isqrt((d2 > IK_DMIN2 ? d2 - IK_DMIN2 : 0) << (2*IK_S_SHIFT)); // ∝ √(d² - (L2-L3)²)
+  tb = 2 * ik_atan2_cd(n, m);                                                   // tan(θ3/2) = n/m
+  int16_t alpha = ik_atan2_cd(n*m, ((int32_t)d2 + IK_L2L3) << (2*IK_S_SHIFT));
+  fm = ik_atan2_cd(zs, r) - alpha;
+}}
+"""
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m spaider.lutgen", description=__doc__.splitlines()[0])
+    ap.add_argument("--L", nargs=3, type=float, metavar=("L1", "L2", "L3"),
+                    default=(DEFAULT_L["L1"], DEFAULT_L["L2"], DEFAULT_L["L3"]), help="mm")
+    ap.add_argument("--min", nargs=3, type=float, default=SAFE_MIN, help="límites mecánicos (°)")
+    ap.add_argument("--max", nargs=3, type=float, default=SAFE_MAX)
+    ap.add_argument("--out", default=HEADER_FILE)
+    ap.add_argument("--check", action="store_true", help="no escribe: compara con el .h de --out")
+    ap.add_argument("--grid", type=int, default=41, help="muestras por articulación al barrer el workspace")
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE, help="° (por defecto %(default)s)")
+    ap.add_argument("--cxx", help="compilador C++ para probar el .h en el host (p. ej. c++)")
+    args = ap.parse_args(argv)
+
+    try:
+        p = fixed_params(*args.L)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    res = check(*args.L, args.min, args.max, args.grid, p)
+    text = header(p, args.min, args.max, res)
+    print(f"{res.n} puntos: error máx. coxa {res.err[0]:.4f}°, fémur {res.err[1]:.4f}°, "
+          f"tibia {res.err[2]:.4f}° (peor en {res.worst} mm; R={p.r_shift}, S={p.s_shift})")
+    status = 0
+    if not math.isfinite(res.err.max()) or res.err.max() > args.tolerance:
+        print(f"ERROR: supera la tolerancia de {args.tolerance}°")
+        status = 1
+    if args.cxx:
+        pts = workspace_points(*args.L, args.min, args.max, args.grid)
+        bad = check_compiled(p, text, pts, args.cxx)
+        print(f"{args.cxx}: {len(pts) - len(bad)}/{len(pts)} puntos idénticos al espejo en Python")
+        status = status or (1 if len(bad) else 0)
+    if args.check:
+        try:
+            with open(args.out, encoding="utf-8") as f:
+                stale = f.read() != text
+        except FileNotFoundError:
+            stale = True
+        if stale:
+            print(f"{args.out} no corresponde a esta geometría; regenera con python -m spaider.lutgen")
+            status = status or 1
+    elif status == 0:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"Escrito {args.out}")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Memoización LRU acotada para los cálculos puros (sobrevive a los reruns de Streamlit).
+
+Cada función decorada con `memoize` tiene su propia caché con contadores de
+aciertos/fallos; `stats()` los reúne todos para mostrarlos en la GUI.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+_REGISTRY = {}
+
+def _freeze(v):
+    """Convierte argumentos numéricos a una clave hashable (listas→tuplas, NumPy→Python)."""
+    if isinstance(v, (list, tuple)):
+        return tuple(_freeze(x) for x in v)
+    np = sys.modules.get("numpy")          # sin NumPy cargado no puede haber arrays
+    if np is not None:
+        if isinstance(v, np.ndarray):
+            return (v.dtype.str, v.shape, v.tobytes())
+        if isinstance(v, np.generic):
+            return v.item()
+    return v
+
+class LRUMemo:
+    """Caché LRU thread-safe con contadores."""
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        value = compute()          # fuera del lock: dos hilos pueden calcular lo mismo, no pasa nada
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self._data), "maxsize": self.maxsize}
+
+def memoize(maxsize=32, name=None):
+    """Decorador: memoiza por valor de los argumentos con expulsión LRU."""
+    def deco(fn):
+        memo = LRUMemo(maxsize)
+        key_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+        _REGISTRY[key_name] = memo
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (_freeze(args), _freeze(tuple(sorted(kwargs.items()))))
+            return memo.get(key, lambda: fn(*args, **kwargs))
+        wrapper.memo = memo
+        return wrapper
+    return deco
+
+def stats():
+    """{nombre: {hits, misses, size, maxsize}} de todas las cachés registradas."""
+    return {k: m.info() for k, m in _REGISTRY.items()}
+
+def clear_all():
+    for m in _REGISTRY.values():
+        m.clear()
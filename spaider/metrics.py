@@ -0,0 +1,223 @@
+"""Contadores e histogramas de latencia para el bucle de control y la GUI.
+
+Todo vive en un registro de proceso (como las cachés de `memo`): el enlace, el
+scheduler, el preflight o la GUI piden su métrica por nombre y etiquetas, y la
+pestaña Métricas o un exportador la leen sin saber quién la alimenta.
+
+    with timed("spaider_ui_tab_seconds", tab="Log"): ...
+    @timed("spaider_preflight_seconds")
+    def preflight_traj(...): ...
+
+`to_prometheus()` da el formato de texto de Prometheus (histogramas con cubos
+acumulados) y `write_prometheus(path)` lo deja en un fichero de forma atómica,
+para el colector "textfile" de node_exporter.
+"""
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+from ._lazy import np
+
+# cubos (s) de 10 µs a 10 s, aproximadamente ×2.5
+DEFAULT_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Counter:
+    def __init__(self, name, labels, help=""):
+        self.name, self.labels, self.help = name, labels, help
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, n=1):
+        with self._lock:
+            self.value += n
+
+    def reset(self):
+        with self._lock:
+            self.value = 0.0
+
+    def snapshot(self):
+        return {"value": self.value}
+
+class Histogram:
+    """Cubos fijos (para Prometheus) + ventana de las últimas `window` muestras (para percentiles)."""
+
+    def __init__(self, name, labels, help="", buckets=DEFAULT_BUCKETS, window=2048):
+        self.name, self.labels, self.help = name, labels, help
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)     # el último es +Inf
+        self._recent = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, v):
+        i = bisect.bisect_left(self.buckets, v)
+        with self._lock:
+            self._counts[i] += 1
+            self._recent.append(v)
+            self.count += 1
+            self.sum += v
+            if v > self.max: self.max = v
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._recent.clear()
+            self.count, self.sum, self.max = 0, 0.0, 0.0
+
+    def snapshot(self):
+        with self._lock:
+            counts, recent = list(self._counts), np.fromiter(self._recent, dtype=float)
+            count, total, vmax = self.count, self.sum, self.max
+        out = {"count": count, "sum": total, "mean": total / count if count else 0.0, "max": vmax,
+               "buckets": dict(zip([*map(str, self.buckets), "+Inf"], np.cumsum(counts).tolist()))}
+        if len(recent):
+            p50, p95, p99 = np.percentile(recent, [50, 95, 99]).tolist()
+            out.update(p50=p50, p95=p95, p99=p99)
+        return out
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}                       # (nombre, etiquetas) → métrica
+        self.t0 = time.time()
+
+    def _get(self, cls, name, labels, **kw):
+        key = (name, tuple(sorted(labels.items())))
+        m = self._metrics.get(key)
+        if m is None:
+            with self._lock:
+                m = self._metrics.setdefault(key, cls(name, key[1], **kw))
+        if not isinstance(m, cls):
+            raise TypeError(f"{name} ya existe como {type(m).__name__}")
+        return m
+
+    def counter(self, name, help="", **labels):
+        return self._get(Counter, name, labels, help=help)
+
+    def histogram(self, name, help="", buckets=DEFAULT_BUCKETS, **labels):
+        return self._get(Histogram, name, labels, help=help, buckets=buckets)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def reset(self):
+        """Pone todo a cero (las métricas siguen registradas: los módulos guardan referencias)."""
+        for m in self.metrics():
+            m.reset()
+        self.t0 = time.time()
+
+    def snapshot(self):
+        """{"counters": [...], "histograms": [...]} con nombre, etiquetas y valores."""
+        out = {"time": time.time(), "since": self.t0, "counters": [], "histograms": []}
+        for m in self.metrics():
+            entry = {"name": m.name, "labels": dict(m.labels), **m.snapshot()}
+            out["counters" if isinstance(m, Counter) else "histograms"].append(entry)
+        return out
+
+    def to_json(self, **kw):
+        return json.dumps(self.snapshot(), **kw)
+
+    def to_prometheus(self):
+        lines, seen = [], set()
+        for m in sorted(self.metrics(), key=lambda m: (m.name, m.labels)):
+            kind = "counter" if isinstance(m, Counter) else "histogram"
+            if m.name not in seen:
+                seen.add(m.name)
+                if m.help: lines.append(f"# HELP {m.name} {m.help}")
+                lines.append(f"# TYPE {m.name} {kind}")
+            snap = m.snapshot()
+            if kind == "counter":
+                lines.append(f"{m.name}{_labels(m.labels)} {_num(snap['value'])}")
+                continue
+            for le, n in snap["buckets"].items():
+                lines.append(f"{m.name}_bucket{_labels(m.labels + (('le', le),))} {n}")
+            lines.append(f"{m.name}_sum{_labels(m.labels)} {_num(snap['sum'])}")
+            lines.append(f"{m.name}_count{_labels(m.labels)} {snap['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Escribe `to_prometheus()` en `path` (fichero temporal + rename: nunca se lee a medias)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels):
+    if not labels: return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+def _num(v):
+    return repr(float(v)) if math.isfinite(v) else ("+Inf" if v > 0 else "NaN")
+
+REGISTRY = Registry()
+
+def counter(name, help="", **labels):
+    return REGISTRY.counter(name, help, **labels)
+
+def histogram(name, help="", **labels):
+    return REGISTRY.histogram(name, help, **labels)
+
+class Timer:
+    """Mide la duración (s) en un histograma: como `with` (una vez por bloque) o como decorador."""
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self._t0)
+        return False
+
+    def __call__(self, fn):
+        hist = self.hist
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.observe(time.perf_counter() - t0)
+        return wrapper
+
+def timed(name, help="", **labels):
+    """`Timer` sobre el histograma `name` del registro global."""
+    return Timer(REGISTRY.histogram(name, help, **labels))
+
+class PrometheusExporter:
+    """Hilo que reescribe el fichero de Prometheus cada `interval` s."""
+
+    def __init__(self, path, interval=10.0, registry=REGISTRY):
+        self.path, self.interval, self.registry = path, interval, registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="spaider-metrics-exporter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.registry.write_prometheus(self.path)
+            except OSError:
+                pass                                 # disco lleno o ruta quitada: se reintenta
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2.0)
@@ -0,0 +1,147 @@
+"""Player sin UI: conexión, negociación del protocolo y envío del ciclo tick a tick en un hilo.
+
+Lo usan la pestaña Player de la GUI y `spaider play`. Nada de aquí toca
+Streamlit: el hilo se para con un `threading.Event` y deja su rastro en un
+`RingLog`. El ciclo se reproduce por tiempo (`CycleSampler` o `GaitStream`) y
+cada fila se codifica con `frame_encoder` justo antes de escribirla.
+"""
+import math
+import threading
+import time
+
+from ._lazy import np
+from .emulator import EMU_PORT, EmulatedSerial
+from .kinematics import ticks_table
+from .logbuf import EVENT
+from .metrics import Timer, histogram
+from .protocol import (FRAME_START, HELLO_BIN, message_cmd, parse_hello_bin,
+                       xyz_frames, ticks_frames, hex_ticks_frames)
+from .scheduler import DeadlineScheduler
+
+_FRAME_S = histogram("spaider_player_frame_seconds", "Cálculo y codificación de la trama de un tick")
+
+# ---- conexión ----
+def open_serial(port, baud=115200, timeout=0.2):
+    """Puerto tipo pyserial: el firmware emulado con EMU_PORT o uno real (pyserial se importa aquí)."""
+    if port == EMU_PORT:
+        return EmulatedSerial(baudrate=baud, timeout=timeout)
+    import serial
+    ser = serial.Serial(port, baudrate=baud, timeout=timeout)
+    time.sleep(2.0)  # auto-reset UNO
+    return ser
+
+def negotiate_binary(link, timeout=1.0):
+    """("bin", capacidad del buffer) si el sketch acepta HELLO BIN; si no, ("ascii", 0)."""
+    hello = parse_hello_bin(link.send(HELLO_BIN).result(timeout=timeout).line)
+    return ("bin", hello[1]) if hello else ("ascii", 0)
+
+# ---- filas → tramas ----
+def frame_encoder(kind, binary=True):
+    """Función fila → bytes: "xyz" (mm, redondeado a 0,1), "ticks" (3 ticks) o "hex" (18 ticks)."""
+    if kind == "xyz":
+        return lambda row: xyz_frames(*([round(float(v), 1)] for v in row), binary)[0]
+    if kind == "ticks":
+        return lambda row: ticks_frames(np.rint(row).astype(int)[None], binary)[0]
+    if kind == "hex":
+        return lambda row: hex_ticks_frames(np.rint(row)[None])[0]
+    raise ValueError(f"tipo de trama desconocido: {kind}")
+
+def leg_table(L, x_traj, y_traj, z_traj, zero, dir, knee_up=True, ik_on_host=True):
+    """Tabla (N, 3) de una pierna: ticks si la IK se resuelve en el host, XYZ en mm si no."""
+    if ik_on_host:
+        return ticks_table(*L, x_traj, y_traj, z_traj, zero, dir, knee_up)
+    return np.stack([np.asarray(x_traj, dtype=float), np.asarray(y_traj, dtype=float),
+                     np.asarray(z_traj, dtype=float)], axis=1)
+
+def leg_rows(foot, L, zero, dir, knee_up=True, ik_on_host=True):
+    """Convierte un generador de pies `foot() → (x, y, z)` en uno de filas para `frame_encoder`."""
+    if not ik_on_host:
+        return foot
+    return lambda: ticks_table(*L, *([v] for v in foot()), zero, dir, knee_up)[0]
+
+def neutral_frame(L, x0, y0, z0, zero, dir, knee_up=True, ik_on_host=True, binary=True):
+    """Trama de la postura neutra (la que se envía al parar)."""
+    row = leg_table(L, [x0], [y0], [z0], zero, dir, knee_up, ik_on_host)[0]
+    return frame_encoder("ticks" if ik_on_host else "xyz", binary)(row)
+
+# ====== Player en hilo (NO usa st.session_state dentro) ======
+def player_loop(run_event, link, frame_at, neutral, sched, ping=False, log=None, tap=None, recorder=None):
+    """Escribe `frame_at(k)` (bytes) en cada tick k de `sched`; al parar envía `neutral`.
+
+    Deja cada trama en `log` (el anillo compartido; nunca `st.session_state`) y,
+    si hay `tap` (p. ej. un `liveview.PoseTap`), se la pasa tal cual se envió.
+    Con `recorder` (`recording.Recorder`) cada trama queda grabada con el
+    instante en que salió por el puerto y, en ASCII, el de su `OK`; se cierra al parar. Si `frame_at`
+    devuelve None (fin de una grabación), el player para solo.
+    """
+    def write_bytes(data: bytes):
+        if not link: return
+        on_wire, on_reply = recorder.frame(data) if recorder else (None, None)
+        try:
+            sent = link.send_raw(data, on_wire=on_wire, on_reply=on_reply)   # el hilo lector recoge los OK
+        except Exception as e:
+            if log: log.add(EVENT, f"[ERR] player: {e}")
+            if on_wire: on_wire(math.nan)           # no saldrá: la grabación no la espera
+            return
+        if not sent: return
+        if tap: tap(data)
+        if log:
+            text = data.hex(" ") if data[:1] == bytes((FRAME_START,)) else data.decode("ascii", "replace").strip()
+            log.add("→", text, cmd=message_cmd(data))
+    if log: log.add(EVENT, f"[PLAY] hilo en marcha a {sched.hz:g} Hz")
+    frame_timer = Timer(_FRAME_S)
+    sched.start()
+    while run_event.is_set():
+        k = sched.wait()
+        if not run_event.is_set(): break
+        with frame_timer:
+            data = frame_at(k)
+        if data is None:
+            run_event.clear()
+            break
+        write_bytes(data)
+        if ping and (k % 10) == 0:  # pequeño “ping” opcional
+            write_bytes(b"READY\n")
+    # Al parar: postura neutra
+    write_bytes(neutral)
+    if log: log.add(EVENT, f"[PLAY] hilo parado tras {sched.stats.ticks} ticks ({sched.stats.missed} perdidos)")
+    if recorder:
+        recorder.close()
+        if log: log.add(EVENT, f"[REC] {recorder.frames} tramas ({recorder.dropped} descartadas) en {recorder.path}")
+
+class Player:
+    """`player_loop` en un hilo propio. `run_event` puede compartirse (p. ej. con el E-STOP de la GUI)."""
+
+    def __init__(self, link, frame_at, neutral, hz, policy="skip", ping=False, log=None, run_event=None, tap=None,
+                 recorder=None):
+        self.link = link
+        self.frame_at = frame_at
+        self.neutral = neutral
+        self.ping = ping
+        self.log = log
+        self.tap = tap
+        self.recorder = recorder
+        self.run_event = run_event or threading.Event()
+        self.sched = DeadlineScheduler(hz, policy=policy)
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.link is not None:
+            self.link.resume()                 # el movimiento vuelve a pasar tras un E-STOP
+        self.run_event.set()
+        self._thread = threading.Thread(
+            target=player_loop, name="spaider-player", daemon=True,
+            args=(self.run_event, self.link, self.frame_at, self.neutral, self.sched, self.ping, self.log, self.tap,
+                  self.recorder))
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        """Para el hilo y espera a que envíe la postura neutra."""
+        self.run_event.clear()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
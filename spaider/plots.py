@@ -0,0 +1,105 @@
+"""Figuras de la GUI renderizadas a PNG y memoizadas (workspace, pose IK, trayectoria)."""
+import io
+import math
+
+from ._lazy import np
+from .memo import memoize
+from .workspace import workspace_map
+
+RENDER_MODES = ("Densidad", "Contorno")
+DPI = 100
+
+def _figure(**kw):
+    from matplotlib.figure import Figure     # matplotlib solo cuando se dibuja
+    return Figure(**kw)
+
+def _png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=DPI, bbox_inches="tight")
+    return buf.getvalue()
+
+def _draw(ax, counts, ok, edges_x, edges_y, mode):
+    extent = (edges_x[0], edges_x[-1], edges_y[0], edges_y[-1])
+    if mode == "Contorno":
+        xc = 0.5*(edges_x[:-1] + edges_x[1:]); yc = 0.5*(edges_y[:-1] + edges_y[1:])
+        ax.contourf(xc, yc, ok.T.astype(float), levels=[0.5, 1.5], alpha=0.35)
+        ax.contour(xc, yc, ok.T.astype(float), levels=[0.5], linewidths=1.5)
+    else:
+        img = np.log1p(counts.T)   # log para que el borde poco muestreado siga visible
+        img = np.ma.masked_where(~ok.T & (counts.T == 0), img)
+        ax.imshow(img, origin="lower", extent=extent, aspect="auto", interpolation="nearest", cmap="viridis")
+    ax.set_xlim(extent[0], extent[1]); ax.set_ylim(extent[2], extent[3])
+    ax.grid(True, alpha=0.3)
+
+@memoize(maxsize=16)
+def workspace_pngs(L1,L2,L3, safe_min, safe_max, n2=120, n3=120, mode="Densidad"):
+    """(png_RZ, png_XY) del workspace; cacheado por geometría, límites, resolución y modo."""
+    ws = workspace_map(L1,L2,L3, safe_min, safe_max, n2, n3)
+    fig = _figure(figsize=(4.6,4.2))
+    ax = fig.add_subplot()
+    _draw(ax, ws.rz_counts, ws.rz_any, ws.r_edges, ws.z_edges, mode)
+    ax.set_xlabel("R [mm]"); ax.set_ylabel("Z [mm]")
+    side = _png(fig)
+
+    fig2 = _figure(figsize=(4.6,4.6))
+    ax2 = fig2.add_subplot()
+    _draw(ax2, ws.xy_counts, ws.xy_ok, ws.xy_edges, ws.xy_edges, mode)
+    ax2.set_aspect("equal", "box")
+    ax2.set_xlabel("X [mm]"); ax2.set_ylabel("Y [mm]")
+    top = _png(fig2)
+    return side, top
+
+def leg_points(L1,L2,L3, t1,t2,t3):
+    """Polilíneas de la pierna: ((x…), (y…)) en planta desde la coxa y ((r…), (z…)) en el plano del fémur."""
+    r1, r2, r23 = math.radians(t1), math.radians(t2), math.radians(t2+t3)
+    knee_r = L2*math.cos(r2)
+    foot_r = knee_r + L3*math.cos(r23)
+    c, s = math.cos(r1), math.sin(r1)
+    top = ((0.0, L1*c, (L1+knee_r)*c, (L1+foot_r)*c), (0.0, L1*s, (L1+knee_r)*s, (L1+foot_r)*s))
+    knee_z = L2*math.sin(r2)
+    side = ((0.0, knee_r, foot_r), (0.0, knee_z, knee_z + L3*math.sin(r23)))
+    return top, side
+
+def _leg_axes(ax, reach, xlabel, ylabel):
+    ax.set_aspect("equal","box")
+    ax.set_xlim(-reach, reach); ax.set_ylim(-reach, reach); ax.grid(True, alpha=0.3)
+    ax.set_xlabel(xlabel); ax.set_ylabel(ylabel)
+
+@memoize(maxsize=32)
+def ik_pngs(L1,L2,L3, t1,t2,t3):
+    """(png_XY, png_RZ) de la pierna en la pose (t1,t2,t3) en grados mecánicos."""
+    (xs, ys), (rs, zs) = leg_points(L1,L2,L3, t1,t2,t3)
+
+    fig = _figure(figsize=(4.4,4.4))
+    ax = fig.add_subplot()
+    _leg_axes(ax, L1+L2+L3, "X [mm]", "Y [mm]")
+    ax.plot(xs[:2], ys[:2], lw=3)
+    ax.plot(xs[1:3], ys[1:3], lw=4)
+    ax.plot(xs[2:], ys[2:], lw=4)
+    ax.scatter(xs, ys, s=40)
+    top = _png(fig)
+
+    fig2 = _figure(figsize=(4.4,4.4))
+    ax2 = fig2.add_subplot()
+    _leg_axes(ax2, L2+L3, "R [mm]", "Z [mm]")
+    ax2.plot(rs[:2], zs[:2], lw=4)
+    ax2.plot(rs[1:], zs[1:], lw=4)
+    ax2.scatter(rs, zs, s=40)
+    return top, _png(fig2)
+
+@memoize(maxsize=16)
+def traj_pngs(L1,L2,L3, x_traj, y_traj, z_traj, marks_x, marks_y):
+    """(png_XY, png_RZ) de la trayectoria del pie; `marks_*` son los extremos del paso."""
+    fig = _figure(figsize=(4.4,4.4))
+    ax = fig.add_subplot()
+    _leg_axes(ax, L1+L2+L3, "X [mm]", "Y [mm]")
+    ax.plot(x_traj, y_traj, lw=2)
+    ax.scatter(marks_x, marks_y, s=25)
+    top = _png(fig)
+
+    r_traj = np.sqrt(np.asarray(x_traj)**2 + np.asarray(y_traj)**2) - L1
+    fig2 = _figure(figsize=(4.4,4.0))
+    ax2 = fig2.add_subplot()
+    ax2.plot(r_traj, z_traj, lw=2); ax2.grid(True, alpha=0.3)
+    ax2.set_xlabel("R [mm]"); ax2.set_ylabel("Z [mm]")
+    return top, _png(fig2)
@@ -0,0 +1,225 @@
+"""Protocolo binario con tramas de tamaño fijo por comando (alternativa compacta a las líneas ASCII).
+
+Trama:  A5 | cmd | payload (n × int16 little-endian) | crc8
+- El tamaño del payload lo fija el comando (ver `PAYLOAD_WORDS`); casi todos
+  llevan 3 valores (trama de 9 bytes).
+- crc8: polinomio 0x07, valor inicial 0, calculado sobre cmd + payload.
+
+Se negocia con `HELLO BIN` → el sketch responde `OK BIN <versión> <capacidad
+del buffer>` y desde ese momento acepta tramas. Las tramas de movimiento no
+generan respuesta si todo va bien; las de buffer/reproducción responden con una
+línea `OK …`. Una trama corrupta produce `ERR CRC` y un comando desconocido `ERR BIN`.
+"""
+import struct
+
+FRAME_START = 0xA5
+PROTO_VERSION = 3
+HELLO_BIN = "HELLO BIN"
+
+# ids de comando (espejo de spAiderArduino.ino)
+CMD_XYZ    = 0x01   # a,b,c = x,y,z en décimas de mm
+CMD_S      = 0x02   # a = canal, b = grados×10
+CMD_P      = 0x03   # a = canal, b = µs
+CMD_TICKS  = 0x04   # a,b,c = ticks PCA9685 de coxa, fémur, tibia (IK resuelta en el host)
+CMD_HEX_TICKS = 0x05   # 18 ticks: pata 0 (coxa, fémur, tibia), pata 1, … (hexápodo, dos PCA9685)
+CMD_ON     = 0x10
+CMD_OFF    = 0x11
+CMD_CENTER = 0x12
+# buffer de trayectoria en el sketch (subir una vez, reproducir en bucle)
+CMD_BUF_BEGIN = 0x20   # a = nº de muestras, b = tipo (BUF_TICKS | BUF_XYZ)   → "OK BEGIN n"
+CMD_BUF_DATA  = 0x21   # a = índice de la 1ª muestra, luego BUF_CHUNK×3 valores → "OK BUF i"
+CMD_PLAY      = 0x22   # a = Hz×10, b = fase inicial (índice, -1 = seguir)      → "OK PLAY"
+CMD_STOP      = 0x23   #                                                         → "OK STOP"
+CMD_RATE      = 0x24   # a = Hz×10                                               → "OK RATE"
+CMD_PHASE     = 0x25   # a = índice de muestra                                   → "OK PHASE"
+
+CMD_NAMES = {CMD_XYZ: "XYZ", CMD_S: "S", CMD_P: "P", CMD_TICKS: "T", CMD_HEX_TICKS: "HEX",
+             CMD_ON: "ON", CMD_OFF: "OFF", CMD_CENTER: "CENTER", CMD_BUF_BEGIN: "BEGIN", CMD_BUF_DATA: "BUF",
+             CMD_PLAY: "PLAY", CMD_STOP: "STOP", CMD_RATE: "RATE", CMD_PHASE: "PHASE"}
+
+BUF_TICKS = 0
+BUF_XYZ   = 1
+BUF_CHUNK = 4          # muestras por trama CMD_BUF_DATA
+HEX_SERVOS = 18        # 6 patas × 3 articulaciones
+
+XYZ_SCALE = 10      # 0.1 mm
+DEG_SCALE = 10      # 0.1°
+RATE_SCALE = 10     # 0.1 Hz
+
+PAYLOAD_WORDS = {CMD_BUF_DATA: 1 + 3*BUF_CHUNK, CMD_HEX_TICKS: HEX_SERVOS}
+DEFAULT_WORDS = 3
+
+def payload_words(cmd):
+    return PAYLOAD_WORDS.get(cmd, DEFAULT_WORDS)
+
+def frame_len(cmd):
+    """Bytes totales de una trama de `cmd` (inicio + cmd + payload + crc)."""
+    return 3 + 2*payload_words(cmd)
+
+FRAME_LEN = frame_len(CMD_XYZ)          # 9 bytes, la trama de movimiento
+MAX_FRAME_LEN = max(frame_len(c) for c in (CMD_XYZ, *PAYLOAD_WORDS))
+
+INT16_MIN, INT16_MAX = -32768, 32767
+
+def crc8(data, crc=0):
+    """CRC-8 (poly 0x07, sin reflejar), el mismo que calcula el sketch."""
+    for b in data:
+        crc ^= b
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+def _q(v, scale=1):
+    """Cuantiza a int16 saturando (punto fijo)."""
+    return max(INT16_MIN, min(INT16_MAX, int(round(v * scale))))
+
+def encode_frame(cmd, *vals):
+    """Trama con payload ya entero (int16); faltantes se rellenan con 0."""
+    n = payload_words(cmd)
+    if len(vals) > n:
+        raise ValueError(f"el comando 0x{cmd:02X} admite {n} valores")
+    body = struct.pack(f"<B{n}h", cmd, *vals, *([0]*(n - len(vals))))
+    return bytes((FRAME_START,)) + body + bytes((crc8(body),))
+
+def encode_xyz(x, y, z):
+    return encode_frame(CMD_XYZ, _q(x, XYZ_SCALE), _q(y, XYZ_SCALE), _q(z, XYZ_SCALE))
+
+def encode_servo(ch, deg):
+    return encode_frame(CMD_S, int(ch), _q(deg, DEG_SCALE))
+
+def encode_pulse(ch, us):
+    return encode_frame(CMD_P, int(ch), _q(us))
+
+def encode_ticks(c_coxa, c_femur, c_tibia):
+    return encode_frame(CMD_TICKS, int(c_coxa), int(c_femur), int(c_tibia))
+
+def encode_hex_ticks(row):
+    """Una trama con los 18 ticks de un tick del hexápodo (39 bytes en vez de 6 × 9)."""
+    return encode_frame(CMD_HEX_TICKS, *(int(v) for v in row))
+
+# ---- buffer / reproducción en el sketch ----
+def encode_buf_begin(n, kind=BUF_TICKS):
+    return encode_frame(CMD_BUF_BEGIN, int(n), int(kind))
+
+def encode_buf_data(index, rows):
+    """Trama con hasta BUF_CHUNK muestras (filas de 3 enteros) a partir de `index`."""
+    flat = [int(v) for row in rows for v in row]
+    return encode_frame(CMD_BUF_DATA, int(index), *flat)
+
+def encode_play(hz, phase=-1):
+    return encode_frame(CMD_PLAY, _q(hz, RATE_SCALE), int(phase))
+
+def encode_stop():
+    return encode_frame(CMD_STOP)
+
+def encode_rate(hz):
+    return encode_frame(CMD_RATE, _q(hz, RATE_SCALE))
+
+def encode_phase(index):
+    return encode_frame(CMD_PHASE, int(index))
+
+PWM_HZ = 50            # refresco de los PCA9685: más tramas por segundo no mueven antes el servo
+
+def stream_hz(frame_bytes, baud, load=0.8, cap=PWM_HZ):
+    """Ritmo de envío (Hz) que aguanta la línea (8N1) con `frame_bytes` por tick, usando `load` de ella."""
+    return min(float(cap), load * baud / (10.0 * frame_bytes))
+
+def parse_hello_bin(line):
+    """(versión, capacidad del buffer) de la respuesta `OK BIN v [cap]`, o None."""
+    parts = line.split()
+    if len(parts) < 3 or parts[0] != "OK" or parts[1] != "BIN":
+        return None
+    try:
+        return int(parts[2]), (int(parts[3]) if len(parts) > 3 else 0)
+    except ValueError:
+        return None
+
+# ---- ciclos completos pre-codificados (el player solo escribe bytes) ----
+def xyz_frames(x_traj, y_traj, z_traj, binary=False):
+    """Lista de mensajes XYZ (tramas o líneas ASCII) para cada muestra."""
+    if binary:
+        return [encode_xyz(X, Y, Z) for X, Y, Z in zip(x_traj, y_traj, z_traj)]
+    return [f"XYZ {float(X)} {float(Y)} {float(Z)}\n".encode("utf-8")
+            for X, Y, Z in zip(x_traj, y_traj, z_traj)]
+
+def ticks_frames(ticks, binary=False):
+    """Lista de mensajes de ticks (tramas CMD_TICKS o líneas `T a b c`) por fila de `ticks`."""
+    if binary:
+        return [encode_ticks(*row) for row in ticks.tolist()]
+    return [("T %d %d %d\n" % tuple(row)).encode("ascii") for row in ticks.tolist()]
+
+def hex_ticks_frames(table):
+    """Tramas CMD_HEX_TICKS para cada fila de una tabla (N, 18)."""
+    return [encode_hex_ticks(row) for row in table.tolist()]
+
+def message_cmd(data):
+    """Nombre del comando de un mensaje (trama binaria o línea ASCII), para el log."""
+    if len(data) > 1 and data[0] == FRAME_START:
+        return CMD_NAMES.get(data[1], f"0x{data[1]:02X}")
+    parts = data.split(None, 1)
+    return parts[0].decode("ascii", "replace").upper() if parts else ""
+
+def decode_frame(frame):
+    """(cmd, valores) de una trama completa; ValueError si no es válida."""
+    if len(frame) < FRAME_LEN or frame[0] != FRAME_START or len(frame) != frame_len(frame[1]):
+        raise ValueError("trama con tamaño o inicio incorrecto")
+    body = bytes(frame[1:-1])
+    if crc8(body) != frame[-1]:
+        raise ValueError("CRC incorrecto")
+    vals = struct.unpack(f"<B{payload_words(body[0])}h", body)
+    return vals[0], vals[1:]
+
+def decode_xyz(payload):
+    """(x, y, z) en mm desde el payload entero de CMD_XYZ."""
+    return tuple(v / XYZ_SCALE for v in payload)
+
+def decode_message(data):
+    """(cmd, valores) de un mensaje de movimiento del player: XYZ en mm, ticks enteros.
+
+    Acepta tramas (CMD_XYZ, CMD_TICKS, CMD_HEX_TICKS) y líneas `XYZ x y z` / `T a b c`;
+    None para cualquier otra cosa (READY, tramas corruptas…).
+    """
+    if data[:1] == bytes((FRAME_START,)):
+        try:
+            cmd, vals = decode_frame(data)
+        except ValueError:
+            return None
+        if cmd == CMD_XYZ:
+            return cmd, decode_xyz(vals)
+        return (cmd, vals) if cmd in (CMD_TICKS, CMD_HEX_TICKS) else None
+    parts = data.split()
+    try:
+        if len(parts) == 4 and parts[0] == b"XYZ":
+            return CMD_XYZ, tuple(float(v) for v in parts[1:])
+        if len(parts) == 4 and parts[0] == b"T":
+            return CMD_TICKS, tuple(int(v) for v in parts[1:])
+    except ValueError:
+        pass
+    return None
+
+class FrameDecoder:
+    """Decodificador incremental: acepta bytes sueltos y se resincroniza tras errores."""
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.crc_errors = 0
+
+    def feed(self, data):
+        """Añade bytes y devuelve la lista de (cmd, valores) completos."""
+        self.buf.extend(data)
+        out = []
+        while True:
+            i = self.buf.find(FRAME_START)
+            if i < 0:
+                self.buf.clear(); break
+            if i: del self.buf[:i]
+            if len(self.buf) < 2: break
+            n = frame_len(self.buf[1])
+            if len(self.buf) < n: break
+            try:
+                out.append(decode_frame(self.buf[:n]))
+                del self.buf[:n]
+            except ValueError:
+                self.crc_errors += 1
+                del self.buf[:1]          # saltamos el falso inicio y seguimos buscando
+        return out
@@ -0,0 +1,285 @@
+"""Grabación compacta de lo que envía el player y reproducción desde disco con memmap.
+
+Una grabación es un directorio `*.sprec` con `meta.json` y un fichero binario
+por columna (little-endian, sin cabecera) al que solo se añade:
+
+    t.bin      f8        instante (`time.monotonic`) en que el player entregó la trama
+    xyz.bin    f4 ×3·p   objetivo del pie en el marco de cada pata (mm)
+    q.bin      f4 ×3·p   ángulos mecánicos resueltos (°)
+    ticks.bin  u2 ×3·p   ticks PCA9685 (con IK en Arduino, los que calcularía el sketch)
+    wire.bin   f4        s desde la entrega hasta que salió por el puerto; NaN si se descartó
+    ack.bin    f4        s desde que salió hasta su `OK` (solo ASCII); NaN en binario o sin respuesta
+
+(p = 6 en el hexápodo, 1 si no). Las tramas binarias de movimiento no tienen
+respuesta: su única latencia medible es `wire`. El hilo del player solo anota
+los bytes y la hora; un hilo aparte decodifica por lotes con NumPy y añade a los ficheros cada
+`flush_every` s, así que una sesión cortada pierde como mucho ese último lote.
+`Recording` abre las columnas con `np.memmap`: resumir o recortar sesiones de
+horas no las carga en RAM, y `ReplaySource` las vuelve a enviar por el mismo
+camino serie (player + `SerialLink`) al ritmo original o escalado.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import partial
+
+from ._lazy import np
+from .kinematics import fk_batch, ik_batch, ticks_table, ticks_to_mech
+from .memo import memoize
+from .metrics import counter
+from .player import frame_encoder
+from .protocol import CMD_XYZ, CMD_TICKS, CMD_HEX_TICKS, decode_message
+
+REC_DIR = "spaider_rec"
+REC_SUFFIX = ".sprec"
+REC_VERSION = 1
+KINDS = {"xyz": CMD_XYZ, "ticks": CMD_TICKS, "hex": CMD_HEX_TICKS}
+COLUMNS = {"t": ("<f8", False), "xyz": ("<f4", True), "q": ("<f4", True), "ticks": ("<u2", True),
+           "wire": ("<f4", False), "ack": ("<f4", False)}   # nombre → (dtype, ¿3 valores por pata?)
+
+_FRAMES = counter("spaider_rec_frames_total", "Tramas escritas en grabaciones")
+
+def new_path(root=REC_DIR):
+    """Ruta libre para una grabación nueva: `root/AAAAMMDD-HHMMSS.sprec`."""
+    base = os.path.join(root, time.strftime("%Y%m%d-%H%M%S"))
+    path, i = base + REC_SUFFIX, 1
+    while os.path.exists(path):
+        path, i = f"{base}-{i}{REC_SUFFIX}", i + 1
+    return path
+
+def list_recordings(root=REC_DIR):
+    """Grabaciones de `root`, la más reciente primero."""
+    if not os.path.isdir(root):
+        return []
+    return sorted((os.path.join(root, d) for d in os.listdir(root) if d.endswith(REC_SUFFIX)), reverse=True)
+
+class Recorder:
+    """Graba cada trama que entrega el player: `frame(data)` desde su hilo, `close()` al acabar.
+
+    `kind` ("xyz", "ticks" o "hex") y `binary` describen las tramas y son los que
+    usa la reproducción. L/ZERO/DIR/rodilla sirven para deducir las columnas que
+    la trama no lleva (ángulos y ticks desde XYZ, o ángulos y pie desde ticks).
+    """
+
+    def __init__(self, path, kind, binary, L, zero, dir, knee_up=True, flush_every=0.25, settle=1.5):
+        if kind not in KINDS:
+            raise ValueError(f"tipo de trama desconocido: {kind}")
+        os.makedirs(path)                       # nunca mezclamos dos sesiones en el mismo directorio
+        self.path = path
+        self.legs = 6 if kind == "hex" else 1
+        self.L, self.zero, self.dir, self.knee_up = tuple(L), tuple(zero), tuple(dir), knee_up
+        self.meta = {"version": REC_VERSION, "kind": kind, "binary": bool(binary), "legs": self.legs,
+                     "L": list(self.L), "zero": list(self.zero), "dir": list(self.dir), "knee_up": knee_up,
+                     "created": time.time(), "columns": {k: v[0] for k, v in COLUMNS.items()}}
+        self._write_meta()
+        self._files = {name: open(os.path.join(path, f"{name}.bin"), "ab") for name in COLUMNS}
+        self._pending = deque()                 # [t, t_perf, bytes, t_perf en la línea, s hasta el OK] (None: aún no)
+        self._lock = threading.Lock()
+        self.flush_every, self.settle = flush_every, settle
+        self.frames = 0
+        self.dropped = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._flusher, name="spaider-recorder", daemon=True)
+        self._thread.start()
+
+    def _write_meta(self):
+        with open(os.path.join(self.path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=2)
+
+    def frame(self, data):
+        """Anota una trama a punto de enviarse y devuelve `(on_wire, on_reply)` para `SerialLink.send_raw`.
+
+        `on_reply` es None en binario: esas tramas no tienen respuesta que esperar.
+        """
+        entry = [time.monotonic(), time.perf_counter(), data, None, None]
+        self._pending.append(entry)
+        return partial(entry.__setitem__, 3), None if self.meta["binary"] else partial(entry.__setitem__, 4)
+
+    def _ready(self, e):
+        """La trama ya salió (o se descartó) y, en ASCII, ya tiene su respuesta o se dio por perdida."""
+        return e[3] is not None and (self.meta["binary"] or e[3] != e[3] or e[4] is not None)
+
+    def _flusher(self):
+        while not self._stop.wait(self.flush_every):
+            self.flush(self.settle)
+
+    def flush(self, settle=0.0):
+        """Escribe las tramas ya enviadas o entregadas hace más de `settle` s (en orden)."""
+        with self._lock:
+            now, batch = time.monotonic(), []
+            while self._pending and (self._ready(self._pending[0]) or now - self._pending[0][0] >= settle):
+                batch.append(self._pending.popleft())
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        cmd, w = KINDS[self.meta["kind"]], 3*self.legs
+        rows = [(e, m[1]) for e, m in ((e, decode_message(e[2])) for e in batch) if m is not None and m[0] == cmd]
+        if not rows:
+            return
+        n = len(rows)
+        t = np.fromiter((e[0] for e, _ in rows), dtype=float, count=n)
+        wire = np.fromiter((np.nan if e[3] is None else e[3] - e[1] for e, _ in rows), dtype=float, count=n)
+        ack = np.fromiter((np.nan if e[4] is None else e[4] for e, _ in rows), dtype=float, count=n)
+        vals = np.array([v[:w] for _, v in rows], dtype=float)
+        if cmd == CMD_XYZ:
+            xyz = vals
+            t1, t2, t3, _, _ = ik_batch(*self.L, *vals.T).branch(self.knee_up)
+            q = np.stack([t1, t2, t3], axis=1)
+            ticks = ticks_table(*self.L, *vals.T, self.zero, self.dir, self.knee_up)
+        else:
+            ticks = vals.reshape(n, self.legs, 3)
+            q = ticks_to_mech(ticks, self.zero, self.dir)
+            xyz = np.stack(fk_batch(*self.L, q[..., 0], q[..., 1], q[..., 2]), axis=-1)
+        cols = {"t": t, "xyz": xyz, "q": q, "ticks": ticks, "wire": wire, "ack": ack}
+        for name, (dtype, _) in COLUMNS.items():
+            f = self._files[name]
+            f.write(np.ascontiguousarray(cols[name], dtype=dtype).reshape(n, -1).tobytes())
+            f.flush()
+        self.frames += n
+        self.dropped += int(np.isnan(wire).sum())
+        _FRAMES.inc(n)
+
+    def close(self, timeout=1.5):
+        """Espera (como mucho `timeout`) a que salgan las últimas tramas y sus respuestas, escribe lo pendiente y cierra."""
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        deadline = time.monotonic() + timeout
+        while not all(map(self._ready, list(self._pending))) and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        self.meta.update(frames=self.frames, dropped=self.dropped)
+        self._write_meta()
+
+class Recording:
+    """Grabación en disco con cada columna como `np.memmap` de solo lectura: `rec["q"]`, `rec.t`…"""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.path = path
+        self.legs = self.meta["legs"]
+        files = {name: os.path.join(path, f"{name}.bin") for name in COLUMNS}
+        widths = {name: 3*self.legs if per_leg else 1 for name, (_, per_leg) in COLUMNS.items()}
+        sizes = {name: np.dtype(COLUMNS[name][0]).itemsize * widths[name] for name in COLUMNS}
+        # una sesión cortada puede dejar una columna con una fila más: nos quedamos con las completas
+        self.n = min(os.path.getsize(files[name]) // sizes[name] for name in COLUMNS)
+        self._cols = {}
+        for name, (dtype, per_leg) in COLUMNS.items():
+            shape = (self.n, widths[name]) if per_leg else (self.n,)
+            self._cols[name] = (np.memmap(files[name], dtype=dtype, mode="r", shape=shape) if self.n
+                                else np.empty(shape, dtype=dtype))
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, name):
+        return self._cols[name]
+
+    t = property(lambda self: self._cols["t"])
+    xyz = property(lambda self: self._cols["xyz"])
+    q = property(lambda self: self._cols["q"])
+    ticks = property(lambda self: self._cols["ticks"])
+    wire = property(lambda self: self._cols["wire"])
+    ack = property(lambda self: self._cols["ack"])
+
+    @property
+    def duration(self):
+        return float(self.t[-1] - self.t[0]) if self.n > 1 else 0.0
+
+    @property
+    def hz(self):
+        return (self.n - 1) / self.duration if self.duration > 0 else 0.0
+
+    def window(self, t0, t1):
+        """`slice` de las filas entre t0 y t1 s desde el inicio (búsqueda binaria sobre `t`)."""
+        if not self.n:
+            return slice(0, 0)
+        i, j = np.searchsorted(self.t, [self.t[0] + t0, self.t[0] + t1])
+        return slice(int(i), int(j))
+
+    def summary(self, chunk=1 << 20):
+        """dict con ritmo, huecos, latencias, rango y salto máximo por articulación, por bloques de `chunk` filas.
+
+        `wire_*`: hasta que la trama salió por el puerto (`dropped`: las que no
+        salieron). `ack_*`: hasta su `OK`, solo en ASCII (`acked`: las que lo recibieron).
+        """
+        edges = np.geomspace(1e-6, 10.0, 401)
+        hist = {"wire": np.zeros(len(edges) - 1, dtype=np.int64), "ack": np.zeros(len(edges) - 1, dtype=np.int64)}
+        count, top = {"wire": 0, "ack": 0}, {"wire": 0.0, "ack": 0.0}
+        q_min = np.full(3*self.legs, np.inf); q_max = -q_min
+        step = np.zeros(3*self.legs)
+        gap, prev_t, prev_q = 0.0, None, None
+        for a in range(0, self.n, chunk):
+            t = np.asarray(self.t[a:a+chunk], dtype=float)
+            q = np.asarray(self.q[a:a+chunk], dtype=float)
+            if prev_t is not None:                 # la frontera entre bloques también cuenta
+                t = np.concatenate([[prev_t], t]); q = np.concatenate([prev_q[None], q])
+            if len(t) > 1:
+                gap = max(gap, float(np.diff(t).max()))
+                step = np.maximum(step, np.abs(np.diff(q, axis=0)).max(axis=0))
+            q_min = np.minimum(q_min, q.min(axis=0)); q_max = np.maximum(q_max, q.max(axis=0))
+            for name in hist:
+                lat = np.asarray(self[name][a:a+chunk], dtype=float)
+                ok = lat[~np.isnan(lat)]
+                count[name] += len(ok)
+                if len(ok):
+                    top[name] = max(top[name], float(ok.max()))
+                    hist[name] += np.histogram(np.clip(ok, edges[0], edges[-1]), edges)[0]
+            prev_t, prev_q = t[-1], q[-1]
+
+        def quantile(name, p):
+            if not count[name]: return 0.0
+            edge = float(edges[1:][np.searchsorted(np.cumsum(hist[name]), p*count[name])])
+            return min(edge, top[name])            # el borde del cubo puede pasarse del máximo visto
+        out = {"frames": self.n, "duration_s": self.duration, "hz": self.hz, "max_gap_ms": gap*1e3,
+               "dropped": self.n - count["wire"], "acked": count["ack"]}
+        for name in hist:
+            out.update({f"{name}_p50_ms": quantile(name, 0.5)*1e3, f"{name}_p99_ms": quantile(name, 0.99)*1e3,
+                        f"{name}_max_ms": top[name]*1e3})
+        out.update(q_min=q_min.tolist() if self.n else [], q_max=q_max.tolist() if self.n else [],
+                   max_step_deg=step.tolist())
+        return out
+
+@memoize(maxsize=8)
+def recording_summary(path, frames):
+    """`Recording(path).summary()` cacheado; `frames` (filas en disco) invalida la caché si crece."""
+    return Recording(path).summary()
+
+class ReplaySource:
+    """Tramas de una grabación por tiempo: `frame_at(k)` da la fila del instante actual × `speed`.
+
+    Se usa como `frame_at` del `Player`: el ritmo de envío lo marca el player, y
+    la fila se elige por búsqueda binaria en `t`, así que la grabación dura
+    `duration / speed` con cualquier frecuencia. Al acabar devuelve None.
+    """
+
+    def __init__(self, rec, speed=1.0, clock=time.monotonic):
+        if not len(rec):
+            raise ValueError(f"{rec.path}: grabación vacía")
+        self.rec, self.speed, self.clock = rec, float(speed), clock
+        kind = rec.meta["kind"]
+        self._encode = frame_encoder(kind, rec.meta["binary"])
+        self._col = rec.xyz if kind == "xyz" else rec.ticks
+        self._t0 = float(rec.t[0])
+        self._start = None
+        self.index = 0
+
+    @property
+    def neutral(self):
+        """Última trama de la grabación (el player termina enviando la postura neutra)."""
+        return self._encode(self._col[-1])
+
+    def frame_at(self, k):
+        now = self.clock()
+        if self._start is None:
+            self._start = now
+        elapsed = (now - self._start) * self.speed
+        if elapsed > self.rec.duration:
+            return None
+        self.index = int(np.searchsorted(self.rec.t, self._t0 + elapsed, side="right")) - 1
+        return self._encode(self._col[max(0, self.index)])
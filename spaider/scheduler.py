@@ -0,0 +1,106 @@
+"""Planificador por deadlines absolutos (time.monotonic) para el bucle del player.
+
+En vez de `sleep(dt)` tras cada escritura (que acumula deriva con cada escritura
+lenta o pausa del GIL), cada tick tiene su instante objetivo t0 + k·dt. Si un
+tick llega tarde más de un periodo:
+- "skip":    se saltan los ticks perdidos (el índice avanza igual que el reloj).
+- "catchup": se ejecutan seguidos, sin dormir, hasta recuperar el ritmo.
+"""
+import threading
+import time
+from collections import deque
+
+from ._lazy import np
+from .metrics import counter, histogram
+
+POLICIES = ("skip", "catchup")
+
+_LATE_S = histogram("spaider_player_tick_lateness_seconds", "Retraso de cada tick sobre su deadline")
+_TICKS = counter("spaider_player_ticks_total", "Ticks ejecutados por el player")
+_MISSED = counter("spaider_player_ticks_missed_total", "Ticks saltados por llegar tarde")
+
+class TickStats:
+    """Estadísticas en vivo: ritmo conseguido, jitter (retraso sobre el deadline) y ticks perdidos."""
+
+    def __init__(self, window=512):
+        self._lock = threading.Lock()
+        self._late = deque(maxlen=window)     # s de retraso de cada tick respecto a su deadline
+        self._times = deque(maxlen=window)    # instantes reales de cada tick
+        self.ticks = 0
+        self.missed = 0
+
+    def record(self, now, lateness, missed=0):
+        with self._lock:
+            self._late.append(lateness)
+            self._times.append(now)
+            self.ticks += 1
+            self.missed += missed
+        _LATE_S.observe(lateness)
+        _TICKS.inc()
+        if missed: _MISSED.inc(missed)
+
+    def snapshot(self):
+        """dict con hz, jitter p50/p95/p99/max en ms, ticks y perdidos."""
+        with self._lock:
+            late = np.fromiter(self._late, dtype=float)
+            times = np.fromiter(self._times, dtype=float)
+            ticks, missed = self.ticks, self.missed
+        out = {"ticks": ticks, "missed": missed, "hz": 0.0,
+               "jitter_p50_ms": 0.0, "jitter_p95_ms": 0.0, "jitter_p99_ms": 0.0, "jitter_max_ms": 0.0}
+        if len(times) > 1 and times[-1] > times[0]:
+            out["hz"] = float((len(times) - 1) / (times[-1] - times[0]))
+        if len(late):
+            p50, p95, p99 = (float(v) for v in np.percentile(late, [50, 95, 99]) * 1e3)
+            out.update(jitter_p50_ms=p50, jitter_p95_ms=p95, jitter_p99_ms=p99, jitter_max_ms=float(late.max()*1e3))
+        return out
+
+class DeadlineScheduler:
+    """Marca el ritmo de un bucle a `hz` con deadlines absolutos.
+
+    Uso:  sched.start(); while ...: k = sched.wait(); enviar(muestra[k % N])
+    `wait()` devuelve el índice del tick a ejecutar (con "skip" puede saltar).
+    """
+
+    def __init__(self, hz, policy="skip", clock=time.monotonic, sleep=time.sleep, window=512):
+        if policy not in POLICIES:
+            raise ValueError(f"política desconocida: {policy}")
+        self.policy = policy
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = TickStats(window)
+        self.period = 1.0 / float(hz)
+        self._tick = 0
+        self._next = None
+
+    @property
+    def hz(self):
+        return 1.0 / self.period
+
+    def start(self):
+        self._tick = 0
+        self._next = self.clock()
+
+    def set_rate(self, hz):
+        """Cambia el ritmo sin saltos: el próximo deadline se recalcula desde ahora."""
+        self.period = 1.0 / float(hz)
+        self._next = self.clock() + self.period
+
+    def wait(self):
+        if self._next is None:
+            self.start()
+        now = self.clock()
+        if now < self._next:
+            self.sleep(self._next - now)
+            now = self.clock()
+        lateness = now - self._next
+        missed = 0
+        if self.policy == "skip" and lateness >= self.period:
+            missed = int(lateness // self.period)
+            self._next += missed * self.period
+            self._tick += missed
+            lateness = now - self._next
+        self.stats.record(now, lateness, missed)
+        k = self._tick
+        self._tick += 1
+        self._next += self.period
+        return k
@@ -0,0 +1,199 @@
+"""Generadores de paso vectorizados (swing + stance), reproducción por tiempo, modo en vivo y preflight memoizados."""
+import math
+import threading
+import time
+
+from ._lazy import np
+from .kinematics import preflight_traj, too_jerky
+from .memo import memoize
+
+SWING_SHAPES = ("Seno", "Cicloide", "Bézier")
+
+# Bézier de grado 5 en el swing: velocidad y aceleración nulas al despegar y al apoyar.
+_BEZ_X = (0.0, 0.0, 0.0, 1.0, 1.0, 1.0)
+_BEZ_Z = (0.0, 0.0, 1.6, 1.6, 0.0, 0.0)      # pico = 1 en s = 0.5
+
+def _bezier(s, ctrl):
+    n = len(ctrl) - 1
+    return sum(math.comb(n, k) * s**k * (1.0 - s)**(n - k) * c for k, c in enumerate(ctrl) if c)
+
+def swing_profile(s, shape="Seno"):
+    """(avance 0→1, altura 0→1→0) del pie en el aire para s ∈ [0, 1]."""
+    if shape == "Seno":
+        return s, np.sin(np.pi*s)
+    if shape == "Cicloide":
+        return s - np.sin(2*np.pi*s)/(2*np.pi), 0.5*(1.0 - np.cos(2*np.pi*s))
+    if shape == "Bézier":
+        return _bezier(s, _BEZ_X), _bezier(s, _BEZ_Z)
+    raise ValueError(f"forma de swing desconocida: {shape}")
+
+def check_duty(duty):
+    """`duty` como float; ValueError si no está en (0, 1) (con 0 o 1 el swing o el stance duran cero)."""
+    duty = float(duty)
+    if not 0.0 < duty < 1.0:
+        raise ValueError(f"duty tiene que estar entre 0 y 1 (sin incluirlos): {duty:g}")
+    return duty
+
+def step_profile(u, step_len, step_h, duty=0.5, shape="Seno"):
+    """Desplazamientos (dx, dz) del pie en la fase u ∈ [0, 1) del ciclo.
+
+    `duty` es la fracción del ciclo con el pie apoyado: el swing ocupa
+    [0, 1-duty) y el stance el resto, con el pie volviendo hacia atrás a
+    velocidad constante (z = 0). ValueError si no está en (0, 1).
+    """
+    duty = check_duty(duty)
+    u = np.mod(np.asarray(u, dtype=float), 1.0)
+    t_sw = 1.0 - duty
+    swing = u < t_sw
+    s_sw = np.where(swing, u / t_sw, 0.0)
+    s_st = np.where(swing, 0.0, (u - t_sw) / duty)
+    fx, fz = swing_profile(s_sw, shape)
+    dx = np.where(swing, -step_len/2 + step_len*fx, step_len/2 - step_len*s_st)
+    dz = np.where(swing, step_h*fz, 0.0)
+    return dx, dz
+
+@memoize(maxsize=16)
+def gait_cycle(x0, y0, z0, step_len, step_h, n, duty=0.5, shape="Seno", phase=0.0):
+    """Ciclo de `n` muestras empezando en la fase `phase`. Devuelve (x, y, z) de solo lectura."""
+    u = np.linspace(0, 1, n, endpoint=False) + phase
+    dx, dz = step_profile(u, step_len, step_h, duty, shape)
+    x_traj, y_traj, z_traj = x0 + dx, np.full(n, float(y0)), z0 + dz
+    for a in (x_traj, y_traj, z_traj):
+        a.flags.writeable = False
+    return x_traj, y_traj, z_traj
+
+def step_trajectory(x0, y0, z0, step_len, step_h, n):
+    """Ciclo de paso de `n` muestras: mitad swing (campana en z), mitad stance (z≈z0).
+
+    Devuelve (x, y, z) de solo lectura: el resultado se comparte entre reruns.
+    """
+    return gait_cycle(x0, y0, z0, step_len, step_h, n)
+
+def periodic_interp(table, u):
+    """Fila(s) de una tabla periódica (N, k) en la fase u ∈ [0, 1), con interpolación lineal.
+
+    La última muestra se une con la primera, así que el ciclo no tiene costura.
+    """
+    table = np.asarray(table, dtype=float)
+    pos = np.mod(np.asarray(u, dtype=float), 1.0) * len(table)
+    i0 = np.floor(pos).astype(int) % len(table)
+    frac = (pos - np.floor(pos))[..., None]
+    return table[i0] + (table[(i0 + 1) % len(table)] - table[i0]) * frac
+
+class CycleSampler:
+    """Reproduce una tabla precalculada por tiempo: fase = tiempo transcurrido / periodo.
+
+    El player pide `sample()` a su ritmo y recibe la fila interpolada en la fase
+    actual: el ciclo dura `period` s sea cual sea la resolución de la tabla o la
+    frecuencia de envío. Cambiar `period` en marcha no provoca saltos (la fase se
+    integra, igual que en `GaitStream`).
+    """
+
+    def __init__(self, table, period, clock=time.monotonic):
+        self.table = np.asarray(table, dtype=float)
+        if self.table.ndim != 2 or not len(self.table):
+            raise ValueError("se espera una tabla (N, k) no vacía")
+        self.clock = clock
+        self.period = float(period)
+        self._phase = 0.0
+        self._t_last = None
+
+    def sample(self, t=None):
+        """Fila (k,) de la tabla en el instante t (por defecto ahora); la primera llamada es la fase 0."""
+        t = self.clock() if t is None else t
+        if self._t_last is not None:
+            self._phase = (self._phase + max(0.0, t - self._t_last) / self.period) % 1.0
+        self._t_last = t
+        return periodic_interp(self.table, self._phase)
+
+    @property
+    def phase(self):
+        return self._phase
+
+class GaitStream:
+    """Paso generado en vivo: `sample(t)` evalúa el pie en el instante t.
+
+    La fase se integra con el periodo vigente (cambiar el periodo no provoca
+    saltos) y `update(...)` cambia cualquier parámetro en marcha: durante
+    `blend` segundos se mezcla suavemente el pie con los parámetros viejos y
+    nuevos, así que el player no se para ni recalcula tablas.
+    """
+    PARAMS = ("x0", "y0", "z0", "step_len", "step_h", "period", "duty", "shape")
+
+    def __init__(self, x0, y0, z0, step_len, step_h, period, duty=0.5, shape="Seno",
+                 blend=0.5, clock=time.monotonic):
+        self.clock = clock
+        self.blend = float(blend)
+        self._lock = threading.Lock()
+        self._new = dict(x0=float(x0), y0=float(y0), z0=float(z0), step_len=float(step_len),
+                         step_h=float(step_h), period=float(period), duty=check_duty(duty), shape=shape)
+        self._old = dict(self._new)
+        self._t_change = -math.inf
+        self._phase = 0.0
+        self._t_last = None
+
+    @property
+    def params(self):
+        with self._lock:
+            return dict(self._new)
+
+    def update(self, **params):
+        """Nuevos parámetros (los no dados se mantienen); se mezclan durante `blend` s."""
+        unknown = set(params) - set(self.PARAMS)
+        if unknown:
+            raise ValueError(f"parámetros desconocidos: {sorted(unknown)}")
+        if "duty" in params:
+            params["duty"] = check_duty(params["duty"])
+        with self._lock:
+            new = dict(self._new, **params)
+            if new == self._new:
+                return
+            now = self.clock()
+            self._old = self._mixed_params(now)
+            self._new = new
+            self._t_change = now
+
+    def _weight(self, t):
+        if self.blend <= 0: return 1.0
+        w = min(1.0, max(0.0, (t - self._t_change) / self.blend))
+        return w*w*(3.0 - 2.0*w)                       # smoothstep
+
+    def _mixed_params(self, t):
+        """Parámetros numéricos interpolados en t (la forma es la nueva al terminar la mezcla)."""
+        w = self._weight(t)
+        if w >= 1.0: return dict(self._new)
+        out = {k: (1 - w)*self._old[k] + w*self._new[k] for k in self.PARAMS if k != "shape"}
+        out["shape"] = self._new["shape"] if w >= 0.5 else self._old["shape"]
+        return out
+
+    def _foot(self, p, u):
+        dx, dz = step_profile(u, p["step_len"], p["step_h"], p["duty"], p["shape"])
+        return p["x0"] + float(dx), p["y0"], p["z0"] + float(dz)
+
+    def sample(self, t=None):
+        """(x, y, z) del pie en el instante t (por defecto ahora)."""
+        t = self.clock() if t is None else t
+        with self._lock:
+            w = self._weight(t)
+            period = (1 - w)*self._old["period"] + w*self._new["period"]
+            if self._t_last is not None:
+                self._phase = (self._phase + max(0.0, t - self._t_last) / period) % 1.0
+            self._t_last = t
+            u = self._phase
+            new = self._foot(self._new, u)
+            if w >= 1.0:
+                return new
+            old = self._foot(self._old, u)
+        return tuple((1 - w)*a + w*b for a, b in zip(old, new))
+
+    @property
+    def phase(self):
+        with self._lock:
+            return self._phase
+
+@memoize(maxsize=16)
+def preflight_report(L1,L2,L3, x_traj, y_traj, z_traj, safe_min, safe_max, knee_up=True, max_delta=8.0):
+    """(bad, spikes): puntos inválidos de `preflight_traj` y saltos de `too_jerky`."""
+    bad = preflight_traj(L1,L2,L3, x_traj, y_traj, z_traj, safe_min, safe_max, knee_up=knee_up)
+    spikes = too_jerky(x_traj, y_traj, z_traj, max_delta=max_delta)
+    return bad, spikes
@@ -0,0 +1,92 @@
+"""Subida de un ciclo completo al buffer del sketch y control de su reproducción.
+
+El host sube el ciclo una vez (en tramas de BUF_CHUNK muestras, cada una con su
+acuse `OK BUF i`) y después solo manda arranque, parada, ritmo y fase: el
+Arduino reproduce el buffer con su propio reloj, sin depender del USB.
+"""
+
+from ._lazy import np
+from .protocol import (
+    BUF_CHUNK, BUF_TICKS, XYZ_SCALE,
+    encode_buf_begin, encode_buf_data, encode_play, encode_stop, encode_rate, encode_phase,
+)
+from .trajectory import periodic_interp
+
+class UploadError(RuntimeError):
+    pass
+
+def resample_cycle(table, n):
+    """Remuestrea una tabla periódica (N, 3) a `n` filas con interpolación lineal."""
+    table = np.asarray(table, dtype=float)
+    if n == len(table):
+        return table
+    return periodic_interp(table, np.arange(n) / n)
+
+def xyz_to_buffer(x_traj, y_traj, z_traj):
+    """Tabla (N, 3) en décimas de mm para subir con kind=BUF_XYZ."""
+    return np.rint(np.stack([x_traj, y_traj, z_traj], axis=1) * XYZ_SCALE)
+
+class CycleUploader:
+    """Sube y controla el buffer de trayectoria del sketch a través de un `SerialLink`.
+
+    `capacity` es la que anuncia el sketch en `OK BIN v cap`; si el ciclo no cabe
+    se remuestrea a esa longitud (el periodo no cambia, solo la resolución).
+    `retries`: intentos por trama (al menos 1).
+    """
+
+    def __init__(self, link, capacity, timeout=0.5, retries=3):
+        if retries < 1:
+            raise ValueError(f"retries tiene que ser >= 1 (es {retries})")
+        self.link = link
+        self.capacity = int(capacity)
+        self.timeout = timeout
+        self.retries = retries
+        self.n = 0
+        self.kind = BUF_TICKS
+
+    def _request(self, frame, key, arg=None):
+        """Envía `frame` y espera `OK <key> [arg]`; reintenta si se pierde la respuesta."""
+        last = None
+        for _ in range(self.retries):
+            fut = self.link.send_frame(frame, key, arg, label=f"[{key}{'' if arg is None else ' ' + arg}]",
+                                       timeout=self.timeout)
+            try:
+                reply = fut.result(timeout=self.timeout + 0.5)
+            except Exception as e:
+                last = UploadError(f"sin respuesta ({key}): {e}")
+                continue
+            if not reply.ok:
+                raise UploadError(reply.line)
+            return reply.line
+        raise last
+
+    # ---- API ----
+    def upload(self, table, kind=BUF_TICKS):
+        """Sube `table` (N, 3 enteros: ticks o décimas de mm). Devuelve las muestras subidas."""
+        table = np.asarray(table)
+        if self.capacity and len(table) > self.capacity:
+            table = resample_cycle(table, self.capacity)
+        rows = np.rint(table).astype(int).tolist()
+        n = len(rows)
+        self._request(encode_buf_begin(n, kind), "BEGIN")
+        for i in range(0, n, BUF_CHUNK):
+            self._request(encode_buf_data(i, rows[i:i + BUF_CHUNK]), "BUF", str(i))
+        self.n, self.kind = n, kind
+        return n
+
+    def play(self, hz, phase=-1):
+        return self._request(encode_play(hz, phase), "PLAY")
+
+    def stop(self):
+        return self._request(encode_stop(), "STOP")
+
+    def set_rate(self, hz):
+        return self._request(encode_rate(hz), "RATE")
+
+    def set_phase(self, index):
+        return self._request(encode_phase(index), "PHASE")
+
+    def rate_for_period(self, period):
+        """Hz de reproducción para que las `n` muestras subidas duren `period` segundos."""
+        return self.n / float(period)
+
@@ -0,0 +1,111 @@
+"""Mapa del espacio de trabajo: rejilla de ocupación R–Z + huella X–Y, con consultas O(1)."""
+import math
+
+from ._lazy import np
+from .kinematics import SAFE_MIN, SAFE_MAX, fk_batch, ik_batch
+from .memo import memoize
+from .metrics import timed
+
+GRID = 160        # celdas por eje de las rejillas R–Z y X–Y
+
+class WorkspaceMap:
+    """Alcance de la pierna discretizado en rejillas.
+
+    - `rz_ok[k]` (k=0 knee-up, 1 knee-down): celdas (R, Z) cuyo centro tiene IK
+      dentro de límites de fémur/tibia. R es la distancia desde la bisagra del
+      fémur (R = hypot(x, y) - L1), igual que en la IK.
+    - `xy_ok`: huella en planta de los pies alcanzables para alguna Z y rama.
+    - `rz_counts` / `xy_counts`: histogramas de muestras FK (θ2 × θ3), útiles para
+      dibujar densidad con coste independiente del número de muestras.
+
+    La ocupación se calcula en los centros de celda, así que la respuesta de
+    `contains` es exacta salvo en el borde (±½ celda). Para una validación exacta
+    punto a punto usa `ik_batch`.
+    """
+
+    def __init__(self, L1,L2,L3, safe_min=SAFE_MIN, safe_max=SAFE_MAX, n2=120, n3=120, grid=GRID):
+        self.L = (L1, L2, L3)
+        self.safe_min = tuple(safe_min); self.safe_max = tuple(safe_max)
+        self.grid = grid
+        reach2 = L2 + L3
+        self.reach = L1 + reach2
+        # --- R–Z: R en [0, L2+L3], Z en [-(L2+L3), L2+L3]
+        self.r_edges = np.linspace(0.0, reach2, grid + 1)
+        self.z_edges = np.linspace(-reach2, reach2, grid + 1)
+        rc = 0.5*(self.r_edges[:-1] + self.r_edges[1:])
+        zc = 0.5*(self.z_edges[:-1] + self.z_edges[1:])
+        R, Z = np.meshgrid(rc, zc, indexing="ij")
+        # IK en el plano x=L1+R, y=0 (coxa a 0°, que no influye en fémur/tibia)
+        sol = ik_batch(L1,L2,L3, L1 + R, 0.0, Z, safe_min, safe_max)
+        lim_23 = ((safe_min[1] <= sol.t2) & (sol.t2 <= safe_max[1]) &
+                  (safe_min[2] <= sol.t3) & (sol.t3 <= safe_max[2]))
+        self.rz_ok = sol.reach & lim_23                       # (2, grid, grid)
+        self.rz_any = self.rz_ok.any(axis=0)
+        self.r_profile = self.rz_any.any(axis=1)               # R alcanzable para alguna Z
+        # --- X–Y: huella en planta a partir del perfil radial y del rango de coxa
+        self.xy_edges = np.linspace(-self.reach, self.reach, grid + 1)
+        xc = 0.5*(self.xy_edges[:-1] + self.xy_edges[1:])
+        X, Y = np.meshgrid(xc, xc, indexing="ij")
+        self.xy_ok = self._r_ok(np.hypot(X, Y) - L1, self.r_profile) & self._coxa_ok(X, Y)
+        # --- Nube FK (θ2 × θ3) para densidad/visualización
+        t2 = np.linspace(safe_min[1], safe_max[1], n2)
+        t3 = np.linspace(safe_min[2], safe_max[2], n3)
+        T2, T3 = np.meshgrid(t2, t3, indexing="ij")
+        xs, _, self.z_samples = fk_batch(L1,L2,L3, 0.0, T2, T3)
+        self.r_samples = xs - L1                               # R de cada muestra
+        self.rz_counts, _, _ = np.histogram2d(self.r_samples.ravel(), self.z_samples.ravel(),
+                                              bins=(self.r_edges, self.z_edges))
+        # densidad en planta: muestras por anillo R, repartidas sobre la huella
+        ir = np.clip(self._r_index(np.hypot(X, Y) - L1), 0, grid - 1)
+        self.xy_counts = np.where(self.xy_ok, self.rz_counts.sum(axis=1)[ir], 0.0)
+
+    # ---- índices de rejilla ----
+    def _r_index(self, r):
+        return np.floor((np.asarray(r) - self.r_edges[0]) * (self.grid / (self.r_edges[-1] - self.r_edges[0]))).astype(int)
+
+    def _z_index(self, z):
+        return np.floor((np.asarray(z) - self.z_edges[0]) * (self.grid / (self.z_edges[-1] - self.z_edges[0]))).astype(int)
+
+    def _r_ok(self, r, profile):
+        i = self._r_index(r)
+        inside = (i >= 0) & (i < self.grid)
+        return inside & profile[np.clip(i, 0, self.grid - 1)]
+
+    def _coxa_ok(self, x, y):
+        t1n = np.mod(np.degrees(np.arctan2(y, x)), 360.0)
+        return (self.safe_min[0] <= t1n) & (t1n <= self.safe_max[0])
+
+    # ---- consultas ----
+    def contains(self, x, y, z, knee_up=None):
+        """¿El pie (x,y,z) es alcanzable dentro de límites? O(1). knee_up=None: cualquier rama."""
+        t1n = math.degrees(math.atan2(y, x)) % 360.0
+        if not (self.safe_min[0] <= t1n <= self.safe_max[0]):
+            return False
+        r = math.hypot(x, y) - self.L[0]
+        g = self.grid
+        i = math.floor((r - self.r_edges[0]) * g / (self.r_edges[-1] - self.r_edges[0]))
+        j = math.floor((z - self.z_edges[0]) * g / (self.z_edges[-1] - self.z_edges[0]))
+        if not (0 <= i < g and 0 <= j < g):
+            return False
+        occ = self.rz_any if knee_up is None else self.rz_ok[0 if knee_up else 1]
+        return bool(occ[i, j])
+
+    def contains_batch(self, x, y, z, knee_up=None):
+        """Versión vectorizada de `contains` (máscara booleana)."""
+        x = np.asarray(x, dtype=float); y = np.asarray(y, dtype=float); z = np.asarray(z, dtype=float)
+        i = self._r_index(np.hypot(x, y) - self.L[0]); j = self._z_index(z)
+        inside = (i >= 0) & (i < self.grid) & (j >= 0) & (j < self.grid)
+        occ = self.rz_any if knee_up is None else self.rz_ok[0 if knee_up else 1]
+        hit = occ[np.clip(i, 0, self.grid - 1), np.clip(j, 0, self.grid - 1)]
+        return inside & hit & self._coxa_ok(x, y)
+
+    def coverage(self):
+        """Área (mm²) de la sección R–Z alcanzable."""
+        cell = (self.r_edges[1] - self.r_edges[0]) * (self.z_edges[1] - self.z_edges[0])
+        return float(self.rz_any.sum() * cell)
+
+@memoize(maxsize=8)
+@timed("spaider_workspace_seconds", "Barrido del workspace (fallos de caché)")
+def workspace_map(L1,L2,L3, safe_min=SAFE_MIN, safe_max=SAFE_MAX, n2=120, n3=120, grid=GRID):
+    """`WorkspaceMap` cacheado por geometría, límites y resolución."""
+    return WorkspaceMap(L1,L2,L3, safe_min, safe_max, n2, n3, grid)
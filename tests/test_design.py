@@ -0,0 +1,40 @@
+"""Barrido de geometrías: el pool da lo mismo que en serie y se cierra bien con la API de Python 3.8."""
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from spaider import design
+
+CANDS = design.candidates([45, 50], [80], [90, 100])
+
+class Py38Pool(ProcessPoolExecutor):
+    """`shutdown` con la firma de Python 3.8 (sin `cancel_futures`)."""
+
+    def shutdown(self, wait=True):
+        super().shutdown(wait)
+
+@pytest.fixture
+def py38(monkeypatch):
+    monkeypatch.setattr(design, "ProcessPoolExecutor", Py38Pool)
+
+def test_pool_igual_que_en_serie(py38):
+    serial = design.sweep(CANDS, workers=1)
+    assert design.sweep(CANDS, workers=2, chunksize=1) == serial
+    assert [(r["L1"], r["L3"]) for r in serial] == [(c.L1, c.L3) for c in CANDS]
+
+def test_error_del_progreso_no_se_tapa(py38):
+    def progress(i, n):
+        raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        design.sweep(CANDS, workers=2, chunksize=1, progress=progress)
+
+def test_cache_solo_calcula_lo_nuevo(tmp_path):
+    path = str(tmp_path / "cache.ndjson")
+    cache = design.SweepCache(path)
+    first = design.sweep(CANDS[:2], cache=cache, workers=1)
+    cache.close()
+    calls = []
+    cache = design.SweepCache(path)
+    again = design.sweep(CANDS, cache=cache, workers=1, progress=lambda i, n: calls.append(n))
+    cache.close()
+    assert again[:2] == first and calls == [2, 2]
@@ -0,0 +1,60 @@
+"""Periodo mínimo de `dynamic_report`: monótono, igual a la cota a mano en un seno y inf si no hay periodo posible."""
+import math
+
+import numpy as np
+import pytest
+
+from spaider.dynamics import MG996R, ServoModel, dynamic_report
+from spaider.kinematics import DEFAULT_L, fk_batch
+from spaider.trajectory import gait_cycle
+
+L = (DEFAULT_L["L1"], DEFAULT_L["L2"], DEFAULT_L["L3"])
+N, AMP, MARGIN = 200, 60.0, 0.8
+
+def _coxa_sine(amp=AMP, n=N):
+    """Pie que solo gira la coxa: t1 = amp·sen(2πu), fémur y tibia fijos."""
+    u = np.arange(n) / n
+    return fk_batch(*L, amp*np.sin(2*np.pi*u), 30.0, 60.0)
+
+@pytest.fixture(scope="module")
+def gait():
+    return gait_cycle(100.0, 10.0, 120.0, 40.0, 20.0, 100, 0.5, "Seno")
+
+def test_mas_lento_nunca_es_peor(gait):
+    t_min = dynamic_report(*L, *gait, 1.0).min_period
+    assert 0 < t_min < 10
+    prev = None
+    for T in t_min * np.array([0.5, 0.8, 0.95, 1.001, 1.5, 3.0]):
+        rep = dynamic_report(*L, *gait, T)
+        assert rep.min_period == pytest.approx(t_min)               # no depende del periodo pedido
+        if prev is not None:
+            assert set(rep.bad) <= set(prev.bad)
+            assert (rep.vel <= prev.vel).all() and (rep.acc <= prev.acc + 1e-9).all()
+        assert (rep.bad == []) == (T >= t_min), f"T = {T:.3f} s, mínimo {t_min:.3f} s"
+        prev = rep
+
+def test_cota_de_velocidad_a_mano():
+    rep = dynamic_report(*L, *_coxa_sine(), 1.0, foot_kg=0.0, margin=MARGIN)
+    # diferencias centradas de amp·sen(2πk/N): máximo amp·N·sen(2π/N) por unidad de fase
+    t_vel = AMP * N * math.sin(2*math.pi/N) / (MARGIN * MG996R.speed_dps)
+    assert rep.limit == ("coxa", "velocidad")
+    assert rep.min_period == pytest.approx(t_vel, rel=1e-9)
+    assert rep.vel[0] == pytest.approx(AMP * N * math.sin(2*math.pi/N), rel=1e-9)
+    assert rep.vel[1:] == pytest.approx([0.0, 0.0], abs=1e-6)
+
+def test_cota_de_aceleracion_a_mano():
+    fast = ServoModel("sin límite de velocidad", 1e9, 11.0, 6000.0)
+    rep = dynamic_report(*L, *_coxa_sine(), 1.0, fast, foot_kg=0.0, margin=MARGIN)
+    # α máx = amp·(2π/T)² → T = 2π·√(amp / α_max); el tick del player lo suaviza <1 %
+    assert rep.limit == ("coxa", "aceleración")
+    assert rep.min_period == pytest.approx(2*math.pi*math.sqrt(AMP / (MARGIN*fast.accel_dps2)), rel=0.01)
+
+def test_par_de_bloqueo_es_imposible(gait):
+    rep = dynamic_report(*L, *gait, 1.0, foot_kg=50.0)
+    assert rep.min_period == math.inf and rep.limit[1] == "par"
+    assert any(m.startswith("Par") for _, m in rep.bad)
+
+def test_aceleracion_inalcanzable_es_inf():
+    weak = ServoModel("sin fuerza", MG996R.speed_dps, 11.0, 1e-9)
+    rep = dynamic_report(*L, *_coxa_sine(), 1.0, weak, foot_kg=0.0)
+    assert rep.min_period == math.inf and rep.limit == ("coxa", "aceleración")
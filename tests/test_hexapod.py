@@ -0,0 +1,84 @@
+"""Hexápodo: trama CMD_HEX_TICKS de 39 bytes, canales por placa, montajes, ZERO/DIR por pata y trípode."""
+import math
+
+import numpy as np
+import pytest
+
+from spaider.emulator import EmulatedSerial, FirmwareEmulator
+from spaider.hexapod import DEFAULT_MOUNTS, N_LEGS, PCA_ADDRS, TRIPOD, Hexapod, leg_channels
+from spaider.kinematics import ticks_table
+from spaider.protocol import CMD_HEX_TICKS, HELLO_BIN, FrameDecoder, hex_ticks_frames
+
+REACH, Z0 = 130.0, 40.0
+ZERO = 90.0 + np.arange(18, dtype=float).reshape(N_LEGS, 3)         # calibración distinta en cada pata
+DIR = np.array([[1, -1, -1], [1, 1, -1], [-1, -1, 1], [1, -1, 1], [-1, 1, -1], [1, 1, 1]], dtype=float)
+
+@pytest.fixture(scope="module")
+def hexa():
+    return Hexapod(zero=ZERO, dir=DIR)
+
+@pytest.fixture(scope="module")
+def feet(hexa):
+    return hexa.gait(REACH, Z0, 30.0, 15.0, 40)
+
+@pytest.fixture(scope="module")
+def table(hexa, feet):
+    return hexa.ticks(*feet)
+
+def _leg_frame(m, x, y, z):
+    """Cuerpo → pata escrito a mano: trasladar al montaje y girar -yaw."""
+    c, s = math.cos(math.radians(m.yaw)), math.sin(math.radians(m.yaw))
+    dx, dy = np.asarray(x) - m.x, np.asarray(y) - m.y
+    return c*dx + s*dy, -s*dx + c*dy, np.asarray(z)
+
+def test_trama_de_39_bytes(table):
+    assert table.shape == (40, 18) and table.dtype == np.uint16
+    frames = hex_ticks_frames(table)
+    assert {len(f) for f in frames} == {39}
+    dec = FrameDecoder()
+    out = dec.feed(b"".join(frames))
+    assert dec.crc_errors == 0 and [c for c, _ in out] == [CMD_HEX_TICKS]*40
+    np.testing.assert_array_equal([v for _, v in out], table)
+
+def test_canales():
+    # pata i → placa i // 3, canales 3·(i % 3) … +2 (coxa, fémur, tibia), igual que setHexTicks()
+    assert leg_channels() == [(PCA_ADDRS[i // 3], 3*(i % 3) + j) for i in range(N_LEGS) for j in range(3)]
+    assert [m.name for m in DEFAULT_MOUNTS[:3]] == ["RF", "RM", "RR"]          # derecha en 0x40
+    assert all(m.y < 0 for m in DEFAULT_MOUNTS[:3]) and all(m.y > 0 for m in DEFAULT_MOUNTS[3:])
+
+def test_emulador_pone_cada_pata_en_su_canal(table):
+    ser = EmulatedSerial(emulator=FirmwareEmulator())
+    ser.write(f"{HELLO_BIN}\n".encode())
+    assert ser.readline().strip() == b"READY" and ser.readline().startswith(b"OK BIN")
+    for row in table[[0, 17]]:
+        ser.write(hex_ticks_frames(row[None])[0])
+        ser.flush()
+        for k, (addr, ch) in enumerate(leg_channels()):
+            assert ser.fw.pwm[16*PCA_ADDRS.index(addr) + ch] == row[k], f"pata {k // 3}, articulación {k % 3}"
+
+def test_cada_pata_como_la_pierna_sola(hexa, feet, table):
+    for i, m in enumerate(DEFAULT_MOUNTS):
+        xl, yl, zl = _leg_frame(m, feet[0][i], feet[1][i], feet[2][i])
+        leg = ticks_table(*hexa.L, xl, yl, zl, ZERO[i], DIR[i])
+        np.testing.assert_array_equal(table[:, 3*i:3*i + 3], leg, err_msg=m.name)
+
+def test_marcos(hexa, feet):
+    xl, yl, zl = hexa.to_leg(*feet)
+    for i, m in enumerate(DEFAULT_MOUNTS):
+        np.testing.assert_allclose(np.stack([xl[i], yl[i], zl[i]]),
+                                   np.stack(_leg_frame(m, feet[0][i], feet[1][i], feet[2][i])), atol=1e-9)
+    np.testing.assert_allclose(np.stack(hexa.to_body(xl, yl, zl)), np.stack(feet), atol=1e-9)
+    # en la postura neutra cada pata está estirada REACH mm en su propio eje
+    x0, y0, z0 = hexa.to_leg(*hexa.neutral_feet(REACH, Z0))
+    np.testing.assert_allclose(x0, REACH); np.testing.assert_allclose(y0, 0.0, atol=1e-9)
+    np.testing.assert_allclose(z0, Z0)
+
+def test_tripode(feet):
+    x, _, z = feet
+    a, b = [i for i in range(N_LEGS) if TRIPOD[i] == 0.0], [i for i in range(N_LEGS) if TRIPOD[i] == 0.5]
+    assert [DEFAULT_MOUNTS[i].name for i in a] == ["RF", "RR", "LM"]
+    up = z > Z0 + 1e-9
+    assert up[a].any() and up[b].any()
+    assert not (up[a].any(axis=0) & up[b].any(axis=0)).any()                # nunca en el aire a la vez
+    np.testing.assert_array_equal(up[a], up[[a[0]]*3])                       # cada trípode a la vez
+    np.testing.assert_allclose(np.roll(z[b[0]], 20), z[a[0]], atol=1e-9)     # medio ciclo de desfase
@@ -0,0 +1,73 @@
+"""IK/FK vectorizadas frente a las escalares, ida y vuelta FK→IK y máscaras de alcance y límites."""
+import numpy as np
+import pytest
+
+from spaider.kinematics import (DEFAULT_L, SAFE_MAX, SAFE_MIN, fk_batch, fk_xyz, ik_angles_variant, ik_batch,
+                                limits_mask)
+
+L1, L2, L3 = DEFAULT_L["L1"], DEFAULT_L["L2"], DEFAULT_L["L3"]
+
+def _grid():
+    """Rejilla que cruza el alcance: dentro, fuera, dentro de L1 y en los cuatro cuadrantes."""
+    v = np.linspace(-260.0, 260.0, 27)
+    return [a.ravel() for a in np.meshgrid(v, v, np.linspace(-200.0, 200.0, 21))]
+
+@pytest.mark.parametrize("knee_up", [True, False])
+def test_ik_batch_igual_que_escalar(knee_up):
+    x, y, z = _grid()
+    t1, t2, t3, reach, lim = ik_batch(L1, L2, L3, x, y, z).branch(knee_up)
+    ref = np.array([ik_angles_variant(L1, L2, L3, *p, knee_up=knee_up) for p in zip(x, y, z)])
+    np.testing.assert_allclose(np.stack([t1, t2, t3], axis=1), ref, atol=1e-9)
+    inside = np.array([all(lo <= a <= hi for a, lo, hi in zip((v[0] % 360, v[1], v[2]), SAFE_MIN, SAFE_MAX))
+                       for v in ref])
+    np.testing.assert_array_equal(lim, inside)
+    assert reach.any() and (~reach).any() and (~lim).any()
+    assert lim.any() == knee_up                      # con SAFE_MIN/SAFE_MAX la tibia nunca va en negativo
+
+def test_fk_batch_igual_que_escalar():
+    a = np.meshgrid(np.linspace(-170, 170, 9), np.linspace(-90, 90, 9), np.linspace(-170, 170, 9))
+    t1, t2, t3 = (v.ravel() for v in a)
+    ref = np.array([fk_xyz(L1, L2, L3, *t) for t in zip(t1, t2, t3)])
+    np.testing.assert_allclose(np.stack(fk_batch(L1, L2, L3, t1, t2, t3), axis=1), ref, atol=1e-9)
+
+@pytest.mark.parametrize("knee_up", [True, False])
+def test_ida_y_vuelta(knee_up):
+    a = np.meshgrid(np.linspace(-80, 80, 9), np.linspace(-60, 60, 9), np.linspace(10, 150, 9))
+    t1, t2, t3 = (v.ravel() for v in a)
+    if not knee_up:
+        t3 = -t3
+    x, y, z = fk_batch(L1, L2, L3, t1, t2, t3)
+    keep = np.hypot(x, y) - L1 > 1.0                # con el pie detrás del eje de coxa t1 gira 180°
+    sol = ik_batch(L1, L2, L3, x, y, z).branch(knee_up)
+    assert sol[3][keep].all()
+    np.testing.assert_allclose(np.stack(sol[:3], axis=1)[keep], np.stack([t1, t2, t3], axis=1)[keep], atol=1e-6)
+    np.testing.assert_allclose(np.stack(fk_batch(L1, L2, L3, *sol[:3]), axis=1)[keep],
+                               np.stack([x, y, z], axis=1)[keep], atol=1e-6)
+    assert keep.mean() > 0.75
+
+def test_alcance_en_los_bordes():
+    far, near = L1 + L2 + L3, L1 + abs(L2 - L3)     # |D| = 1: pierna estirada y plegada del todo
+    x = np.array([far, far + 1e-3, near, near - 1e-3, L1 - 1.0, L1 - 1.0])
+    z = np.array([0.0, 0.0, 0.0, 0.0, 100.0, 0.0])
+    sol = ik_batch(L1, L2, L3, x, np.zeros_like(x), z)
+    # dentro de L1 (rxy < 0) no hay solución aunque |D| quede dentro de 1 al acotar rxy a 0
+    np.testing.assert_array_equal(sol.reach, [True, False, True, False, False, False])
+
+def test_limites_en_los_bordes():
+    lo, hi = np.array(SAFE_MIN, dtype=float), np.array(SAFE_MAX, dtype=float)
+    assert limits_mask(*lo) and limits_mask(*hi)
+    for j in range(3):
+        for edge, out in ((lo, -np.inf), (hi, np.inf)):
+            t = edge.copy()
+            t[j] = np.nextafter(edge[j], out)
+            assert not limits_mask(*t), f"articulación {j} en {t}"
+    assert not limits_mask(-1e-9, 90.0, 90.0)        # t1 se envuelve a [0, 360): -1e-9 → ~360
+    assert limits_mask(-180.0, 90.0, 90.0)            # -180 ≡ 180
+
+def test_limites_de_coxa_desde_ik():
+    r, _, z = fk_xyz(L1, L2, L3, 0.0, 20.0, 40.0)    # fémur y tibia bien dentro de sus límites
+    x = np.array([r, r, -r, -r])
+    y = np.array([0.0, -1e-6, 1e-6, -1e-6])          # coxa en 0°, -0°…, 180°-… y -180°+… (≡ 180°+…)
+    sol = ik_batch(L1, L2, L3, x, y, np.full(4, z))
+    assert sol.reach.all()
+    np.testing.assert_array_equal(sol.limits[0], [True, False, True, False])
@@ -0,0 +1,18 @@
+"""Importar el paquete no carga NumPy ni matplotlib: llegan con el primer cálculo que los usa."""
+import subprocess
+import sys
+
+PROBE = """
+import importlib, pkgutil, sys, spaider
+for m in pkgutil.iter_modules(spaider.__path__):
+    if m.name != "__main__":
+        importlib.import_module("spaider." + m.name)
+print(sorted(k for k in ("numpy", "matplotlib") if k in sys.modules))
+from spaider.kinematics import ik_batch
+ik_batch(50, 80, 100, [120.0], [40.0], [-60.0])
+print("numpy" in sys.modules)
+"""
+
+def test_importar_no_carga_numpy():
+    out = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True).stdout
+    assert out.split("\n")[:2] == ["[]", "True"]
@@ -0,0 +1,159 @@
+"""SerialLink contra el firmware emulado: respuestas, cola con prioridad y E-STOP."""
+import math
+import threading
+import time
+
+import pytest
+
+from spaider.emulator import BOARDS, LEG_CH, EmulatedSerial, FirmwareEmulator
+from spaider.link import LinkBusy, Preempted, SerialLink
+from spaider.protocol import HELLO_BIN, encode_ticks
+
+def _link(baud=115200, **kw):
+    ser = EmulatedSerial(emulator=FirmwareEmulator(), baudrate=baud)
+    link = SerialLink(ser, **kw).start()
+    assert link.send(HELLO_BIN).result(timeout=2).ok
+    return link
+
+@pytest.fixture
+def link():
+    link = _link()
+    yield link
+    link.close()
+
+def _wait(cond, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "no ha pasado a tiempo"
+        time.sleep(0.002)
+
+def _free_slots(link):
+    return link._slots._value
+
+def _off_time(fw):
+    """Instante emulado en que se escribió el último OFF (los 32 canales a 0 seguidos)."""
+    w = list(fw.writes)
+    for i in range(len(w) - 16*BOARDS, -1, -1):
+        if all(v == 0 for _, _, v in w[i:i + 16*BOARDS]):
+            return w[i][0], w[i + 16*BOARDS:]
+    return None, []
+
+def test_respuesta_y_latencia(link):
+    r = link.send("XYZ 120 40 -60").result(timeout=1)
+    assert r.ok and r.line == "OK XYZ" and 0 < r.latency < 0.1
+    assert link.in_flight == 0 and _free_slots(link) == link.window
+
+def test_off_por_delante_del_movimiento():
+    link = _link(baud=9600)                    # a 9600 cada trama tarda ~9 ms: el movimiento se acumula
+    try:
+        fates = []
+        for i in range(40):
+            link.send_raw(encode_ticks(300 + i, 310, 320), on_wire=fates.append)
+        assert link._motion > 0
+        done = link.estop()
+        dt = done.result(timeout=1)
+        link.drain()
+        _wait(lambda: len(fates) == 40)
+        assert dt < 0.1
+        assert any(math.isnan(t) for t in fates[-link.motion_depth:])     # lo que seguía en cola se descarta
+        _wait(lambda: link.ser.fw.RUN is False)
+        t_off, after = _off_time(link.ser.fw)
+        assert t_off is not None and after == []                          # nada movió un servo después del OFF
+    finally:
+        link.close()
+
+def test_comandos_en_cola_preempted(link):
+    with link.lock:                            # el escritor se queda parado en el primer comando
+        futs = [link.send(f"XYZ 120 40 {-60 - i}") for i in range(4)]
+        _wait(lambda: len(link._q) == 3)
+        done = link.estop()
+    assert done.result(timeout=1) >= 0
+    assert futs[0].result(timeout=1).ok           # ya estaba saliendo cuando llegó el E-STOP
+    for f in futs[1:]:
+        with pytest.raises(Preempted):
+            f.result(timeout=1)
+    _wait(lambda: link.in_flight == 0)
+    assert _free_slots(link) == link.window
+    _wait(lambda: link.ser.fw.RUN is False)
+
+def test_movimiento_retenido_hasta_resume(link):
+    link.estop().result(timeout=1)
+    _wait(lambda: link.ser.fw.RUN is False)
+    fates = []
+    assert link.send_raw(encode_ticks(300, 310, 320), on_wire=fates.append) is False
+    assert len(fates) == 1 and math.isnan(fates[0])
+    assert link.send("CENTER").result(timeout=1).ok        # los comandos sí pasan
+    link.resume()
+    assert link.send_raw(encode_ticks(301, 311, 321), on_wire=fates.append) is True
+    _wait(lambda: link.ser.fw.joint_ticks() == (301, 311, 321))
+    assert not math.isnan(fates[1])
+
+@pytest.mark.parametrize("baud, limit", [(115200, 0.01), (9600, 0.12)])
+def test_latencia_estop_con_movimiento_continuo(baud, limit):
+    link = _link(baud=baud)
+    stop = threading.Event()
+
+    def stream():
+        i = 0
+        while not stop.is_set():
+            link.send_raw(encode_ticks(300 + i % 50, 310, 320)); i += 1
+            time.sleep(0.002)                  # 500 Hz: más de lo que cabe en la línea
+    th = threading.Thread(target=stream, daemon=True); th.start()
+    try:
+        worst = 0.0
+        for _ in range(5):
+            time.sleep(0.15)
+            worst = max(worst, link.estop().result(timeout=1))
+            link.resume()
+        assert worst < limit, f"E-STOP a {baud}: {worst*1e3:.1f} ms"
+        assert link.estop_worst == pytest.approx(worst)
+    finally:
+        stop.set(); th.join()
+        link.close()
+
+def test_estop_tras_caducar_un_comando_en_cola(link):
+    # dos comandos sin escribir caducan (el lector libera sus huecos) y luego llega el E-STOP:
+    # no puede liberarlos otra vez ni dejar de mandar el OFF
+    with link.lock:
+        f1 = link.send("CENTER", timeout=0.05)
+        f2 = link.send("XYZ 120 40 -60", timeout=0.05)
+        _wait(lambda: f1.done() and f2.done())
+        assert isinstance(f2.exception(), TimeoutError)
+        done = link.estop()
+    assert done.result(timeout=1) >= 0
+    _wait(lambda: link.ser.fw.RUN is False)
+    assert _free_slots(link) == link.window and link.in_flight == 0
+    assert all(c[0] != 1 for c in link._q)        # el comando caducado no se escribe después
+
+def test_error_de_escritura_tras_caducar(link):
+    with link.lock:
+        f = link.send("CENTER", timeout=0.05)
+        _wait(f.done)
+        link.ser.close()                          # la escritura pendiente falla ya sin dueño
+    link.drain()
+    time.sleep(0.05)
+    assert isinstance(f.exception(), TimeoutError)
+    assert _free_slots(link) == link.window
+    assert link._writer_thread.is_alive()
+
+def test_callback_que_falla_no_para_al_escritor(link):
+    def boom(t): raise RuntimeError("callback roto")
+    link.send_raw(encode_ticks(300, 310, 320), on_wire=boom)
+    assert link.estop().result(timeout=1) >= 0
+    assert link._writer_thread.is_alive()
+
+def test_ventana_llena(monkeypatch):
+    link = _link(window=2, timeout=0.05)
+    try:
+        monkeypatch.setattr(link.ser.fw, "_line", lambda cmd: [])     # el sketch deja de contestar
+        link.send("CENTER"); link.send("CENTER")
+        with pytest.raises(LinkBusy):
+            link.send("CENTER")
+    finally:
+        link.close()
+
+def test_canales_de_la_pierna_a_cero_tras_estop(link):
+    link.send("XYZ 120 40 -60").result(timeout=1)
+    assert all(link.ser.fw.pwm[ch] for ch in LEG_CH)
+    link.estop().result(timeout=1)
+    _wait(lambda: not any(link.ser.fw.pwm))
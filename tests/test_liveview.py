@@ -0,0 +1,74 @@
+"""Vista en vivo: figura y líneas creadas una vez, fondo guardado, memoria acotada y poses bien decodificadas."""
+import numpy as np
+import pytest
+
+from spaider.calibration import DEFAULT_DIR, DEFAULT_ZERO
+from spaider.kinematics import DEFAULT_L, ik_angles_variant, ticks_table, ticks_to_mech
+from spaider.liveview import PoseTap, message_joints
+from spaider.plots import leg_points
+from spaider.protocol import encode_ticks, encode_xyz
+
+pytest.importorskip("matplotlib")
+
+L = (DEFAULT_L["L1"], DEFAULT_L["L2"], DEFAULT_L["L3"])
+
+def _view(**kw):
+    from spaider.liveview import LiveLegView
+    return LiveLegView(L, DEFAULT_ZERO, DEFAULT_DIR, figsize=(4, 2), **kw)
+
+def _xyz(i):
+    return encode_xyz(110.0 + i % 20, 30.0, 60.0)
+
+def test_pose_tap_acotado():
+    tap = PoseTap(maxlen=5)
+    for i in range(12):
+        tap(b"READY\n")
+    assert len(tap.frames) == 5 and [f[0] for f in tap.since(9)] == [10, 11, 12]
+    assert [f[0] for f in tap.since(0)] == [8, 9, 10, 11, 12]
+
+def test_decodifica_xyz_y_ticks():
+    q = message_joints(encode_xyz(120.0, 40.0, 60.0), L, DEFAULT_ZERO, DEFAULT_DIR)
+    assert q == pytest.approx(ik_angles_variant(*L, 120.0, 40.0, 60.0))
+    ticks = ticks_table(*L, [120.0], [40.0], [60.0], DEFAULT_ZERO, DEFAULT_DIR)[0]
+    q = message_joints(encode_ticks(*ticks.tolist()), L, DEFAULT_ZERO, DEFAULT_DIR)
+    assert q == pytest.approx(ticks_to_mech(ticks, DEFAULT_ZERO, DEFAULT_DIR).tolist())
+    assert message_joints(b"READY\n", L, DEFAULT_ZERO, DEFAULT_DIR) is None
+
+def test_reutiliza_figura_y_lineas():
+    view, tap = _view(trail=16), PoseTap()
+    fig, artists = view.fig, view._artists
+    lines = [len(ax.lines) for ax in fig.axes]
+    draws = []
+    real_draw = view.canvas.draw
+    view.canvas.draw = lambda: (draws.append(1), real_draw())[1]
+    for i in range(40):
+        tap(_xyz(i)); tap(b"READY\n")
+        img = view.render(tap)
+    assert view.fig is fig and view._artists == artists and [len(ax.lines) for ax in fig.axes] == lines
+    assert len(fig.axes) == 2 and len(draws) == 1                 # el fondo se pinta y se guarda una vez
+    assert view.redraws == 40 and view.frames == 40
+    assert len(view._trail) == 16                                 # la estela no crece
+    assert img.shape[2] == 4 and img.dtype == np.uint8
+    (xs, ys), (rs, zs) = leg_points(*L, *view.joints)
+    np.testing.assert_allclose(view._top_leg.get_data(), (xs, ys))
+    np.testing.assert_allclose(view._side_leg.get_data(), (rs, zs))
+    assert view.joints == pytest.approx(ik_angles_variant(*L, *[v / 10 for v in (1290, 300, 600)]))
+
+def test_sin_mensajes_nuevos_devuelve_la_misma_imagen():
+    view, tap = _view(), PoseTap()
+    tap(_xyz(0))
+    first = view.render(tap)
+    assert view.render(tap) is first and view.redraws == 1
+    tap(b"READY\n")                                               # no mueve la pierna
+    assert view.render(tap) is first and view.redraws == 1
+    tap(_xyz(5))
+    second = view.render(tap)
+    assert second is not first and view.redraws == 2 and not np.array_equal(second, first)
+
+def test_mensajes_caidos_del_anillo():
+    view, tap = _view(), PoseTap(maxlen=4)
+    for i in range(10):
+        tap(_xyz(i))
+    view.render(tap)
+    assert view.frames == 4 and view._seq == 10                   # solo ve los que siguen en el anillo
+    assert view.age() is not None and view.age() >= 0
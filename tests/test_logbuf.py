@@ -0,0 +1,94 @@
+"""RingLog acotado, rotación de RotatingNDJSON y lectura desde el final con tail_ndjson."""
+import json
+import os
+import threading
+
+import pytest
+
+from spaider.logbuf import EVENT, RingLog, RotatingNDJSON, format_record, tail_ndjson
+
+def _files(path):
+    return sorted(p for p in os.listdir(os.path.dirname(path)) if p.startswith(os.path.basename(path)))
+
+def test_anillo_acotado():
+    log = RingLog(capacity=8, clock=lambda: 1.0)
+    for i in range(20):
+        log.add("→", f"XYZ {i} 0 0", lat=0.002 if i % 2 else None)
+    assert len(log) == 8 and log.seq == 20
+    assert [r.seq for r in log.tail(3)] == [18, 19, 20]
+    assert [r.seq for r in log.since(17)] == [18, 19, 20]
+    assert [r.seq for r in log.since(0)] == list(range(13, 21))          # lo anterior ya salió del anillo
+    assert log.tail(0) == []
+    r = log.append("[PLAY] hilo en marcha")
+    assert r.direction == EVENT and r.cmd == "PLAY" and log.tail(1)[0].cmd == "PLAY"
+    assert [r.cmd for r in log.tail(2, skip_cmds=("PLAY",))] == ["XYZ", "XYZ"]
+    assert format_record(log.tail(2)[0], t0=0.5).endswith("XYZ 19 0 0  (2.0 ms)")
+
+def test_hilos_a_la_vez():
+    log = RingLog(capacity=64)
+    def work(k):
+        for i in range(500):
+            log.add("←", f"OK {k} {i}")
+    threads = [threading.Thread(target=work, args=(k,)) for k in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    seqs = [r.seq for r in log.tail(64)]
+    assert log.seq == 2000 and len(log) == 64 and seqs == list(range(1937, 2001))
+
+def test_rotacion(tmp_path):
+    path = str(tmp_path / "log.ndjson")
+    w = RotatingNDJSON(path, max_bytes=200, backups=2)
+    for i in range(30):
+        w.write([json.dumps({"i": i, "text": "→ ñ"}, ensure_ascii=False) + "\n"])
+    w.close()
+    assert _files(path) == ["log.ndjson", "log.ndjson.1", "log.ndjson.2"]          # nunca más de `backups`
+    for name in _files(path):
+        assert os.path.getsize(tmp_path / name) <= 200                           # en bytes, no en caracteres
+    chain = [json.loads(l)["i"] for name in ("log.ndjson.2", "log.ndjson.1", "log.ndjson")
+             for l in open(tmp_path / name, encoding="utf-8")]
+    assert chain == list(range(chain[0], 30))                                    # en orden y sin huecos
+
+def test_limite_en_bytes(tmp_path):
+    path = str(tmp_path / "log.ndjson")
+    line = '{"text": "→→→→"}\n'                   # 17 caracteres, 25 bytes
+    w = RotatingNDJSON(path, max_bytes=2*len(line.encode("utf-8")) - 1, backups=1)
+    w.write([line]); w.write([line])
+    w.close()
+    assert [os.path.getsize(tmp_path / n) for n in _files(path)] == [25, 25]
+
+def test_sin_copias(tmp_path):
+    path = str(tmp_path / "log.ndjson")
+    w = RotatingNDJSON(path, max_bytes=50, backups=0)
+    for i in range(10):
+        w.write([f'{{"i": {i}}}\n'])
+    w.close()
+    assert _files(path) == ["log.ndjson"]
+
+def test_volcado_a_disco(tmp_path):
+    path = str(tmp_path / "log.ndjson")
+    log = RingLog(capacity=16, path=path, flush_interval=60.0)
+    for i in range(10):
+        log.add("→", f"T {i} 0 0", lat=0.001)
+    log.close()
+    recs = [json.loads(l) for l in open(path, encoding="utf-8")]
+    assert [r["seq"] for r in recs] == list(range(1, 11))
+    assert recs[0]["dir"] == "→" and recs[0]["cmd"] == "T" and recs[0]["lat"] == 0.001
+
+def test_disco_lento_no_crece(tmp_path):
+    log = RingLog(capacity=4, path=str(tmp_path / "log.ndjson"), flush_interval=60.0)
+    for i in range(10):
+        log.add("→", str(i))
+    assert log.dropped == 6
+    log.close()
+    assert [r["text"] for r in tail_ndjson(str(tmp_path / "log.ndjson"), 10)] == ["6", "7", "8", "9"]
+
+@pytest.mark.parametrize("block", [7, 64, 8192])
+def test_tail_ndjson(tmp_path, block):
+    path = tmp_path / "log.ndjson"
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(100):
+            f.write(json.dumps({"i": i, "text": "x" * (i % 13)}) + "\n")
+        f.write('{"i": 100, "tex')                                               # a medio escribir
+    assert [r["i"] for r in tail_ndjson(str(path), 5, block)] == [96, 97, 98, 99]
+    assert [r["i"] for r in tail_ndjson(str(path), 200, block)] == list(range(100))
+    assert tail_ndjson(str(path), 0, block) == []
@@ -0,0 +1,69 @@
+"""IK en punto fijo (`ik_lut.h`): error frente a la IK en float y mismo resultado al compilar el .h."""
+import math
+import shutil
+
+import numpy as np
+import pytest
+
+from spaider import lutgen
+from spaider.kinematics import DEFAULT_L, SAFE_MAX, SAFE_MIN
+
+L = (DEFAULT_L["L1"], DEFAULT_L["L2"], DEFAULT_L["L3"])
+
+@pytest.fixture(scope="module")
+def params():
+    return lutgen.fixed_params(*L)
+
+@pytest.fixture(scope="module")
+def result(params):
+    return lutgen.check(*L, SAFE_MIN, SAFE_MAX, 41, params)
+
+def test_error_dentro_de_tolerancia(result):
+    assert result.n > 60000
+    assert result.err.max() <= lutgen.TOLERANCE, f"peor en {result.worst} mm: {result.err}"
+
+def test_cabecera_al_dia(params, result):
+    with open(lutgen.HEADER_FILE, encoding="utf-8") as f:
+        assert f.read() == lutgen.header(params, SAFE_MIN, SAFE_MAX, result), \
+            "ik_lut.h no corresponde a la geometría por defecto; regenera con python -m spaider.lutgen"
+
+def test_cli_check():
+    assert lutgen.main(["--check"]) == 0
+
+@pytest.mark.skipif(shutil.which("c++") is None, reason="sin compilador C++")
+def test_compilado_igual_que_en_python(params, result):
+    pts = lutgen.workspace_points(*L, SAFE_MIN, SAFE_MAX, 41)
+    bad = lutgen.check_compiled(params, lutgen.header(params, SAFE_MIN, SAFE_MAX, result), pts, "c++")
+    assert len(bad) == 0, f"{len(bad)} puntos distintos, p. ej. {pts[bad[:5]].tolist()}"
+
+def test_geometria_demasiado_grande():
+    with pytest.raises(ValueError):
+        lutgen.fixed_params(2000.0, 3000.0, 3000.0)
+
+FAR = [(32767, 0, 0), (-32768, -32768, -32768), (5000, 2000, -100), (2301, 0, 0), (0, 0, -2301),
+       (3000, -3000, 1500), (-4000, 10, 2300), (2300, 2300, 2300)]
+
+def test_fuera_de_rango_se_acerca_en_la_misma_direccion(params):
+    cx, fm, tb = lutgen.ik_fixed(params, *np.array(FAR).T)
+    C = params.max_coord
+    for (x, y, z), got in zip(FAR, zip(cx, fm, tb)):
+        m = max(abs(x), abs(y), abs(z))
+        near = [int(math.copysign(abs(v) * C // m, v)) for v in (x, y, z)] if m > C else [x, y, z]
+        assert list(got) == [int(v[0]) for v in lutgen.ik_fixed(params, *([v] for v in near))]
+        assert abs(got[0] / 100 - math.degrees(math.atan2(y, x))) < 0.05      # misma coxa
+        assert abs(got[2]) <= 1                                                 # pierna estirada
+
+def test_emulador_satura_en_vez_de_descartar():
+    from spaider.emulator import FirmwareEmulator
+    fw = FirmwareEmulator()
+    fw._line("XYZ 120 40 60")
+    before = fw.joint_ticks()
+    assert fw._line("XYZ 900 300 -50") == ["OK XYZ"] and fw.joint_ticks() != before
+    far = fw.joint_ticks()
+    fw._line("XYZ 120 40 60"); fw._line("XYZ 230 76.6 -12.7")                   # (9000, 3000, -500)·2300/9000
+    assert fw.joint_ticks() == far
+
+@pytest.mark.skipif(shutil.which("c++") is None, reason="sin compilador C++")
+def test_compilado_fuera_de_rango(params, result):
+    bad = lutgen.check_compiled(params, lutgen.header(params, SAFE_MIN, SAFE_MAX, result), FAR, "c++")
+    assert len(bad) == 0, f"distintos: {[FAR[i] for i in bad]}"
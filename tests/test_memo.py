@@ -0,0 +1,62 @@
+"""memoize: clave por valor (listas, arrays, kwargs), expulsión LRU y registro con stats/clear_all."""
+import numpy as np
+import pytest
+
+from spaider import memo
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(memo, "_REGISTRY", {})      # las cachés de los módulos no se tocan
+    return memo._REGISTRY
+
+def _counted(maxsize=2, name=None):
+    calls = []
+
+    @memo.memoize(maxsize, name)
+    def f(*args, **kwargs):
+        calls.append((args, kwargs))
+        return len(calls)
+    return f, calls
+
+def test_expulsion_lru():
+    f, calls = _counted(maxsize=2)
+    f(1); f(2)
+    f(1)                                    # acierto: 1 pasa a ser el más reciente
+    f(3)                                    # expulsa 2, no 1
+    assert len(calls) == 3 and f.memo.info() == {"hits": 1, "misses": 3, "size": 2, "maxsize": 2}
+    f(1)
+    assert len(calls) == 3
+    f(2)
+    assert len(calls) == 4 and calls[-1] == ((2,), {})
+
+def test_clave_por_valor():
+    f, calls = _counted(maxsize=8)
+    assert f([1, 2], k=(3, 4)) == f((1, 2), k=[3, 4])           # listas y tuplas, igual
+    assert f(a=1, b=2) == f(b=2, a=1)                           # orden de kwargs, igual
+    assert f(np.float64(2.0)) == f(2.0)
+    x = np.arange(6.0).reshape(2, 3)
+    assert f(x) == f(x.copy())
+    assert f(x.reshape(3, 2)) != f(x)                           # la forma cuenta…
+    assert f(x.astype(np.float32)) != f(x)                      # …y el dtype
+    n = len(calls)
+    x[0, 0] = 99.0                                              # el array cambió: no vale la entrada vieja
+    f(x)
+    assert len(calls) == n + 1
+
+def test_registro_stats_y_clear_all(registry):
+    f, _ = _counted(maxsize=4, name="prueba.f")
+    g, _ = _counted(maxsize=4)
+    f(1); f(1); g(1)
+    assert set(registry) == {"prueba.f", "test_memo.f"}
+    assert memo.stats()["prueba.f"] == {"hits": 1, "misses": 1, "size": 1, "maxsize": 4}
+    memo.clear_all()
+    assert all(s["size"] == 0 and s["hits"] == s["misses"] == 0 for s in memo.stats().values())
+    f(1)
+    assert f.memo.info()["misses"] == 1                         # tras limpiar se vuelve a calcular
+
+def test_cachea_la_ik():
+    from spaider.kinematics import ik_solution
+    ik_solution.memo.clear()
+    a = ik_solution(50.0, 80.0, 100.0, 120.0, 40.0, 60.0)
+    b = ik_solution(50.0, 80.0, 100.0, 120.0, 40.0, 60.0)
+    assert a == b and ik_solution.memo.info()["hits"] == 1
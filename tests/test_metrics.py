@@ -0,0 +1,82 @@
+"""Contadores, cubos de los histogramas (semántica `le` de Prometheus) y formato de texto de Prometheus."""
+import os
+
+import pytest
+
+from spaider.metrics import Histogram, Registry, Timer
+
+@pytest.fixture
+def reg():
+    return Registry()
+
+def test_cubos_acumulados(reg):
+    h = reg.histogram("lat_seconds", "Latencia", buckets=(0.001, 0.01, 0.1))
+    for v in (0.0005, 0.001, 0.002, 0.01, 0.05, 0.5, 3.0):
+        h.observe(v)
+    s = h.snapshot()
+    # `le` incluye el borde: 0.001 cuenta en le="0.001" y 0.01 en le="0.01"
+    assert s["buckets"] == {"0.001": 2, "0.01": 4, "0.1": 5, "+Inf": 7}
+    assert s["count"] == 7 and s["sum"] == pytest.approx(3.5635) and s["max"] == 3.0
+    assert s["p50"] == pytest.approx(0.01)
+
+def test_ventana_de_percentiles():
+    h = Histogram("w_seconds", (), window=4)
+    for v in (10.0, 1.0, 1.0, 1.0, 1.0):
+        h.observe(v)
+    s = h.snapshot()
+    assert s["p99"] == pytest.approx(1.0) and s["max"] == 10.0 and s["count"] == 5   # el total no olvida
+
+def test_registro_por_nombre_y_etiquetas(reg):
+    a = reg.counter("tx_total", "Tramas", cmd="XYZ")
+    assert reg.counter("tx_total", cmd="XYZ") is a and reg.counter("tx_total", cmd="T") is not a
+    with pytest.raises(TypeError):
+        reg.histogram("tx_total", cmd="XYZ")
+    a.inc(); a.inc(2)
+    h = reg.histogram("rtt_seconds")
+    h.observe(0.2)
+    reg.reset()
+    assert a.value == 0 and h.count == 0 and h.snapshot()["buckets"]["+Inf"] == 0
+    assert reg.counter("tx_total", cmd="XYZ") is a                    # sigue registrado
+
+def test_prometheus(reg):
+    reg.counter("spaider_tx_total", "Tramas enviadas", cmd="XYZ").inc(3)
+    reg.counter("spaider_tx_total", "Tramas enviadas", cmd='T "raw"\n').inc()
+    h = reg.histogram("spaider_rtt_seconds", "Ida y vuelta", buckets=(0.01, 0.1), port="COM3")
+    h.observe(0.005); h.observe(0.05); h.observe(1.0)
+    lines = reg.to_prometheus().splitlines()
+    assert lines.count("# TYPE spaider_tx_total counter") == 1                 # HELP/TYPE una vez por nombre
+    assert lines.count("# HELP spaider_tx_total Tramas enviadas") == 1
+    assert 'spaider_tx_total{cmd="XYZ"} 3.0' in lines
+    assert 'spaider_tx_total{cmd="T \\"raw\\"\\n"} 1.0' in lines
+    assert "# TYPE spaider_rtt_seconds histogram" in lines
+    i = lines.index('spaider_rtt_seconds_bucket{port="COM3",le="0.01"} 1')
+    assert lines[i:i + 5] == ['spaider_rtt_seconds_bucket{port="COM3",le="0.01"} 1',
+                              'spaider_rtt_seconds_bucket{port="COM3",le="0.1"} 2',
+                              'spaider_rtt_seconds_bucket{port="COM3",le="+Inf"} 3',
+                              'spaider_rtt_seconds_sum{port="COM3"} 1.055',
+                              'spaider_rtt_seconds_count{port="COM3"} 3']
+
+def test_valores_no_finitos(reg):
+    reg.counter("inf_total").inc(float("inf"))
+    reg.counter("nan_total").inc(float("nan"))
+    text = reg.to_prometheus()
+    assert "inf_total +Inf" in text and "nan_total NaN" in text
+
+def test_fichero_atomico(reg, tmp_path):
+    reg.counter("a_total").inc()
+    path = str(tmp_path / "spaider.prom")
+    reg.write_prometheus(path)
+    assert open(path, encoding="utf-8").read() == reg.to_prometheus()
+    assert os.listdir(tmp_path) == ["spaider.prom"]                         # sin .tmp a medias
+
+def test_timer(reg):
+    h = reg.histogram("t_seconds")
+    with Timer(h):
+        pass
+
+    @Timer(h)
+    def boom():
+        raise RuntimeError
+    with pytest.raises(RuntimeError):
+        boom()
+    assert h.count == 2 and 0 <= h.max < 0.1                                    # también cuenta si falla
@@ -0,0 +1,136 @@
+"""Tramas binarias: ida y vuelta, saturación, CRC y resincronización (sin hardware)."""
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from spaider import protocol as P
+from spaider.emulator import EmulatedSerial, FirmwareEmulator
+
+SKETCH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      "spAiderArduino", "spAiderArduino.ino")
+COMMANDS = [v for k, v in vars(P).items() if k.startswith("CMD_") and isinstance(v, int)]
+
+# vector fijo: el sketch tiene que dar lo mismo (CRC-8 poly 0x07 de "123456789" = 0xF4)
+CRC_VECTORS = [(b"123456789", 0xF4), (b"", 0x00), (b"\x01\x0a\x00\x14\x00\x1e\x00", 0x7C)]
+XYZ_FRAME = bytes.fromhex("a5 01 b0 04 90 01 a8 fd 69")     # encode_xyz(120, 40, -60)
+
+def test_todos_los_comandos_tienen_nombre():
+    assert sorted(COMMANDS) == sorted(P.CMD_NAMES)
+
+@pytest.mark.parametrize("cmd", COMMANDS, ids=lambda c: P.CMD_NAMES[c])
+def test_ida_y_vuelta(cmd):
+    n = P.payload_words(cmd)
+    vals = tuple((-1)**i * (1000*i + 7) for i in range(n - 2)) + (P.INT16_MIN, P.INT16_MAX)
+    frame = P.encode_frame(cmd, *vals)
+    assert len(frame) == P.frame_len(cmd)
+    assert P.decode_frame(frame) == (cmd, vals)
+
+@pytest.mark.parametrize("cmd", COMMANDS, ids=lambda c: P.CMD_NAMES[c])
+def test_valores_que_faltan_van_a_cero(cmd):
+    assert P.decode_frame(P.encode_frame(cmd, 5)) == (cmd, (5,) + (0,)*(P.payload_words(cmd) - 1))
+
+def test_demasiados_valores():
+    with pytest.raises(ValueError):
+        P.encode_frame(P.CMD_XYZ, 1, 2, 3, 4)
+
+def test_trama_fija():
+    assert P.encode_xyz(120, 40, -60) == XYZ_FRAME
+    assert P.decode_message(XYZ_FRAME) == (P.CMD_XYZ, (120.0, 40.0, -60.0))
+
+@pytest.mark.parametrize("v, scale, q", [
+    (1e6, 1, P.INT16_MAX), (-1e6, 1, P.INT16_MIN), (3276.8, 10, P.INT16_MAX),
+    (-3276.9, 10, P.INT16_MIN), (12.34, 10, 123), (-0.04, 10, 0), (32767.4, 1, 32767),
+])
+def test_q_satura_a_int16(v, scale, q):
+    assert P._q(v, scale) == q
+
+def test_xyz_fuera_de_rango_satura():
+    _, vals = P.decode_frame(P.encode_xyz(5000, -5000, 0.05))
+    assert vals == (P.INT16_MAX, P.INT16_MIN, 0)
+
+@pytest.mark.parametrize("data, crc", CRC_VECTORS)
+def test_crc_vectores(data, crc):
+    assert P.crc8(data) == crc
+
+@pytest.mark.skipif(shutil.which("c++") is None, reason="sin compilador C++")
+def test_crc_del_sketch(tmp_path):
+    src = open(SKETCH, encoding="utf-8").read()
+    crc = re.search(r"^uint8_t crc8\(.*?^}\n", src, re.S | re.M).group(0)
+    (tmp_path / "crc.cpp").write_text(
+        "#include <cstdint>\n#include <cstdio>\n" + crc +
+        'int main(){ uint8_t d[64]; int n = (int)fread(d, 1, sizeof d, stdin); printf("%d\\n", crc8(d, n)); }\n')
+    exe = tmp_path / "crc"
+    subprocess.run(["c++", "-o", str(exe), str(tmp_path / "crc.cpp")], check=True)
+    for data, want in CRC_VECTORS:
+        out = subprocess.run([str(exe)], input=data, capture_output=True, check=True).stdout
+        assert int(out) == want
+
+@pytest.mark.parametrize("pos", [1, 2, 4, 8])
+def test_crc_rechaza_un_bit_cambiado(pos):
+    bad = bytearray(XYZ_FRAME); bad[pos] ^= 0x10
+    with pytest.raises(ValueError):
+        P.decode_frame(bytes(bad))
+    assert P.decode_message(bytes(bad)) is None
+
+def test_tamano_o_inicio_incorrecto():
+    with pytest.raises(ValueError):
+        P.decode_frame(XYZ_FRAME[:-1])
+    with pytest.raises(ValueError):
+        P.decode_frame(b"\x5a" + XYZ_FRAME[1:])
+
+def _stream():
+    frames = [P.encode_xyz(1, 2, 3), P.encode_ticks(300, 310, 320), P.encode_hex_ticks(range(300, 318)),
+              P.encode_buf_data(4, [(1, 2, 3)]*P.BUF_CHUNK), P.encode_play(50)]
+    return frames, [P.decode_frame(f) for f in frames]
+
+def test_decoder_troceado():
+    frames, want = _stream()
+    data = b"".join(frames)
+    for size in (1, 2, 5, 9, 40):
+        dec = P.FrameDecoder()
+        got = [m for i in range(0, len(data), size) for m in dec.feed(data[i:i+size])]
+        assert got == want and dec.crc_errors == 0 and not dec.buf
+
+def test_decoder_se_resincroniza():
+    frames, want = _stream()
+    bad = bytearray(frames[0]); bad[3] ^= 0xFF
+    data = b"\x00\xff\x07" + bytes(bad) + frames[0] + b"OFF\n" + b"".join(frames[1:]) + b"\xa5"
+    dec = P.FrameDecoder()
+    assert [m for b in data for m in dec.feed(bytes([b]))] == [want[0]] + want[1:]
+    assert dec.crc_errors == 1
+    assert dec.buf == bytearray(b"\xa5")          # un inicio sin terminar se queda esperando
+
+def test_decoder_falso_inicio_dentro_de_basura():
+    # un 0xA5 suelto "se come" los bytes siguientes como trama; al fallar el CRC se salta solo ese byte
+    dec = P.FrameDecoder()
+    frame = P.encode_ticks(1, 2, 3)
+    assert dec.feed(b"\xa5\x04" + frame) == [P.decode_frame(frame)]
+    assert dec.crc_errors == 1
+
+def _bin_port():
+    ser = EmulatedSerial(emulator=FirmwareEmulator(), baudrate=1_000_000, banner=False)
+    ser.write(b"HELLO BIN\n")
+    return ser
+
+def _lines(ser, n):
+    return [ser.readline().decode().strip() for _ in range(n)]
+
+def test_emulador_resincroniza_como_el_sketch():
+    ser = _bin_port()
+    assert _lines(ser, 1) == [f"OK BIN {P.PROTO_VERSION} 96"]
+    bad = bytearray(P.encode_ticks(200, 200, 200)); bad[4] ^= 0xFF
+    ser.write(b"\x07x" + bytes(bad) + P.encode_ticks(300, 310, 320))
+    assert ser.fw.joint_ticks() == (300, 310, 320)
+    ser.write(b"\xff" + P.encode_ticks(301, 311, 321))            # byte suelto: no bloquea ni se traga la trama
+    assert ser.fw.joint_ticks() == (301, 311, 321)
+    assert _lines(ser, 1) == ["ERR CRC"]
+    assert ser.read_all() == b""
+
+def test_emulador_linea_ascii_entre_tramas():
+    ser = _bin_port()
+    ser.write(P.encode_ticks(300, 310, 320) + b"OFF\n" + P.encode_stop())
+    assert ser.fw.joint_ticks() == (0, 0, 0)
+    assert _lines(ser, 3) == [f"OK BIN {P.PROTO_VERSION} 96", "OK OFF", "OK STOP"]
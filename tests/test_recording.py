@@ -0,0 +1,96 @@
+"""Grabación contra el firmware emulado: latencia hasta la línea, hasta el OK y lectura con memmap."""
+import time
+
+import numpy as np
+
+from spaider.calibration import DEFAULT_DIR, DEFAULT_ZERO
+from spaider.emulator import EmulatedSerial, FirmwareEmulator
+from spaider.link import SerialLink
+from spaider.player import frame_encoder
+from spaider.protocol import HELLO_BIN
+from spaider.recording import Recorder, Recording, ReplaySource
+
+L = (50.0, 80.0, 100.0)
+
+def _link(baud=115200, binary=True):
+    link = SerialLink(EmulatedSerial(emulator=FirmwareEmulator(), baudrate=baud)).start()
+    if binary:
+        assert link.send(HELLO_BIN).result(timeout=2).ok
+    return link
+
+def _record(tmp_path, link, binary, n=20, period=0.005, before_close=None):
+    """Graba `n` tramas XYZ enviadas cada `period` s, como el player (más deprisa, la cola descarta las viejas)."""
+    rec = Recorder(str(tmp_path / "s.sprec"), "xyz", binary, L, DEFAULT_ZERO, DEFAULT_DIR, flush_every=0.05)
+    encode = frame_encoder("xyz", binary)
+    for i in range(n):
+        on_wire, on_reply = rec.frame(data := encode((100.0 + i*0.5, 10.0, 120.0)))
+        link.send_raw(data, on_wire=on_wire, on_reply=on_reply)
+        time.sleep(period)
+    if before_close: before_close()
+    rec.close()
+    return Recording(rec.path)
+
+def test_ascii_graba_la_latencia_del_ok(tmp_path):
+    link = _link(binary=False)
+    try:
+        rec = _record(tmp_path, link, binary=False)
+    finally:
+        link.close()
+    assert len(rec) == 20 and rec.meta["version"] == 1
+    wire, ack = np.asarray(rec.wire), np.asarray(rec.ack)
+    assert np.isfinite(wire).all() and np.isfinite(ack).all()
+    assert (ack > 0).all() and (ack < 0.1).all()
+    s = rec.summary()
+    assert s["acked"] == 20 and s["dropped"] == 0 and 0 < s["ack_p50_ms"] <= s["ack_max_ms"]
+
+def test_ack_cubre_la_ida_y_vuelta(tmp_path):
+    """A 9600 la línea `XYZ …` (~15 bytes) y su `OK XYZ` tardan ~1 ms/byte: el OK no puede llegar antes."""
+    link = _link(baud=9600, binary=False)
+    try:
+        rec = _record(tmp_path, link, binary=False, n=3, period=0.04)
+    finally:
+        link.close()
+    assert (np.asarray(rec.ack) > 0.005).all()
+
+def test_binario_sin_respuesta(tmp_path):
+    link = _link()
+    try:
+        rec = _record(tmp_path, link, binary=True)
+    finally:
+        link.close()
+    assert np.isfinite(np.asarray(rec.wire)).all()
+    assert np.isnan(np.asarray(rec.ack)).all()
+    assert rec.summary()["acked"] == 0 and link._acks == type(link._acks)()
+
+def test_estop_descarta_y_no_espera_respuesta(tmp_path):
+    link = _link(baud=9600, binary=False)
+    try:
+        rec = _record(tmp_path, link, binary=False, n=30, period=0,
+                      before_close=lambda: link.estop().result(timeout=1))
+    finally:
+        link.close()
+    wire, ack = np.asarray(rec.wire), np.asarray(rec.ack)
+    assert len(rec) == 30 and np.isnan(wire).any()
+    assert np.isnan(ack[np.isnan(wire)]).all()            # lo que no salió tampoco tiene OK
+    assert rec.summary()["dropped"] == int(np.isnan(wire).sum())
+
+def test_respuesta_perdida_es_nan(tmp_path, monkeypatch):
+    link = _link(binary=False)
+    link.timeout = 0.1
+    monkeypatch.setattr(link.ser.fw, "_line", lambda cmd: [])   # el sketch no contesta
+    try:
+        rec = _record(tmp_path, link, binary=False, n=3)
+    finally:
+        link.close()
+    assert np.isfinite(np.asarray(rec.wire)).all() and np.isnan(np.asarray(rec.ack)).all()
+    assert not link._acks
+
+def test_ventana_y_replay(tmp_path):
+    link = _link()
+    try:
+        rec = _record(tmp_path, link, binary=True, n=10)
+    finally:
+        link.close()
+    assert rec.window(0, rec.duration + 1) == slice(0, 10)
+    src = ReplaySource(rec, clock=lambda: 0.0)
+    assert src.frame_at(0) == frame_encoder("xyz", True)(rec.xyz[0])
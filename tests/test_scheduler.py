@@ -0,0 +1,87 @@
+"""DeadlineScheduler con reloj falso: skip sin ráfagas, catchup recupera los ticks y sin deriva."""
+import pytest
+
+from spaider.scheduler import DeadlineScheduler, TickStats
+
+HZ = 50.0
+P = 1.0 / HZ
+
+class FakeClock:
+    """Reloj que solo avanza al dormir o al «trabajar»; `oversleep` simula un sleep que se pasa."""
+
+    def __init__(self, oversleep=0.0):
+        self.t = 1000.0
+        self.oversleep = oversleep
+
+    def __call__(self):
+        return self.t
+
+    def sleep(self, dt):
+        self.t += dt + self.oversleep
+
+def _run(policy, work, n, oversleep=0.0):
+    """Ejecuta `n` ticks; `work(k)` son los s que tarda el tick k. Devuelve [(k, instante relativo)]."""
+    clock = FakeClock(oversleep)
+    sched = DeadlineScheduler(HZ, policy, clock=clock, sleep=clock.sleep)
+    sched.start()
+    t0, out = clock.t, []
+    for _ in range(n):
+        k = sched.wait()
+        out.append((k, clock.t - t0))
+        clock.t += work(k)
+    return sched, out
+
+def _stall(k):
+    return 3.5*P if k == 5 else 0.1*P          # el tick 5 tarda 3,5 periodos
+
+def test_skip_salta_sin_rafaga():
+    sched, out = _run("skip", _stall, 10)
+    ks = [k for k, _ in out]
+    assert ks == [0, 1, 2, 3, 4, 5, 8, 9, 10, 11]              # 6 y 7 se pierden
+    times = dict(out)
+    assert times[8] == pytest.approx(8.5*P)                      # el siguiente sale en cuanto se puede…
+    assert times[9] == pytest.approx(9*P)                        # …y luego vuelve a su deadline
+    assert sched.stats.missed == 2 and sched.stats.ticks == 10
+    snap = sched.stats.snapshot()
+    assert snap["missed"] == 2 and snap["jitter_max_ms"] == pytest.approx(0.5*P*1e3)
+
+def test_catchup_recupera_los_perdidos():
+    sched, out = _run("catchup", _stall, 12)
+    assert [k for k, _ in out] == list(range(12))
+    times = dict(out)
+    assert [times[k] for k in (6, 7, 8)] == pytest.approx([8.5*P, 8.6*P, 8.7*P])   # seguidos, sin dormir
+    assert times[9] == pytest.approx(9*P)
+    assert sched.stats.missed == 0
+    assert sched.stats.snapshot()["jitter_max_ms"] == pytest.approx(2.5*P*1e3)
+
+@pytest.mark.parametrize("policy", ["skip", "catchup"])
+def test_sin_deriva(policy):
+    n = 5000
+    _, out = _run(policy, lambda k: (k % 7) * 0.1*P, n, oversleep=0.2*P)
+    for k, t in out[1:]:
+        assert t == pytest.approx(k*P + 0.2*P, abs=1e-9)          # el retraso no se acumula
+    assert out[-1][0] == n - 1
+
+def test_jitter_y_ritmo():
+    stats = TickStats(window=4)
+    for i, late in enumerate([0.001, 0.002, 0.003, 0.004, 0.010]):
+        stats.record(i * P, late, missed=i % 2)
+    snap = stats.snapshot()
+    assert snap["ticks"] == 5 and snap["missed"] == 2
+    assert snap["hz"] == pytest.approx(HZ)
+    assert snap["jitter_max_ms"] == pytest.approx(10.0)               # ventana: los 4 últimos
+    assert snap["jitter_p50_ms"] == pytest.approx(3.5)
+
+def test_cambio_de_ritmo_sin_salto():
+    clock = FakeClock()
+    sched = DeadlineScheduler(HZ, clock=clock, sleep=clock.sleep)
+    sched.start()
+    sched.wait(); sched.wait()
+    sched.set_rate(2*HZ)
+    t = clock.t
+    assert sched.wait() == 2 and clock.t - t == pytest.approx(P / 2)
+    assert sched.stats.missed == 0
+
+def test_politica_desconocida():
+    with pytest.raises(ValueError):
+        DeadlineScheduler(HZ, "burst")
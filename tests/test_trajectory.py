@@ -0,0 +1,42 @@
+"""Generador de paso: `duty` fuera de (0, 1) se rechaza en vez de dar NaN."""
+import warnings
+
+import numpy as np
+import pytest
+
+from spaider import cli
+from spaider.trajectory import GaitStream, check_duty, gait_cycle, step_profile
+
+BAD_DUTY = [0.0, 1.0, -0.2, 1.5, float("nan")]
+
+@pytest.mark.parametrize("duty", [0.05, 0.5, 0.95])
+def test_ciclo_finito(duty):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        x, y, z = gait_cycle(120.0, 40.0, -60.0, 60.0, 35.0, 100, duty)
+    assert np.isfinite(x).all() and np.isfinite(z).all()
+    assert np.count_nonzero(z > -60.0) == pytest.approx(100*(1 - duty), abs=1)   # muestras en el aire
+
+@pytest.mark.parametrize("duty", BAD_DUTY)
+def test_duty_fuera_de_rango(duty):
+    with pytest.raises(ValueError, match="duty"):
+        check_duty(duty)
+    with pytest.raises(ValueError, match="duty"):
+        step_profile([0.0, 0.5], 60.0, 35.0, duty)
+    with pytest.raises(ValueError, match="duty"):
+        gait_cycle(120.0, 40.0, -60.0, 60.0, 35.0, 50, duty)
+
+@pytest.mark.parametrize("duty", BAD_DUTY)
+def test_gait_stream(duty):
+    with pytest.raises(ValueError):
+        GaitStream(120, 40, -60, 60, 35, 1.2, duty)
+    gs = GaitStream(120, 40, -60, 60, 35, 1.2, 0.5, clock=lambda: 0.0)
+    with pytest.raises(ValueError):
+        gs.update(duty=duty)
+    assert gs.params["duty"] == 0.5                  # el paso en marcha no se toca
+    assert all(np.isfinite(gs.sample(0.3)))
+
+@pytest.mark.parametrize("duty", ["0", "1", "1.2"])
+def test_cli_rechaza_duty(duty, capsys):
+    assert cli.main(["play", "--check", "--duty", duty]) == 2
+    assert "duty" in capsys.readouterr().err
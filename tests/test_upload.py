@@ -0,0 +1,93 @@
+"""CycleUploader contra el firmware emulado: contenido del buffer y ritmo de reproducción."""
+import time
+
+import numpy as np
+import pytest
+
+from spaider.emulator import LEG_CH, EmulatedSerial, FirmwareEmulator
+from spaider.link import SerialLink
+from spaider.protocol import BUF_TICKS, BUF_XYZ, HELLO_BIN, parse_hello_bin
+from spaider.upload import CycleUploader, UploadError, resample_cycle, xyz_to_buffer
+
+@pytest.fixture
+def link():
+    ser = EmulatedSerial(emulator=FirmwareEmulator(buf_max=96), baudrate=115200)
+    link = SerialLink(ser).start()
+    version, cap = parse_hello_bin(link.send(HELLO_BIN).result(timeout=1).line)
+    assert cap == 96
+    yield link
+    link.close()
+
+def _ticks(n):
+    i = np.arange(n)
+    return np.stack([300 + i, 320 + i % 7, 280 - i % 5], axis=1)
+
+def test_buffer_igual_a_la_tabla(link):
+    table = _ticks(37)                            # no múltiplo de BUF_CHUNK: la última trama va a medias
+    up = CycleUploader(link, 96)
+    assert up.upload(table) == 37
+    fw = link.ser.fw
+    assert (fw.buf_n, fw.buf_kind) == (37, BUF_TICKS)
+    assert fw.buf[:37] == table.tolist()
+
+def test_ciclo_largo_se_remuestrea(link):
+    table = _ticks(200)
+    assert CycleUploader(link, 96).upload(table) == 96
+    want = np.rint(resample_cycle(table, 96)).astype(int).tolist()
+    assert link.ser.fw.buf[:96] == want
+
+def test_xyz(link):
+    t = np.linspace(0, 2*np.pi, 24, endpoint=False)
+    table = xyz_to_buffer(100 + 10*np.cos(t), 10 + 5*np.sin(t), np.full_like(t, 120.0))
+    CycleUploader(link, 96).upload(table, BUF_XYZ)
+    fw = link.ser.fw
+    assert fw.buf_kind == BUF_XYZ and fw.buf[:24] == table.astype(int).tolist()
+
+def test_reproduccion_al_ritmo_pedido(link):
+    n, period = 20, 0.4
+    table = _ticks(n)
+    up = CycleUploader(link, 96)
+    up.upload(table)
+    hz = up.rate_for_period(period)
+    assert hz == pytest.approx(50.0)
+    fw = link.ser.fw
+    t0 = len(fw.writes)
+    up.play(hz, phase=5)
+    time.sleep(0.5)
+    up.stop()
+    coxa = [(t, v) for t, ch, v in list(fw.writes)[t0:] if ch == LEG_CH[0]]
+    assert len(coxa) >= 20
+    ts = np.array([t for t, _ in coxa])
+    assert np.median(np.diff(ts)) == pytest.approx(1/hz, rel=0.01)
+    assert np.diff(ts).max() < 1.5/hz
+    assert [v for _, v in coxa[:n]] == [table[(5 + k) % n, 0] for k in range(n)]   # desde la fase 5 y en bucle
+
+def test_ritmo_y_fase(link):
+    up = CycleUploader(link, 96)
+    up.upload(_ticks(10))
+    up.play(20)
+    assert up.set_rate(40).startswith("OK RATE")
+    assert link.ser.fw.play_period == pytest.approx(1/40)
+    up.stop()
+    up.set_phase(7)
+    assert link.ser.fw.play_idx == 7
+
+def test_errores_del_sketch(link):
+    up = CycleUploader(link, 0)                   # sin límite en el host: el sketch rechaza el BEGIN
+    with pytest.raises(UploadError, match="ERR BEGIN 96"):
+        up.upload(_ticks(100))
+    with pytest.raises(UploadError, match="ERR PHASE"):
+        CycleUploader(link, 96).set_phase(200)
+
+def test_sin_respuesta_agota_los_intentos(link, monkeypatch):
+    fw = link.ser.fw
+    monkeypatch.setattr(fw, "_frame", lambda cmd, v: [])     # el sketch no contesta
+    n0 = fw.commands
+    up = CycleUploader(link, 96, timeout=0.05, retries=2)
+    with pytest.raises(UploadError, match="sin respuesta"):
+        up.stop()
+    assert fw.commands - n0 == 2
+
+def test_retries_cero():
+    with pytest.raises(ValueError):
+        CycleUploader(None, 96, retries=0)
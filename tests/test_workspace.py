@@ -0,0 +1,63 @@
+"""`WorkspaceMap.contains` (rejilla O(1)) frente a la IK exacta de `ik_batch`, salvo en el borde de celda."""
+import numpy as np
+import pytest
+
+from spaider.kinematics import DEFAULT_L, SAFE_MAX, SAFE_MIN, fk_xyz, ik_batch
+from spaider.workspace import WorkspaceMap
+
+L = (DEFAULT_L["L1"], DEFAULT_L["L2"], DEFAULT_L["L3"])
+
+WIDE = ((0, 0, 0), (180, 180, 180))   # sin límites que tapen el alcance: la tibia llega a 0° y 180°
+
+@pytest.fixture(scope="module", params=[(SAFE_MIN, SAFE_MAX), WIDE], ids=["safe", "wide"])
+def limits(request):
+    return request.param
+
+@pytest.fixture(scope="module")
+def wmap(limits):
+    return WorkspaceMap(*L, *limits, n2=20, n3=20)
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(7)
+    reach = sum(L)
+    return rng.uniform([-reach, -reach/4, -reach/2], [reach, reach, reach], size=(20000, 3)).T
+
+def _truth(wmap, x, y, z, knee_up):
+    sol = ik_batch(*L, x, y, z, wmap.safe_min, wmap.safe_max)
+    return sol.ok(True) | sol.ok(False) if knee_up is None else sol.ok(knee_up)
+
+def _near_edge(wmap, x, y, z, knee_up):
+    """¿Cambia la respuesta exacta a menos de una celda (en R y Z, mismo acimut)?"""
+    dr = wmap.r_edges[1] - wmap.r_edges[0]
+    dz = wmap.z_edges[1] - wmap.z_edges[0]
+    r = np.hypot(x, y)
+    ux, uy = np.where(r > 0, x / np.maximum(r, 1e-12), 1.0), np.where(r > 0, y / np.maximum(r, 1e-12), 0.0)
+    here = _truth(wmap, x, y, z, knee_up)
+    edge = np.zeros_like(here)
+    steps = (-1.0, -0.5, 0.0, 0.5, 1.0)              # cada media celda: junto al alcance hay franjas finas
+    for a in steps:
+        for b in steps:
+            rr = np.maximum(r + a*dr, 0.0)
+            edge |= _truth(wmap, rr*ux, rr*uy, z + b*dz, knee_up) != here
+    return edge
+
+@pytest.mark.parametrize("knee_up", [None, True, False])
+def test_contains_igual_que_ik(wmap, points, knee_up):
+    x, y, z = points
+    truth = _truth(wmap, x, y, z, knee_up)
+    got = np.array([wmap.contains(*p, knee_up=knee_up) for p in zip(x, y, z)])
+    np.testing.assert_array_equal(wmap.contains_batch(x, y, z, knee_up), got)
+    diff = got != truth
+    assert diff.mean() < 0.02, f"{diff.sum()} discrepancias"
+    assert _near_edge(wmap, *points[:, diff], knee_up).all(), "discrepancias lejos del borde de celda"
+    if knee_up is not False:
+        assert truth.sum() > 1000 and (got & truth).sum() > 0.95 * truth.sum()
+
+def test_coxa_y_fuera_de_rejilla():
+    wmap = WorkspaceMap(*L, n2=20, n3=20)
+    x, y, z = fk_xyz(*L, 1.0, 60.0, 45.0)
+    assert wmap.contains(x, y, z) and not wmap.contains(x, -y, z)              # coxa en [0°, 180°]
+    assert not wmap.contains(sum(L) + 1.0, 0.0, 0.0)                            # más allá del alcance
+    assert not wmap.contains(L[0] - 5.0, 1.0, 0.0)                              # dentro de L1
+    assert not wmap.contains(L[0] + 50.0, 1.0, sum(L[1:]) + 1.0)                # Z fuera de la rejilla